@@ -1,16 +1,23 @@
-import subprocess
-import sys
-import json
 import platform
 import os
 import logging
 from logging.handlers import RotatingFileHandler
-import datetime
-from report_generator import generate_report
-import cmd
-from tqdm import tqdm
-from flask import Flask, render_template, send_from_directory
-from flask_socketio import SocketIO
+import threading
+from report_generator import generate_report, generate_reports, generate_run_report, FORMATS
+import history
+from jobs import JobManager
+import spool
+from events import EventSink
+import fleet
+import rollback_store
+import restore
+import planner
+import metrics
+import watch
+import manifest
+from engine import run_modules, DEFAULT_WORKERS
+from flask import Flask, render_template, send_from_directory, request, jsonify, Response
+from flask_socketio import SocketIO, emit, join_room
 
 # --- 1. Setup Logging & Global Definitions ---
 if not os.path.exists('logs'):
@@ -20,17 +27,10 @@ log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message
 logger = logging.getLogger(__name__)
 logger.addHandler(log_handler)
 logger.setLevel(logging.INFO)
+metrics.attach_log_handler(log_handler)
 
-WINDOWS_MODULES = {
-    "L1": ["AccountPolicies.ps1", "LocalPolicies.ps1", "SecurityOptions.ps1"],
-    "L2": ["SystemServices.ps1", "WindowsFirewall.ps1"],
-    "L3": ["AdvancedAudit.ps1", "Defender.ps1"]
-}
-LINUX_MODULES = {
-    "L1": ["Filesystem.sh", "PackageManagement.sh", "AccessControl.sh"],
-    "L2": ["Services.sh", "Network.sh"],
-    "L3": ["Firewall.sh", "LoggingAndAuditing.sh"]
-}
+# An audit followed shortly by a report reuses the same fact snapshot.
+WEB_FACTS_TTL = 30
 
 class bcolors:
     HEADER = '\033[95m'
@@ -43,56 +43,46 @@ class bcolors:
     BOLD = '\033[1m'
 
 # --- 2. Shared Core Logic ---
+def modules_for(os_type, level, mode='Audit'):
+    """The modules a level runs on an OS, from the manifest (anything but Windows runs the Linux modules)."""
+    return manifest.modules_for("Windows" if os_type == "Windows" else "Linux", level, mode)
+
 # This function is now used by both the CLI and the Web UI
-def run_profile(level, mode, os_type, socketio_instance=None):
-    logger.info(f"Starting '{mode}' process for Level {level} on {os_type}")
-    
-    all_results = []
-    modules_to_run = []
-    levels = WINDOWS_MODULES if os_type == "Windows" else LINUX_MODULES
-    
-    if level in ["L1", "L2", "L3"]: modules_to_run.extend(levels.get("L1", []))
-    if level in ["L2", "L3"]: modules_to_run.extend(levels.get("L2", []))
-    if level in ["L3"]: modules_to_run.extend(levels.get("L3", []))
-    modules_to_run = sorted(list(set(modules_to_run)))
-    
-    total_modules = len(modules_to_run)
+def run_profile(level, mode, os_type, socketio_instance=None, max_workers=DEFAULT_WORKERS, facts_ttl=WEB_FACTS_TTL,
+                incremental=False, full=False, recorder=None, room=None, module_timeout=None, cancel_event=None,
+                result_spool=None, rollback=None, plan=None, transport=None, native=True):
+    logger.info(f"Starting '{mode}' process for Level {level} on {os_type} with {max_workers} worker(s)")
     
-    for i, module_name in enumerate(modules_to_run):
-        # Emit progress to the web UI if a socketio instance is provided
+    modules_to_run = plan.modules if plan else modules_for(os_type, level, mode)
+
+    # Emit progress and results to the web UI if a socketio instance is provided,
+    # scoped to the job's room when one is given. The engine serializes these
+    # callbacks, so emits never interleave. With a spool, every event is also
+    # appended to it and carries its sequence number for later replay.
+    def send(event, payload):
+        if result_spool:
+            payload = dict(payload, seq=result_spool.append(event, payload))
         if socketio_instance:
-            socketio_instance.emit('progress_update', {'current': i + 1, 'total': total_modules, 'module': module_name})
+            socketio_instance.emit(event, payload, to=room)
 
-        module_path = os.path.join('scripts', os_type.lower(), 'modules', module_name)
-        if not os.path.exists(module_path):
-            error_msg = f"Module file not found at '{module_path}'"
-            if socketio_instance:
-                socketio_instance.emit('console_output', {'status': 'Failure', 'parameter': 'System Error', 'details': error_msg})
-            continue
+    def on_start(index, total, module_name):
+        send('progress_update', {'current': index, 'total': total, 'module': module_name})
 
-        if os_type == "Windows":
-            command = f"powershell.exe -ExecutionPolicy Bypass -File .\\{module_path} -Mode {mode} -Level {level}"
-        else:
-            command = f"./{module_path} {mode} {level}"
-        
-        try:
-            process = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            for line in process.stdout.strip().split('\n'):
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                    all_results.append(data)
-                    if socketio_instance:
-                        socketio_instance.emit('console_output', data)
-                except json.JSONDecodeError:
-                    if socketio_instance:
-                        socketio_instance.emit('console_output', {'status': 'Warning', 'parameter': 'RAW Output', 'details': line.strip()})
-        except subprocess.CalledProcessError as e:
-            error_details = f"Module '{module_name}' exited with an error. STDERR: {e.stderr.strip()}"
-            if socketio_instance:
-                socketio_instance.emit('console_output', {'status': 'Failure', 'parameter': f'Module Error: {module_name}', 'details': error_details})
-    
-    return all_results
+    def on_result(module_name, data):
+        if recorder:
+            recorder.add(module_name, data)
+        send('console_output', data)
+
+    def on_raw(module_name, line):
+        send('console_output', {'status': 'Warning', 'parameter': 'RAW Output', 'details': line})
+
+    def on_error(module_name, message):
+        send('console_output', {'status': 'Failure', 'parameter': f'Module Error: {module_name}', 'details': message})
+
+    return run_modules(os_type, modules_to_run, mode, level, max_workers=max_workers, facts_ttl=facts_ttl, incremental=incremental, full=full,
+                       module_timeout=module_timeout, cancel_event=cancel_event, rollback=rollback,
+                       env_overrides=plan.env_overrides() if plan else None, transport=transport, native=native,
+                       on_start=on_start, on_result=on_result, on_raw=on_raw, on_error=on_error)
 
 # --- 3. Web Application (Flask & SocketIO) ---
 app = Flask(__name__)
@@ -104,25 +94,391 @@ def index():
 
 @app.route('/reports/<path:filename>')
 def download_report(filename):
-    return send_from_directory('reports', filename, as_attachment=True)
+    # Paginated HTML reports are browsed in place; everything else is downloaded.
+    return send_from_directory('reports', filename, as_attachment=not filename.endswith('.html'))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Module, run and report timings in the Prometheus text exposition format.
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# --- Audit History API ---
+@app.route('/api/runs')
+def api_runs():
+    return jsonify(history.get_store().list_runs(limit=request.args.get('limit', 20, type=int),
+                                                 host=request.args.get('host')))
+
+@app.route('/api/runs/<int:run_id>')
+def api_run(run_id):
+    store = history.get_store()
+    run = store.get_run(run_id)
+    if run is None:
+        return jsonify({'error': f'Run {run_id} not found'}), 404
+    return jsonify({'run': run, 'results': store.run_results(run_id)})
+
+@app.route('/api/history/non-compliant')
+def api_non_compliant():
+    return jsonify(history.get_store().non_compliant(days=request.args.get('days', 30, type=int),
+                                                     host=request.args.get('host')))
+
+@app.route('/api/history/drift')
+def api_drift():
+    parameter = request.args.get('parameter')
+    if not parameter:
+        return jsonify({'error': "The 'parameter' query argument is required"}), 400
+    return jsonify(history.get_store().drift(parameter, host=request.args.get('host')))
+
+# --- Background Jobs ---
+def execute_job(job):
+    """Runs one queued job, streaming its events to the job's room and spool."""
+    params = job.params
+    if params.get('fleet'):
+        return execute_fleet_job(job)
+    if params.get('rollback_id'):
+        return execute_rollback_job(job)
+    level, mode, os_type = params['level'], params['mode'], params['os_type']
+    room = job.id
+
+    # Results reach the browser in coalesced batches; the spool keeps every event.
+    with spool.ResultSpool(job.id) as result_spool, EventSink(socketio, room) as sink:
+        def publish(event, payload):
+            sink.emit(event, dict(payload, seq=result_spool.append(event, payload)))
+
+        publish('action_started', {'mode': mode, 'level': level, 'job_id': job.id})
+
+        # Targeted hardening audits first and only remediates the failing checks.
+        plan = None
+        if mode == 'Harden' and params['targeted']:
+            plan = planner.plan_harden(os_type, modules_for(os_type, level), level, max_workers=params['workers'],
+                                       full=params['full'], module_timeout=job.module_timeout, cancel_event=job.cancel_event)
+            publish('harden_plan', {'job_id': job.id, **plan.to_dict()})
+            if params['dry_run'] or not plan.items:
+                if plan.items:
+                    message = f"Dry run: {len(plan.items)} change(s) planned for level {level}; nothing was applied."
+                elif plan.not_planned:
+                    message = f"Nothing planned: {len(plan.not_planned)} module(s) at level {level} could not be audited."
+                else:
+                    message = f"Nothing to harden: every check at level {level} is compliant."
+                status = 'Failure' if plan.not_planned and not plan.items else 'Success'
+                publish('action_finished', {'job_id': job.id, 'status': status, 'message': message})
+                return None
+
+        # Audits are incremental unless the client asks for a full run.
+        # Hardening runs record what they change as one rollback point.
+        rollback = rollback_store.get_store().begin_run(level) if mode == 'Harden' else None
+        with history.start_run(level, mode, os_type) as recorder:
+            results = run_profile(level, mode, os_type, sink, max_workers=params['workers'],
+                                  incremental=True, full=params['full'], recorder=recorder, room=room,
+                                  module_timeout=job.module_timeout, cancel_event=job.cancel_event,
+                                  result_spool=result_spool, rollback=rollback, plan=plan)
+        # Counts by status and module and the most frequent failures, from the result columns.
+        finished = {'job_id': job.id, 'run_id': recorder.run_id, 'summary': results.summary().to_dict()}
+        if rollback is not None and rollback.commit():
+            finished['rollback_id'] = rollback.id
+
+        if job.cancelled:
+            publish('action_finished', {**finished, 'status': 'Failure', 'message': f'{mode} process for level {level} was stopped ({job.cancel_reason}).'})
+        elif mode == 'Audit' and params['generate_report']:
+            if not results:
+                publish('action_finished', {**finished, 'status': 'Failure', 'message': 'Report generation failed: No audit data collected.'})
+                return recorder.run_id
+            # Reports for a result set that was already rendered come from the report cache.
+            report_files = generate_reports(results, os_type, level, params['formats'])
+            publish('action_finished', {**finished, 'status': 'Success', 'message': 'Report generated successfully!',
+                                        'filename': os.path.relpath(report_files[params['formats'][0]], 'reports'),
+                                        'files': {f: os.path.relpath(path, 'reports') for f, path in report_files.items()}})
+        else:
+            publish('action_finished', {**finished, 'status': 'Success', 'message': f'{mode} process completed for level {level}.'})
+    return recorder.run_id
+
+def execute_fleet_job(job):
+    """Runs a run_fleet job: every inventory host, aggregated into one fleet report."""
+    params = job.params
+    level, mode = params['level'], params['mode']
+    room = job.id
+    transports = fleet.parse_inventory(params['inventory'])
+    modules_to_run = manifest.modules_for('Linux', level)
+    recorders = {}
+
+    with spool.ResultSpool(job.id) as result_spool, EventSink(socketio, room) as sink:
+        def publish(event, payload):
+            sink.emit(event, dict(payload, seq=result_spool.append(event, payload)))
+
+        def on_host_start(host):
+            recorders[host] = history.start_run(level, mode, 'Linux', host=host)
+            publish('host_started', {'host': host})
+
+        def on_result(host, module_name, data):
+            recorders[host].add(module_name, data)
+            publish('console_output', {**data, 'host': host})
+
+        def on_error(host, module_name, message):
+            publish('console_output', {'status': 'Failure', 'parameter': f'Host Error: {host}', 'details': message, 'host': host})
+
+        def on_host_done(host_result):
+            recorders[host_result.name].close()
+            publish('host_finished', host_result.summary())
+
+        publish('action_started', {'mode': mode, 'level': level, 'job_id': job.id, 'hosts': len(transports)})
+        host_results = fleet.run_fleet(transports, modules_to_run, mode, level, max_hosts=params['max_hosts'],
+                                       per_host_workers=params['workers'], on_host_start=on_host_start,
+                                       on_result=on_result, on_error=on_error, on_host_done=on_host_done,
+                                       cancel_event=job.cancel_event, module_timeout=job.module_timeout)
+        tagged = fleet.tag_results(host_results)
+        finished = {'job_id': job.id, 'summary_file': os.path.basename(fleet.write_fleet_summary(host_results, level, mode)),
+                    'summary': tagged.summary().to_dict()}
+        if mode == 'Audit' and tagged:
+            finished['filename'] = os.path.basename(generate_report(tagged, "Fleet", level))
+        publish('action_finished', {**finished, 'status': 'Success', 'message': f'Fleet {mode} completed on {len(host_results)} host(s).'})
+    return finished
+
+def execute_rollback_job(job):
+    """Runs a run_rollback job: restores the modules concurrently, then verifies every item."""
+    params = job.params
+    run = rollback_store.get_store().open_run(params['rollback_id'])
+    room = job.id
+
+    with spool.ResultSpool(job.id) as result_spool, EventSink(socketio, room) as sink:
+        def publish(event, payload):
+            sink.emit(event, dict(payload, seq=result_spool.append(event, payload)))
+
+        if run is None:
+            publish('action_finished', {'job_id': job.id, 'status': 'Failure',
+                                        'message': f"Rollback point '{params['rollback_id']}' not found."})
+            return None
+        publish('action_started', {'mode': 'Rollback', 'level': params['level'], 'job_id': job.id})
+        outcome = restore.rollback_run(
+            params['os_type'], run, params['modules'] or None, max_workers=params['workers'],
+            cancel_event=job.cancel_event, module_timeout=job.module_timeout,
+            on_start=lambda index, total, module_name: publish('progress_update', {'current': index, 'total': total, 'module': module_name}),
+            on_result=lambda module_name, data: publish('console_output', data),
+            on_error=lambda module_name, message: publish('console_output', {'status': 'Failure', 'parameter': f'Module Error: {module_name}', 'details': message}))
+        if outcome.complete:
+            message = f"Rollback {run.id} completed and verified." + (" The rollback point was deleted." if outcome.deleted else "")
+        else:
+            message = (f"Rollback {run.id} incomplete: {len(outcome.errors)} error(s), {len(outcome.failed)} item(s) not restored. "
+                       "The rollback point was kept; run it again to retry.")
+        logger.info(message)
+        publish('action_finished', {'job_id': job.id, 'status': 'Success' if outcome.complete else 'Failure',
+                                    'message': message, 'rollback': outcome.to_dict()})
+        # Every client's list changes once a rollback point is used up or annotated.
+        socketio.emit('rollback_list', {'rollbacks': rollback_store.get_store().list_runs()})
+    return outcome.to_dict()
+
+job_manager = JobManager(execute_job)
+spool.prune_spools()
+
+# --- Result Spool API ---
+@app.route('/api/spool/<spool_id>')
+def api_spool_events(spool_id):
+    """Pages through a run's events by sequence number: ?after=<seq>&limit=<n>."""
+    try:
+        if not spool.spool_exists(spool_id):
+            return jsonify({'error': f'No spool for {spool_id}'}), 404
+        events, last_seq = spool.read_events(spool_id, request.args.get('after', 0, type=int),
+                                             min(request.args.get('limit', 500, type=int), 5000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = job_manager.get(spool_id)
+    return jsonify({'events': events, 'last_seq': last_seq,
+                    'complete': job is None or job.status not in ('queued', 'running')})
+
+@app.route('/api/spool/<spool_id>/raw')
+def api_spool_raw(spool_id):
+    """Serves raw NDJSON by byte range: ?offset=<bytes>&length=<bytes>."""
+    try:
+        if not spool.spool_exists(spool_id):
+            return jsonify({'error': f'No spool for {spool_id}'}), 404
+        chunk, next_offset = spool.read_bytes(spool_id, request.args.get('offset', 0, type=int),
+                                              min(request.args.get('length', 65536, type=int), 4 * 1024 * 1024))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(chunk, mimetype='application/x-ndjson', headers={'X-Next-Offset': str(next_offset)})
+
+@app.route('/api/rollbacks')
+def api_rollbacks():
+    return jsonify(rollback_store.get_store().list_runs())
+
+@socketio.on('list_rollbacks')
+def handle_list_rollbacks(data=None):
+    try:
+        emit('rollback_list', {'rollbacks': rollback_store.get_store().list_runs()})
+    except (OSError, ValueError) as e:
+        emit('rollback_list', {'error': str(e)})
+
+@socketio.on('run_rollback')
+def handle_run_rollback(data):
+    rollback_id = str(data.get('rollback_id', ''))
+    try:
+        run = rollback_store.get_store().open_run(rollback_id)
+        workers = max(1, int(data.get('workers', DEFAULT_WORKERS)))
+    except (TypeError, ValueError) as e:
+        emit('job_error', {'message': f'Invalid rollback request: {e}'})
+        return
+    if run is None:
+        emit('job_error', {'message': f"Rollback point '{rollback_id}' not found."})
+        return
+    modules = [m for m in data.get('modules') or [] if m in run.modules] if isinstance(data.get('modules'), list) else []
+    params = {'rollback_id': run.id, 'mode': 'Rollback', 'level': run.manifest['level'], 'os_type': platform.system(),
+              'modules': modules, 'workers': workers}
+    # Rollbacks write system state, so they never run beside another writing job.
+    job, merged = job_manager.submit(('rollback', run.id, tuple(modules)), params, writes=True)
+    join_room(job.id)
+    emit('job_submitted', {**job.to_dict(), 'merged': merged})
+
+@app.route('/api/jobs')
+def api_jobs():
+    return jsonify(job_manager.list())
 
 @socketio.on('run_action')
 def handle_run_action(data):
     level = data.get('level', 'L1')
     mode = data.get('mode', 'Audit')
+    try:
+        workers = max(1, int(data.get('workers', DEFAULT_WORKERS)))
+    except (TypeError, ValueError):
+        workers = DEFAULT_WORKERS
     os_type = platform.system()
-    
-    socketio.emit('action_started', {'mode': mode, 'level': level})
-    results = run_profile(level, mode, os_type, socketio)
-    
-    if mode == 'Audit' and data.get('generate_report', False):
-        if not results:
-            socketio.emit('action_finished', {'status': 'Failure', 'message': 'Report generation failed: No audit data collected.'})
+
+    formats = [f for f in data.get('formats') or ['pdf'] if f in FORMATS] or ['pdf']
+
+    # A report for a stored run is rebuilt from history without running any module.
+    if data.get('run_id') is not None and data.get('generate_report', False):
+        report_filename = generate_run_report(data['run_id'], formats)
+        if report_filename.startswith('Error'):
+            emit('action_finished', {'status': 'Failure', 'message': report_filename})
+        else:
+            emit('action_finished', {'status': 'Success', 'message': 'Report generated successfully!', 'filename': os.path.relpath(report_filename, 'reports')})
+        return
+
+    # Rollbacks go through run_rollback, which knows which rollback point to restore.
+    if level not in manifest.LEVELS or mode not in ('Audit', 'Harden'):
+        emit('job_error', {'message': f"Invalid request: level must be one of {', '.join(manifest.LEVELS)} "
+                                      f"and mode Audit or Harden, not {level!r}/{mode!r}."})
+        return
+
+    params = {'level': level, 'mode': mode, 'os_type': os_type, 'workers': workers,
+              'full': bool(data.get('full', False)), 'generate_report': bool(data.get('generate_report', False)),
+              'formats': formats, 'targeted': bool(data.get('targeted', True)), 'dry_run': bool(data.get('dry_run', False))}
+    # Identical requests share one job; anything but an audit or a dry run writes system state.
+    key = (os_type, level, mode, params['full'], params['generate_report'], tuple(formats), params['targeted'], params['dry_run'])
+    job, merged = job_manager.submit(key, params, writes=(mode != 'Audit' and not params['dry_run']))
+    join_room(job.id)
+    emit('job_submitted', {**job.to_dict(), 'merged': merged})
+
+@socketio.on('run_fleet')
+def handle_run_fleet(data):
+    level = data.get('level', 'L1')
+    mode = data.get('mode', 'Audit')
+    inventory = data.get('inventory', '')
+    if mode != 'Audit':
+        emit('job_error', {'message': 'Fleet runs are audit-only; remote hardening cannot be rolled back.'})
+        return
+    try:
+        hosts = fleet.parse_inventory(inventory)
+        workers = max(1, int(data.get('workers', DEFAULT_WORKERS)))
+        max_hosts = max(1, int(data.get('max_hosts', fleet.DEFAULT_MAX_HOSTS)))
+    except (TypeError, ValueError) as e:
+        emit('job_error', {'message': f'Invalid fleet request: {e}'})
+        return
+    if not hosts:
+        emit('job_error', {'message': 'The inventory lists no hosts.'})
+        return
+
+    params = {'fleet': True, 'level': level, 'mode': mode, 'inventory': inventory,
+              'workers': workers, 'max_hosts': max_hosts}
+    job, merged = job_manager.submit(('fleet', level, mode, inventory), params, writes=False)
+    join_room(job.id)
+    emit('job_submitted', {**job.to_dict(), 'merged': merged})
+
+@socketio.on('join_job')
+def handle_join_job(data):
+    job = job_manager.get(data.get('job_id'))
+    if job is None:
+        emit('job_error', {'message': f"Unknown job '{data.get('job_id')}'."})
+        return
+    join_room(job.id)
+    emit('job_status', job.to_dict())
+
+@socketio.on('replay_job')
+def handle_replay_job(data):
+    """
+    Replays a job's spooled events after `last_seq`, then leaves the client
+    in the job's room for live events. The room is joined first, so nothing
+    falls between replay and live delivery; clients drop seq values they
+    have already seen.
+    """
+    job_id = data.get('job_id')
+    try:
+        if not spool.spool_exists(job_id):
+            emit('job_error', {'message': f"No spooled events for job '{job_id}'."})
             return
-        report_filename = generate_report(results, os_type, level)
-        socketio.emit('action_finished', {'status': 'Success', 'message': 'Report generated successfully!', 'filename': os.path.basename(report_filename)})
-    else:
-        socketio.emit('action_finished', {'status': 'Success', 'message': f'{mode} process completed for level {level}.'})
+        join_room(job_id)
+        after_seq = int(data.get('last_seq', 0))
+        while True:
+            events, last_seq = spool.read_events(job_id, after_seq, 500)
+            if not events:
+                break
+            emit('replay_batch', {'job_id': job_id, 'events': events, 'last_seq': last_seq})
+            after_seq = events[-1]['seq']
+    except (TypeError, ValueError) as e:
+        emit('job_error', {'message': str(e)})
+
+@socketio.on('cancel_job')
+def handle_cancel_job(data):
+    job_id = data.get('job_id')
+    if not job_manager.cancel(job_id):
+        emit('job_error', {'message': f"Unknown job '{job_id}'."})
+        return
+    socketio.emit('job_status', job_manager.get(job_id).to_dict(), to=job_id)
+
+# --- Continuous Compliance Watch ---
+# One watcher per server; every connected client receives its changes.
+compliance_watch = {'watcher': None, 'level': None}
+compliance_watch_lock = threading.Lock()
+
+def _watch_status():
+    watcher = compliance_watch['watcher']
+    if watcher is None:
+        return {'active': False}
+    return {'active': True, 'level': compliance_watch['level'], 'checks': len(watcher.status),
+            'not_compliant': sum(1 for status in watcher.status.values() if status == 'Not Compliant'),
+            'unwatched': watcher.unwatched}
+
+@socketio.on('start_watch')
+def handle_start_watch(data):
+    level = data.get('level', 'L1')
+    if platform.system() != 'Linux' or level not in manifest.LEVELS:
+        emit('job_error', {'message': 'Continuous compliance watching is only available on Linux (L1, L2 or L3).'})
+        return
+    with compliance_watch_lock:
+        if compliance_watch['watcher'] is not None:
+            compliance_watch['watcher'].stop()
+
+        def on_change(change):
+            logger.info(f"Compliance change: {change['parameter']} {change['previous']} -> {change['status']}")
+            socketio.emit('compliance_change', change)
+
+        def on_error(message):
+            logger.warning(f"Compliance watch: {message}")
+
+        watcher = watch.ComplianceWatcher(manifest.modules_for('Linux', level), on_change=on_change, on_error=on_error)
+        watcher.baseline()
+        compliance_watch.update(watcher=watcher, level=level)
+        socketio.start_background_task(watcher.run)
+    socketio.emit('watch_status', _watch_status())
+
+@socketio.on('stop_watch')
+def handle_stop_watch(data=None):
+    with compliance_watch_lock:
+        if compliance_watch['watcher'] is not None:
+            compliance_watch['watcher'].stop()
+        compliance_watch.update(watcher=None, level=None)
+    socketio.emit('watch_status', _watch_status())
+
+@socketio.on('watch_status')
+def handle_watch_status(data=None):
+    emit('watch_status', _watch_status())
 
 # ... (Existing CLI code can be here, or run separately) ...
 # For simplicity, we assume this file is now primarily for the web app.
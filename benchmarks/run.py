@@ -0,0 +1,355 @@
+"""
+SysWarden benchmark harness.
+
+Runs without root against a synthetic sysroot (see sysroot.py) and writes
+a machine-readable result file, so two versions can be compared with
+--compare. Usage:
+
+    python benchmarks/run.py [--quick] [--repeat N] [--only SUITE,...]
+                             [--output FILE] [--compare OLD.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+# Module paths are resolved relative to the repository root.
+os.chdir(REPO_ROOT)
+
+import sysroot
+import manifest
+from engine import run_modules
+from fleet import Transport, SysrootTransport
+
+# --- 1. Benchmark Definitions ---
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SCHEMA_VERSION = 1
+SUITES = ("profile", "modules", "forks", "parsing", "report")
+
+# Sizes used by the full run and by --quick.
+SIZES = {
+    "full": {"parse_lines": [100_000, 1_000_000], "findings": [100, 10_000, 100_000], "repeat": 5},
+    "quick": {"parse_lines": [10_000], "findings": [100, 10_000], "repeat": 2},
+}
+
+# A suite metric that grows by more than this factor is flagged by --compare.
+REGRESSION_THRESHOLD = 1.10
+
+
+class Bench:
+    """
+    Shared state for one benchmark session: the synthetic host, the stub
+    commands on PATH and the log every stub appends its name to.
+    """
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.root = sysroot.build_sysroot(os.path.join(workdir, 'sysroot'))
+        stub_bin = sysroot.build_stub_bin(os.path.join(workdir, 'bin'))
+        self.exec_log = os.path.join(workdir, 'exec.log')
+        os.environ['PATH'] = stub_bin + os.pathsep + os.environ.get('PATH', '')
+        os.environ[sysroot.EXEC_LOG_ENV] = self.exec_log
+        # Every process SysWarden starts goes through subprocess.Popen.
+        subprocess.Popen = _CountingPopen
+
+    def transport(self):
+        # Scripts run here against the stub commands on PATH.
+        return SysrootTransport("bench", self.root, local_scripts=True)
+
+    def reset_exec_log(self):
+        open(self.exec_log, 'w').close()
+
+    def exec_counts(self):
+        counts = {}
+        with open(self.exec_log, encoding='utf-8') as f:
+            for line in f:
+                counts[line.strip()] = counts.get(line.strip(), 0) + 1
+        return counts
+
+
+class _CountingPopen(subprocess.Popen):
+    """subprocess.Popen that counts the processes this process starts."""
+    started = 0
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        with _CountingPopen._lock:
+            _CountingPopen.started += 1
+
+
+def _cpu_seconds():
+    """User+system CPU of this process and of its reaped children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+def _measure(func):
+    """Runs func() once; returns (its return value, wall seconds, cpu dict, child processes started)."""
+    children_started = _CountingPopen.started
+    self_before, children_before = _cpu_seconds()
+    start = time.perf_counter()
+    value = func()
+    wall = time.perf_counter() - start
+    self_after, children_after = _cpu_seconds()
+    cpu = {'self': round(self_after - self_before, 6), 'children': round(children_after - children_before, 6)}
+    return value, wall, cpu, _CountingPopen.started - children_started
+
+
+def _stats(samples):
+    return {'median': round(statistics.median(samples), 6), 'min': round(min(samples), 6),
+            'max': round(max(samples), 6), 'samples': [round(s, 6) for s in samples]}
+
+
+# --- 2. Suites ---
+def bench_profile(bench, sizes, repeat):
+    """End-to-end latency of a level's audit through app.run_profile, with native probes on and off."""
+    # Imported here: the web app is only needed by this suite.
+    from app import run_profile
+    results = {}
+    for level in ("L1", "L2", "L3"):
+        for native in (True, False):
+            samples, checks = [], 0
+            for _ in range(repeat):
+                found, wall, _, _ = _measure(lambda: run_profile(level, "Audit", "Linux", facts_ttl=0, native=native,
+                                                                 transport=bench.transport()))
+                samples.append(wall)
+                checks = len(found)
+            results[f"{level}/{'native' if native else 'scripts'}"] = {'seconds': _stats(samples), 'results': checks}
+    return results
+
+
+def bench_modules(bench, sizes, repeat):
+    """Wall and CPU time of every module run alone through its script."""
+    results = {}
+    for module_name in manifest.modules_for("Linux", "L3"):
+        walls, own, children = [], [], []
+        for _ in range(repeat):
+            _, wall, cpu, _ = _measure(lambda: run_modules("Linux", [module_name], "Audit", "L3", max_workers=1,
+                                                           native=False, facts_ttl=0, transport=bench.transport()))
+            walls.append(wall)
+            own.append(cpu['self'])
+            children.append(cpu['children'])
+        results[module_name] = {'wall': _stats(walls), 'cpu_self': _stats(own), 'cpu_children': _stats(children)}
+    return results
+
+
+def bench_forks(bench, sizes, repeat):
+    """
+    Processes started per check: the module processes this process spawns
+    plus the stubbed commands the modules run (each stub logs itself).
+    Commands a module runs that are not stubbed are not counted; the
+    per-command breakdown is in `stub_execs`.
+    """
+    results = {}
+    for module_name in manifest.modules_for("Linux", "L3"):
+        for native in (True, False):
+            bench.reset_exec_log()
+            found, _, _, children = _measure(lambda: run_modules("Linux", [module_name], "Audit", "L3", max_workers=1,
+                                                                 native=native, facts_ttl=0, transport=bench.transport()))
+            checks = len(found)
+            stub_execs = bench.exec_counts()
+            forks = children + sum(stub_execs.values())
+            results[f"{module_name}/{'native' if native else 'scripts'}"] = {
+                'checks': checks, 'children': children, 'forks': forks,
+                'forks_per_check': round(forks / checks, 3) if checks else None,
+                'stub_execs': stub_execs,
+            }
+    return results
+
+
+class _ReplayTransport(Transport):
+    """Makes a module "print" a prepared file, to time the parser on its own."""
+    def __init__(self, path):
+        super().__init__("replay")
+        self.path = path
+
+    def command(self, module_path, mode, level, args=()):
+        return ["cat", self.path]
+
+
+def _write_module_output(path, lines):
+    statuses = ("Compliant", "Not Compliant", "Info", "Warning")
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            f.write(json.dumps({'parameter': f"Check {i}", 'status': statuses[i % 4],
+                                'details': f"Synthetic finding {i} " + "x" * (i % 120)}) + "\n")
+            # Modules also print the odd non-JSON line, which takes the slow path.
+            if i % 1000 == 999:
+                f.write("progress: still working\n")
+    return os.path.getsize(path)
+
+
+def bench_parsing(bench, sizes, repeat):
+    """Throughput of the streaming JSON-lines parser on huge module outputs."""
+    results = {}
+    for lines in sizes['parse_lines']:
+        path = os.path.join(bench.workdir, f'output_{lines}.jsonl')
+        size = _write_module_output(path, lines)
+        samples = []
+        for _ in range(repeat):
+            found, wall, _, _ = _measure(lambda: run_modules("Linux", ["Network.sh"], "Audit", "L2", facts_ttl=0,
+                                                             transport=_ReplayTransport(path)))
+            samples.append(wall)
+        assert len(found) == lines, f"parsed {len(found)} of {lines} lines"
+        best = statistics.median(samples)
+        results[str(lines)] = {'seconds': _stats(samples), 'bytes': size,
+                               'lines_per_second': round(lines / best), 'mb_per_second': round(size / best / 1e6, 3)}
+        os.remove(path)
+    return results
+
+
+def _report_worker(findings, reports_dir, queue):
+    """Child-process body: times one generate_report call and its peak RSS."""
+    import report_generator
+    report_generator.REPORTS_DIR = reports_dir
+    report_generator.CACHE_INDEX = os.path.join(reports_dir, '.report_cache.json')
+    statuses = ("Compliant", "Not Compliant", "Info", "Warning")
+    # A fresh run id makes every result set unique, so the report cache never answers.
+    run_id = os.urandom(4).hex()
+    results = [{'parameter': f"Check {i}", 'status': statuses[i % 4],
+                'details': f"[{run_id}] Synthetic finding {i} with a moderately long explanation."}
+               for i in range(findings)]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    path = report_generator.generate_report(results, "Linux", "L1")
+    wall = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'seconds': wall, 'rss_peak_kb': peak, 'rss_growth_kb': peak - baseline,
+               'bytes': os.path.getsize(path) if os.path.exists(path) else None,
+               'error': path if path.startswith("Error") else None})
+
+
+def bench_report(bench, sizes, repeat):
+    """generate_report time and memory, each size in a fresh process so peaks do not carry over."""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    reports_dir = os.path.join(bench.workdir, 'reports')
+    for findings in sizes['findings']:
+        samples, runs = [], []
+        for _ in range(1 if findings >= 100_000 else repeat):
+            queue = context.Queue()
+            worker = context.Process(target=_report_worker, args=(findings, reports_dir, queue))
+            worker.start()
+            runs.append(queue.get())
+            worker.join()
+            samples.append(runs[-1]['seconds'])
+        results[str(findings)] = {'seconds': _stats(samples),
+                                  'rss_peak_kb': max(r['rss_peak_kb'] for r in runs),
+                                  'rss_growth_kb': max(r['rss_growth_kb'] for r in runs),
+                                  'bytes': runs[-1]['bytes'], 'error': runs[-1]['error']}
+    return results
+
+
+BENCHMARKS = {
+    "profile": bench_profile,
+    "modules": bench_modules,
+    "forks": bench_forks,
+    "parsing": bench_parsing,
+    "report": bench_report,
+}
+
+
+# --- 3. Result Files ---
+def _git_head():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=REPO_ROOT).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def metadata(mode, repeat):
+    return {'schema': SCHEMA_VERSION, 'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'git_head': _git_head(),
+            'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'mode': mode, 'repeat': repeat}
+
+
+def _headline_metrics(document):
+    """Flattens a result document into {name: seconds} for comparison."""
+    metrics = {}
+    for suite, entries in document.get('suites', {}).items():
+        for name, entry in entries.items():
+            for key in ('seconds', 'wall'):
+                if isinstance(entry.get(key), dict):
+                    metrics[f"{suite}:{name}"] = entry[key]['median']
+            if entry.get('forks_per_check') is not None:
+                metrics[f"{suite}:{name}:forks_per_check"] = entry['forks_per_check']
+            if entry.get('rss_peak_kb') is not None:
+                metrics[f"{suite}:{name}:rss_peak_kb"] = entry['rss_peak_kb']
+    return metrics
+
+
+def compare(old, new):
+    """
+    Prints new/old ratios for every metric both documents share.
+
+    Returns:
+        int: The number of metrics that regressed past REGRESSION_THRESHOLD.
+    """
+    old_metrics, new_metrics = _headline_metrics(old), _headline_metrics(new)
+    regressions = 0
+    print(f"\n{'Metric':<52} {'Old':>12} {'New':>12} {'Ratio':>8}")
+    for name in sorted(set(old_metrics) & set(new_metrics)):
+        before, after = old_metrics[name], new_metrics[name]
+        ratio = after / before if before else float('inf') if after else 1.0
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<52} {before:>12.4f} {after:>12.4f} {ratio:>7.2f}x{flag}")
+    return regressions
+
+
+# --- 4. Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SysWarden against a synthetic host.")
+    parser.add_argument('--quick', action='store_true', help="Smaller inputs and fewer repeats.")
+    parser.add_argument('--repeat', type=int, help="Samples per measurement.")
+    parser.add_argument('--only', help=f"Comma-separated suites ({', '.join(SUITES)}).")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument('--compare', help="An earlier result file to compare against.")
+    args = parser.parse_args(argv)
+
+    mode = "quick" if args.quick else "full"
+    sizes = SIZES[mode]
+    repeat = args.repeat or sizes['repeat']
+    suites = args.only.split(',') if args.only else list(SUITES)
+    unknown = [s for s in suites if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    document = {'meta': metadata(mode, repeat), 'suites': {}}
+    with tempfile.TemporaryDirectory(prefix='syswarden-bench-') as workdir:
+        bench = Bench(workdir)
+        for suite in suites:
+            print(f"[*] Running '{suite}'...", flush=True)
+            start = time.perf_counter()
+            document['suites'][suite] = BENCHMARKS[suite](bench, sizes, repeat)
+            print(f"    done in {time.perf_counter() - start:.2f}s", flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"[+] Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            return 1 if compare(json.load(f), document) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import os
+import stat
+import shutil
+import random
+
+# --- 1. Sysroot Definitions ---
+# Kernel modules the Filesystem checks look at; the fake host loads some and
+# disables others so both branches of every check are exercised.
+AUDITED_MODULES = ["cramfs", "freevxfs", "jffs2", "hfs", "hfsplus", "squashfs", "udf", "usb-storage"]
+
+# Commands the modules call that need root or a real package database.
+# Each stub records its name in $SYSWARDEN_BENCH_EXEC_LOG (with a bash
+# builtin, so counting costs no extra process) and answers like a
+# compliant-ish host would.
+STUBS = {
+    "sudo": 'exec "$@"',
+    "modprobe": 'exit 0',
+    "rmmod": 'exit 0',
+    "apt-get": 'exit 0',
+    "dpkg-query": 'exit 1',
+    "ufw": 'echo "Status: active"',
+    "systemctl": 'exit 3',
+    "sysctl": 'if [[ "$1" == "-n" ]]; then echo 0; else echo "$2 = 0"; fi',
+}
+
+EXEC_LOG_ENV = "SYSWARDEN_BENCH_EXEC_LOG"
+
+
+def _write(root, path, text, mode=0o644):
+    full_path = os.path.join(root, path.lstrip('/'))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.chmod(full_path, mode)
+
+
+# --- 2. Building a Fake Host ---
+def build_sysroot(root, mounts=40, loaded_modules=120, packages=2000, seed=1):
+    """
+    Creates a synthetic host filesystem under `root` that native probes and
+    the exported fact snapshot can read without root privileges.
+
+    The sizes control how much each parser has to chew through:
+    /proc/mounts lines, /proc/modules lines and dpkg status records.
+
+    Returns:
+        str: The absolute path of the sysroot.
+    """
+    rng = random.Random(seed)
+    root = os.path.abspath(root)
+
+    mount_lines = ["/dev/sda1 / ext4 rw,relatime 0 0",
+                   "tmpfs /tmp tmpfs rw,nosuid,nodev 0 0",
+                   "tmpfs /dev/shm tmpfs rw,nosuid,nodev,noexec 0 0",
+                   "/dev/sda2 /home ext4 rw,relatime 0 0"]
+    mount_lines += [f"/dev/loop{i} /snap/pkg{i}/1 squashfs ro,nodev,relatime 0 0" for i in range(mounts)]
+    _write(root, "/proc/mounts", "\n".join(mount_lines) + "\n")
+
+    module_names = ["squashfs", "udf"] + [f"mod_{i}" for i in range(loaded_modules)]
+    _write(root, "/proc/modules", "".join(f"{name} {rng.randint(4096, 262144)} 0 - Live 0x0000000000000000\n"
+                                          for name in module_names))
+    _write(root, "/proc/sys/fs/suid_dumpable", "0\n")
+
+    for module in AUDITED_MODULES[:4]:
+        _write(root, f"/etc/modprobe.d/{module}.conf", f"install {module} /bin/true\nblacklist {module}\n")
+    _write(root, "/etc/modprobe.d/blacklist.conf", "".join(f"blacklist mod_{i}\n" for i in range(50)))
+
+    _write(root, "/etc/passwd", "root:x:0:0:root:/root:/bin/bash\n", 0o644)
+    _write(root, "/etc/group", "root:x:0:\n", 0o644)
+    _write(root, "/etc/shadow", "root:*:19000:0:99999:7:::\n", 0o600)
+    _write(root, "/etc/gshadow", "root:*::\n", 0o640)
+    _write(root, "/etc/fstab", "/dev/sda1 / ext4 defaults 0 1\ntmpfs /tmp tmpfs defaults,nodev 0 0\n")
+    _write(root, "/etc/security/limits.conf", "# limits\n* hard core 0\n")
+    _write(root, "/etc/sysctl.conf", "fs.suid_dumpable = 0\n")
+
+    records = []
+    for i in range(packages):
+        records.append(f"Package: pkg{i}\nStatus: install ok installed\nVersion: 1.{i}\n")
+    records.append("Package: prelink\nStatus: deinstall ok config-files\nVersion: 0.5\n")
+    _write(root, "/var/lib/dpkg/status", "\n".join(records))
+    return root
+
+
+def build_stub_bin(directory):
+    """
+    Writes the stub commands into `directory` (to be prepended to PATH).
+
+    Returns:
+        str: The absolute path of the directory.
+    """
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    for name, body in STUBS.items():
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'#!/bin/bash\n[[ -n "${EXEC_LOG_ENV}" ]] && echo {name} >> "${EXEC_LOG_ENV}"\n{body}\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return directory
+
+
+def remove(path):
+    shutil.rmtree(path, ignore_errors=True)
@@ -1,14 +1,20 @@
-import subprocess
 import sys
-import json
 import platform
 import os
 import logging
 from logging.handlers import RotatingFileHandler
 import datetime
-from report_generator import generate_report
+import history
+import fleet
+import rollback_store
+import restore
+import planner
+import metrics
+import watch
+import manifest
+from results import compliance_percent
+from engine import run_modules, DEFAULT_WORKERS
 import cmd
-from tqdm import tqdm
 
 # --- 1. Setup Logging & Global Definitions ---
 # Establishes a consistent logging mechanism for all CLI operations.
@@ -19,18 +25,8 @@ log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message
 logger = logging.getLogger(__name__)
 logger.addHandler(log_handler)
 logger.setLevel(logging.INFO)
-
-# Master lists of modules the CLI will orchestrate for each OS.
-WINDOWS_MODULES = {
-    "L1": ["AccountPolicies.ps1", "LocalPolicies.ps1", "SecurityOptions.ps1"],
-    "L2": ["SystemServices.ps1", "WindowsFirewall.ps1"],
-    "L3": ["AdvancedAudit.ps1", "Defender.ps1"]
-}
-LINUX_MODULES = {
-    "L1": ["Filesystem.sh", "PackageManagement.sh", "AccessControl.sh"],
-    "L2": ["Services.sh", "Network.sh"],
-    "L3": ["Firewall.sh", "LoggingAndAuditing.sh"]
-}
+# Timing spans go to the same log, one JSON object per line.
+metrics.attach_log_handler(log_handler)
 
 # Color codes for professional terminal output.
 class bcolors:
@@ -43,6 +39,20 @@ class bcolors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
 
+def _ms(seconds):
+    return '-' if seconds is None else f"{seconds * 1000:.1f}ms"
+
+def _value(value):
+    return '-' if value is None else str(value)
+
+def _percent(percent):
+    return 'n/a' if percent is None else f"{percent}%"
+
+def _split_args(arg):
+    """Splits a command argument string into its first word and the remaining flags."""
+    words = arg.split()
+    return (words[0] if words else ''), words[1:]
+
 # --- 2. The Main Interactive Shell Class ---
 class SysWardenShell(cmd.Cmd):
     """
@@ -52,6 +62,9 @@ class SysWardenShell(cmd.Cmd):
     intro = f'{bcolors.BOLD}Welcome to the SysWarden Interactive Shell. Type help or ? to list commands.\n{bcolors.ENDC}'
     prompt = f'({bcolors.OKBLUE}SysWarden{bcolors.ENDC}) > '
     os_type = platform.system()
+    max_workers = DEFAULT_WORKERS
+    last_run_id = None
+    profiler = None
 
     def __init__(self):
         super().__init__()
@@ -59,171 +72,442 @@ class SysWardenShell(cmd.Cmd):
         print(f"{bcolors.HEADER}--- SysWarden CLI ---{bcolors.ENDC}")
         print(f"Detected Operating System: {bcolors.BOLD}{self.os_type}{bcolors.ENDC}")
 
+    # --- Profiling ---
+    def precmd(self, line):
+        """Any command run with --profile collects its timing spans and prints them when it finishes."""
+        words = line.split()
+        if '--profile' in words:
+            words.remove('--profile')
+            self.profiler = metrics.SpanCollector().start()
+            return ' '.join(words)
+        return line
+
+    def postcmd(self, stop, line):
+        if self.profiler is not None:
+            self.profiler.stop()
+            self._print_profile(self.profiler.spans)
+            self.profiler = None
+        return stop
+
+    def _print_profile(self, spans):
+        """Prints a table of where a command's time went: per module, per run and per report."""
+        print(f"\n{bcolors.HEADER}--- Profile ---{bcolors.ENDC}")
+        modules = [span for span in spans if span.kind == 'module']
+        if modules:
+            print(f"  {'Module':<26} {'Source':<7} {'Spawn':>8} {'First':>8} {'Total':>8} {'Exit':>5} "
+                  f"{'OK':>5} {'Fail':>5} {'Other':>6} {'Stdout':>9} {'Stderr':>8}")
+            for span in sorted(modules, key=lambda span: -span.seconds):
+                a = span.attributes
+                counts = a['results']
+                ok = counts.get('Compliant', 0) + counts.get('Success', 0)
+                failed = counts.get('Not Compliant', 0) + counts.get('Failure', 0)
+                color = bcolors.FAIL if a['error'] else ''
+                print(f"  {color}{a['module']:<26}{bcolors.ENDC if color else ''} {a['source']:<7} {_ms(a['spawn_seconds']):>8} "
+                      f"{_ms(a['first_result_seconds']):>8} {_ms(span.seconds):>8} {_value(a['exit_code']):>5} "
+                      f"{ok:>5} {failed:>5} {sum(counts.values()) - ok - failed:>6} "
+                      f"{_value(a['stdout_bytes']):>9} {_value(a['stderr_bytes']):>8}")
+        for span in spans:
+            a = span.attributes
+            if span.kind == 'run':
+                print(f"  {bcolors.BOLD}{a['mode']} run{bcolors.ENDC} ({a['level']}, {a['modules']} module(s), "
+                      f"{a['results']} result(s)): {_ms(span.seconds)}")
+            elif span.kind == 'report':
+                rendered = ', '.join(f"{name} {_ms(seconds)}" for name, seconds in a['render_seconds'].items())
+                cached = f"; cached: {', '.join(a['cached'])}" if a['cached'] else ""
+                print(f"  {bcolors.BOLD}Report{bcolors.ENDC}: {_ms(span.seconds)} ({rendered or 'nothing rendered'}{cached})")
+        if not spans:
+            print("  Nothing was timed.")
+
+    def _modules(self, level, mode='Audit'):
+        """The modules a level runs on this OS, from the manifest (anything but Windows runs the Linux modules)."""
+        return manifest.modules_for("Windows" if self.os_type == "Windows" else "Linux", level, mode)
+
     # --- Core Execution Engine with Progress Bar ---
-    def _run_profile(self, level, mode):
+    def _run_profile(self, level, mode, incremental=False, full=False, plan=None):
         """
         The core function that orchestrates the execution of modules,
         displaying a clean progress bar instead of verbose module lists.
+        Read-only modules run concurrently on `self.max_workers` workers.
+        With `incremental`, audit checks whose inputs are unchanged are
+        answered from the local cache and marked as cached; `full` re-runs
+        them all and refreshes the cache. With a hardening `plan`, only the
+        planned modules run, each restricted to its planned steps.
         """
         print(f"\n{bcolors.BOLD}Starting '{mode}' process for Level {level}...{bcolors.ENDC}")
-        logger.info(f"Starting '{mode}' process for Level {level}")
+        logger.info(f"Starting '{mode}' process for Level {level} with {self.max_workers} worker(s)")
         
-        all_results = []
-        modules_to_run = []
-        levels = WINDOWS_MODULES if self.os_type == "Windows" else LINUX_MODULES
-        
-        # Build the list of modules based on cumulative levels (L2 includes L1, etc.)
-        if level in ["L1", "L2", "L3"]: modules_to_run.extend(levels.get("L1", []))
-        if level in ["L2", "L3"]: modules_to_run.extend(levels.get("L2", []))
-        if level in ["L3"]: modules_to_run.extend(levels.get("L3", []))
-        modules_to_run = sorted(list(set(modules_to_run))) # Remove duplicates
+        # The manifest's compiled plan for the level (levels are cumulative: L2 includes L1, etc.)
+        modules_to_run = plan.modules if plan else self._modules(level, mode)
 
-        # Wrap the loop with tqdm for a clean progress bar
+        # Wrap the run with tqdm for a clean progress bar (imported here to keep startup fast)
+        from tqdm import tqdm
         with tqdm(total=len(modules_to_run), desc="Overall Progress", unit="module", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}") as pbar:
-            for module_name in modules_to_run:
+            def on_start(index, total, module_name):
                 pbar.set_description(f"Executing {module_name}")
-                
-                module_path = os.path.join('scripts', self.os_type.lower(), 'modules', module_name)
-                if not os.path.exists(module_path):
-                    tqdm.write(f"  {bcolors.FAIL}ERROR:{bcolors.ENDC} Module file not found: '{module_path}'")
-                    pbar.update(1)
-                    continue
-
-                if self.os_type == "Windows":
-                    command = f"powershell.exe -ExecutionPolicy Bypass -File .\\{module_path} -Mode {mode} -Level {level}"
-                else: # Linux
-                    command = f"./{module_path} {mode} {level}"
-                
-                try:
-                    process = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-                    for line in process.stdout.strip().split('\n'):
-                        if not line: continue
-                        try:
-                            data = json.loads(line)
-                            all_results.append(data)
-                            # Only print output during 'harden' or if there's a problem during 'audit'
-                            if mode == 'Harden' or data.get('status') not in ['Compliant', 'Info']:
-                                status = data.get('status', 'ERROR')
-                                status_color = bcolors.OKGREEN if status in ['Success', 'Compliant'] else bcolors.FAIL if status in ['Failure', 'Not Compliant'] else bcolors.OKBLUE
-                                tqdm.write(f"  [{status_color}{status}{bcolors.ENDC}] {data.get('parameter', 'N/A')}: {data.get('details', 'N/A')}")
-                        except json.JSONDecodeError:
-                            tqdm.write(f"  {bcolors.WARNING}RAW: {line.strip()}{bcolors.ENDC}")
-                except subprocess.CalledProcessError as e:
-                    tqdm.write(f"  {bcolors.FAIL}MODULE ERROR:{bcolors.ENDC} Module '{module_name}' exited.")
-                    tqdm.write(f"  {bcolors.FAIL}STDERR: {e.stderr.strip()}{bcolors.ENDC}")
-                
+
+            def on_result(module_name, data):
+                recorder.add(module_name, data)
+                # Only print output during 'harden' or if there's a problem during 'audit'
+                if mode == 'Harden' or data.get('status') not in ['Compliant', 'Info']:
+                    status = data.get('status', 'ERROR')
+                    status_color = bcolors.OKGREEN if status in ['Success', 'Compliant'] else bcolors.FAIL if status in ['Failure', 'Not Compliant'] else bcolors.OKBLUE
+                    cached = f" {bcolors.OKCYAN}(cached){bcolors.ENDC}" if data.get('cached') else ""
+                    tqdm.write(f"  [{status_color}{status}{bcolors.ENDC}]{cached} {data.get('parameter', 'N/A')}: {data.get('details', 'N/A')}")
+
+            def on_raw(module_name, line):
+                tqdm.write(f"  {bcolors.WARNING}RAW: {line}{bcolors.ENDC}")
+
+            def on_error(module_name, message):
+                tqdm.write(f"  {bcolors.FAIL}MODULE ERROR:{bcolors.ENDC} {message}")
+
+            def on_done(module_name):
                 pbar.update(1) # Update the progress bar after each module
+
+            # Every run is recorded in the audit history as its results stream in,
+            # and a hardening run records what it changes as one rollback point.
+            rollback = rollback_store.get_store().begin_run(level) if mode == 'Harden' else None
+            with history.start_run(level, mode, self.os_type) as recorder:
+                all_results = run_modules(self.os_type, modules_to_run, mode, level, max_workers=self.max_workers,
+                                          incremental=incremental, full=full, rollback=rollback,
+                                          env_overrides=plan.env_overrides() if plan else None, on_start=on_start,
+                                          on_result=on_result, on_raw=on_raw, on_error=on_error, on_done=on_done)
         
+        self.last_run_id = recorder.run_id
+        logger.info(f"Recorded run {recorder.run_id} in the audit history")
+        if rollback is not None and rollback.commit():
+            print(f"{bcolors.OKBLUE}Rollback point saved: {rollback.id} (undo with 'rollback {rollback.id}'){bcolors.ENDC}")
+            logger.info(f"Saved rollback point {rollback.id}")
         return all_results
 
     # --- Shell Command Implementations ---
+    def _print_plan(self, plan, show_diff):
+        """Prints the failing checks a hardening plan will fix and, optionally, its file diff."""
+        print(f"\n{bcolors.HEADER}--- Hardening Plan ({len(plan.items)} change(s) in {len(plan.modules)} module(s)) ---{bcolors.ENDC}")
+        for item in plan.items:
+            action = item.remediation.action if item.remediation else "Run the whole module (no targeted step)"
+            print(f"  [{bcolors.FAIL}Not Compliant{bcolors.ENDC}] {item.parameter}\n      -> {action}")
+        for module_name, reason in plan.not_planned.items():
+            print(f"  [{bcolors.WARNING}Not Planned{bcolors.ENDC}] {module_name}: the audit failed ({reason})")
+        if show_diff:
+            diff = plan.diff()
+            print(f"\n{bcolors.HEADER}--- Proposed File Changes ---{bcolors.ENDC}")
+            for line in (diff.splitlines() or ["(no file contents change)"]):
+                color = bcolors.OKGREEN if line.startswith('+') else bcolors.FAIL if line.startswith('-') else ''
+                print(f"  {color}{line}{bcolors.ENDC if color else ''}")
+
     def do_harden(self, arg):
-        """Apply security policies to the system. Usage: harden <L1|L2|L3>"""
-        if arg not in ['L1', 'L2', 'L3']:
+        """Apply security policies to the system. By default the system is audited first and only failing checks are remediated; --plan shows what would change without applying it, --all runs every hardening step. Usage: harden <L1|L2|L3> [--plan] [--all] [--full] [--profile]"""
+        level, flags = _split_args(arg)
+        if level not in ['L1', 'L2', 'L3']:
             print(f"{bcolors.FAIL}Error: Please specify a valid level (L1, L2, or L3).{bcolors.ENDC}")
             return
-        self._run_profile(arg, 'Harden')
+        if '--all' in flags and '--plan' not in flags:
+            self._run_profile(level, 'Harden')
+            return
+
+        print(f"\n{bcolors.BOLD}Auditing Level {level} to plan the hardening run...{bcolors.ENDC}")
+        plan = planner.plan_harden(self.os_type, self._modules(level), level,
+                                   max_workers=self.max_workers, full='--full' in flags)
+        if not plan.items:
+            if plan.not_planned:
+                self._print_plan(plan, show_diff=False)
+                print(f"{bcolors.WARNING}Nothing planned: {len(plan.not_planned)} module(s) could not be audited.{bcolors.ENDC}")
+            else:
+                print(f"{bcolors.OKGREEN}Nothing to harden: every check at Level {level} is compliant.{bcolors.ENDC}")
+            return
+        self._print_plan(plan, show_diff='--plan' in flags)
+        if '--plan' in flags:
+            print(f"\n{bcolors.OKBLUE}Dry run only; nothing was changed. Run 'harden {level}' to apply.{bcolors.ENDC}")
+            return
+        self._run_profile(level, 'Harden', plan=plan)
 
     def do_audit(self, arg):
-        """Check system compliance against policies. Usage: audit <L1|L2|L3>"""
-        if arg not in ['L1', 'L2', 'L3']:
+        """Check system compliance against policies. Unchanged checks are answered from cache; --full re-runs everything. Usage: audit <L1|L2|L3> [--full] [--profile]"""
+        level, flags = _split_args(arg)
+        if level not in ['L1', 'L2', 'L3']:
             print(f"{bcolors.FAIL}Error: Please specify a valid level (L1, L2, or L3).{bcolors.ENDC}")
             return
-        results = self._run_profile(arg, 'Audit')
-        print(f"\n{bcolors.BOLD}Audit complete.{bcolors.ENDC} Found {sum(1 for r in results if r.get('status') == 'Not Compliant')} non-compliant items.")
+        results = self._run_profile(level, 'Audit', incremental=True, full='--full' in flags)
+        summary = results.summary()
+        print(f"\n{bcolors.BOLD}Audit complete.{bcolors.ENDC} Found {summary.not_compliant} non-compliant items "
+              f"({results.cached_count()} of {len(results)} results from cache).")
+        self._print_summary(summary)
+
+    def _print_summary(self, summary, group='module'):
+        """Prints the compliance rate overall and per module (or host), and the most frequent failures."""
+        print(f"  Compliance: {bcolors.BOLD}{_percent(summary.percent)}{bcolors.ENDC} "
+              f"({summary.compliant} compliant, {summary.not_compliant} non-compliant)")
+        grouped = summary.by_module if group == 'module' else summary.by_host
+        for name, counts in sorted((n, c) for n, c in grouped.items() if n is not None):
+            failed = counts.get('Not Compliant', 0)
+            color = bcolors.FAIL if failed else bcolors.OKGREEN
+            percent = compliance_percent(counts.get('Compliant', 0), failed)
+            print(f"    {name:<26} {color}{_percent(percent):>7}{bcolors.ENDC} ({failed} non-compliant)")
+        top_failing = summary.top_failing(5)
+        if top_failing:
+            print("  Most frequent failures:")
+            for parameter, count in top_failing:
+                print(f"    {bcolors.FAIL}{count:>4}x{bcolors.ENDC} {parameter}")
 
     def do_report(self, arg):
-        """Run an audit and generate a PDF report. Usage: report <L1|L2|L3>"""
-        if arg not in ['L1', 'L2', 'L3']:
+        """Run an audit and generate reports, or rebuild them from history. Usage: report <L1|L2|L3> [--full] [--format pdf,json,csv,html] [--profile] | report --run <run_id> [--format ...]"""
+        from report_generator import generate_reports, generate_run_reports, FORMATS
+        level, flags = _split_args(arg)
+        formats = ['pdf']
+        if '--format' in flags:
+            index = flags.index('--format')
+            formats = flags[index + 1].split(',') if index + 1 < len(flags) else []
+            del flags[index:index + 2]
+            if not formats or any(f not in FORMATS for f in formats):
+                print(f"{bcolors.FAIL}Error: --format takes a comma-separated list of: {', '.join(FORMATS)}.{bcolors.ENDC}")
+                return
+        if level == '--run':
+            if not flags or not flags[0].isdigit():
+                print(f"{bcolors.FAIL}Usage: report --run <run_id> [--format pdf,json,csv,html]{bcolors.ENDC}")
+                return
+            try:
+                report_files = generate_run_reports(int(flags[0]), formats)
+            except Exception as e:
+                print(f"{bcolors.FAIL}Report generation failed: {e}{bcolors.ENDC}")
+                return
+            for report_filename in report_files.values():
+                print(f"{bcolors.OKGREEN}Report successfully generated: {report_filename}{bcolors.ENDC}")
+            return
+        if level not in ['L1', 'L2', 'L3']:
             print(f"{bcolors.FAIL}Error: Please specify a level for the report (L1, L2, or L3).{bcolors.ENDC}")
             return
         
-        results = self._run_profile(arg, 'Audit')
+        results = self._run_profile(level, 'Audit', incremental=True, full='--full' in flags)
         if not results:
             print(f"{bcolors.FAIL}Report generation failed: No audit data was collected.{bcolors.ENDC}")
             return
         
-        print(f"\n{bcolors.BOLD}Generating PDF report for level {arg}...{bcolors.ENDC}")
-        report_filename = generate_report(results, self.os_type, arg)
-        print(f"{bcolors.OKGREEN}Report successfully generated: {report_filename}{bcolors.ENDC}")
+        print(f"\n{bcolors.BOLD}Generating {', '.join(f.upper() for f in formats)} report for level {level}...{bcolors.ENDC}")
+        try:
+            report_files = generate_reports(results, self.os_type, level, formats)
+        except Exception as e:
+            print(f"{bcolors.FAIL}Report generation failed: {e}{bcolors.ENDC}")
+            return
+        for report_filename in report_files.values():
+            print(f"{bcolors.OKGREEN}Report successfully generated: {report_filename}{bcolors.ENDC}")
+
+    def do_fleet(self, arg):
+        """Audit every host in an inventory file concurrently. Usage: fleet <inventory> <L1|L2|L3> [--hosts N]"""
+        words = arg.split()
+        if len(words) < 2 or words[1] not in ['L1', 'L2', 'L3']:
+            print(f"{bcolors.FAIL}Usage: fleet <inventory> <L1|L2|L3> [--hosts N]{bcolors.ENDC}")
+            return
+        inventory_path, level = words[0], words[1]
+        if 'Harden' in words[2:]:
+            print(f"{bcolors.FAIL}Error: Fleet runs are audit-only; remote hardening cannot be rolled back. Harden hosts locally instead.{bcolors.ENDC}")
+            return
+        mode = 'Audit'
+        max_hosts = fleet.DEFAULT_MAX_HOSTS
+        if '--hosts' in words:
+            value = words[words.index('--hosts') + 1] if words.index('--hosts') + 1 < len(words) else ''
+            if not value.isdigit() or int(value) < 1:
+                print(f"{bcolors.FAIL}Error: --hosts needs a positive number.{bcolors.ENDC}")
+                return
+            max_hosts = int(value)
+        try:
+            transports = fleet.load_inventory(inventory_path)
+        except (OSError, ValueError) as e:
+            print(f"{bcolors.FAIL}Error: Could not load inventory: {e}{bcolors.ENDC}")
+            return
+        if not transports:
+            print(f"{bcolors.FAIL}Error: The inventory lists no hosts.{bcolors.ENDC}")
+            return
+
+        print(f"\n{bcolors.BOLD}Starting fleet '{mode}' for Level {level} on {len(transports)} host(s)...{bcolors.ENDC}")
+        logger.info(f"Starting fleet '{mode}' for Level {level} on {len(transports)} host(s)")
+        modules_to_run = manifest.modules_for('Linux', level)
+        from tqdm import tqdm
+        recorders = {}
+
+        with tqdm(total=len(transports), desc="Fleet Progress", unit="host", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}") as pbar:
+            def on_host_start(host):
+                recorders[host] = history.start_run(level, mode, 'Linux', host=host)
+
+            def on_result(host, module_name, data):
+                recorders[host].add(module_name, data)
+
+            def on_error(host, module_name, message):
+                tqdm.write(f"  {bcolors.FAIL}[{host}] ERROR:{bcolors.ENDC} {message}")
+
+            def on_host_done(host_result):
+                recorders[host_result.name].close()
+                summary = host_result.summary()
+                tqdm.write(f"  {bcolors.OKCYAN}{host_result.name}{bcolors.ENDC}: {summary['total']} checks, "
+                           f"{bcolors.FAIL}{summary['not_compliant']} non-compliant{bcolors.ENDC} ({_percent(summary['percent'])} compliant)")
+                pbar.update(1)
+
+            host_results = fleet.run_fleet(transports, modules_to_run, mode, level, max_hosts=max_hosts,
+                                           per_host_workers=self.max_workers, on_host_start=on_host_start,
+                                           on_result=on_result, on_error=on_error, on_host_done=on_host_done)
+
+        summary_file = fleet.write_fleet_summary(host_results, level, mode)
+        print(f"{bcolors.OKGREEN}Fleet summary written to {summary_file}{bcolors.ENDC}")
+        tagged = fleet.tag_results(host_results)
+        if tagged:
+            print(f"\n{bcolors.BOLD}Fleet compliance by host:{bcolors.ENDC}")
+            self._print_summary(tagged.summary(), group='host')
+            from report_generator import generate_report
+            report_filename = generate_report(tagged, "Fleet", level)
+            print(f"{bcolors.OKGREEN}Fleet report generated: {report_filename}{bcolors.ENDC}")
+
+    def do_watch(self, arg):
+        """Keep watching compliance and report every check whose status changes, re-evaluating only checks whose files changed. Press Ctrl+C to stop. Usage: watch <L1|L2|L3> [--poll seconds]"""
+        level, flags = _split_args(arg)
+        if level not in ['L1', 'L2', 'L3']:
+            print(f"{bcolors.FAIL}Error: Please specify a valid level (L1, L2, or L3).{bcolors.ENDC}")
+            return
+        if self.os_type != "Linux":
+            print(f"{bcolors.FAIL}Error: Continuous compliance watching is only available on Linux.{bcolors.ENDC}")
+            return
+        poll_interval = watch.POLL_INTERVAL
+        if '--poll' in flags:
+            index = flags.index('--poll')
+            try:
+                poll_interval = float(flags[index + 1])
+            except (IndexError, ValueError):
+                poll_interval = 0
+            if poll_interval <= 0:
+                print(f"{bcolors.FAIL}Error: --poll needs a positive number of seconds.{bcolors.ENDC}")
+                return
+
+        def on_change(change):
+            color = bcolors.OKGREEN if change['status'] == 'Compliant' else bcolors.FAIL
+            stamp = datetime.datetime.fromtimestamp(change['changed_at']).strftime('%H:%M:%S')
+            was = "configuration edited" if change['previous'] == change['status'] else f"was {change['previous']}"
+            print(f"  {stamp} [{color}{change['status']}{bcolors.ENDC}] {change['parameter']}: {change['details']} ({was})")
+            logger.info(f"Compliance change: {change['parameter']} {change['previous']} -> {change['status']}")
+
+        watcher = watch.ComplianceWatcher(manifest.modules_for('Linux', level), on_change=on_change,
+                                          on_error=lambda message: print(f"  {bcolors.WARNING}{message}{bcolors.ENDC}"),
+                                          poll_interval=poll_interval)
+        baseline = watcher.baseline()
+        failing = sum(1 for status in baseline.values() if status == 'Not Compliant')
+        print(f"\n{bcolors.BOLD}Watching {len(baseline)} check(s) at Level {level}{bcolors.ENDC} "
+              f"({bcolors.FAIL}{failing} not compliant{bcolors.ENDC}). Press Ctrl+C to stop.")
+        if watcher.unwatched:
+            print(f"  {bcolors.WARNING}Not watchable (no native checks): {', '.join(watcher.unwatched)}{bcolors.ENDC}")
+        logger.info(f"Started compliance watch for Level {level}")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.close()
+        print(f"\n{bcolors.OKBLUE}Stopped watching.{bcolors.ENDC}")
+
+    def do_runs(self, arg):
+        """List recent runs from the audit history. Usage: runs [count]"""
+        limit = int(arg) if arg.isdigit() else 20
+        runs = history.get_store().list_runs(limit=limit)
+        if not runs:
+            print("No runs recorded yet.")
+            return
+        print(f"\n{bcolors.HEADER}--- Recent Runs ---{bcolors.ENDC}")
+        for run in runs:
+            print(f"  #{run['id']:<5} {run['started_at']}  {run['host']}  {run['mode']} {run['level']}  "
+                  f"{run['total']} results, {bcolors.FAIL}{run['non_compliant']} non-compliant{bcolors.ENDC}")
+
+    def do_history(self, arg):
+        """Show non-compliant items recorded over the last N days (default 30). Usage: history [days]"""
+        days = int(arg) if arg.isdigit() else 30
+        rows = history.get_store().non_compliant(days=days)
+        print(f"\n{bcolors.HEADER}--- Non-Compliant Items (last {days} days) ---{bcolors.ENDC}")
+        if not rows:
+            print("None recorded.")
+            return
+        for row in rows:
+            print(f"  {row['recorded_at']}  #{row['run_id']}  {row['host']}  {row['parameter']}: {row['details']}")
+
+    def do_drift(self, arg):
+        """Show when a parameter's status changed over time. Usage: drift <parameter>"""
+        parameter = arg.strip()
+        if not parameter:
+            print(f"{bcolors.FAIL}Usage: drift <parameter>  (e.g. drift /etc/shadow permissions){bcolors.ENDC}")
+            return
+        changes = history.get_store().drift(parameter)
+        if not changes:
+            print(f"No history recorded for '{parameter}'.")
+            return
+        print(f"\n{bcolors.HEADER}--- Status Changes: {parameter} ---{bcolors.ENDC}")
+        for row in changes:
+            status_color = bcolors.OKGREEN if row['status'] in ['Success', 'Compliant'] else bcolors.FAIL
+            print(f"  {row['recorded_at']}  #{row['run_id']}  {row['host']}  [{status_color}{row['status']}{bcolors.ENDC}] {row['details']}")
+
+    def do_workers(self, arg):
+        """Show or set how many modules may run at once. Usage: workers [number]"""
+        if not arg:
+            print(f"Modules run with up to {bcolors.BOLD}{self.max_workers}{bcolors.ENDC} worker(s).")
+            return
+        if not arg.isdigit() or int(arg) < 1:
+            print(f"{bcolors.FAIL}Error: Please specify a positive number of workers.{bcolors.ENDC}")
+            return
+        self.max_workers = int(arg)
+        print(f"{bcolors.OKGREEN}Worker limit set to {self.max_workers}.{bcolors.ENDC}")
 
     def do_rollbacks(self, arg):
-        """List available rollback files. Usage: rollbacks"""
-        print(f"\n{bcolors.HEADER}--- Available Rollback Files ---{bcolors.ENDC}")
-        rollback_dir = 'rollback'
-        if not os.path.exists(rollback_dir) or not os.listdir(rollback_dir):
-            print("No rollback files found.")
-            return
-        files = sorted([f for f in os.listdir(rollback_dir) if f.endswith(".json")], reverse=True)
-        for filename in files:
-            print(f"  - {filename}")
+        """List available rollback points, newest first. Usage: rollbacks"""
+        print(f"\n{bcolors.HEADER}--- Available Rollback Points ---{bcolors.ENDC}")
+        runs = rollback_store.get_store().list_runs()
+        if not runs:
+            print("No rollback points found.")
+            return
+        for run in runs:
+            unverified = f"  {bcolors.WARNING}({run['unverified']} item(s) not restored by the last rollback){bcolors.ENDC}" \
+                if run.get('unverified') else ""
+            print(f"  {bcolors.OKCYAN}{run['id']}{bcolors.ENDC}  {run['created']}  {run['level']}  "
+                  f"{run['entries']} item(s) in {', '.join(run['modules'])}{unverified}")
     
     def do_rollback(self, arg):
-        """Revert changes using a specific rollback file. Usage: rollback <filename>"""
-        filename = arg.strip()
-        if not filename:
-            print(f"{bcolors.FAIL}Error: Please specify a rollback filename.{bcolors.ENDC}")
+        """Revert a whole hardening run (or some of its modules), restoring independent modules concurrently and verifying every item. Usage: rollback <rollback_id> [module ...]"""
+        words = arg.split()
+        if not words:
+            print(f"{bcolors.FAIL}Error: Please specify a rollback id (see 'rollbacks').{bcolors.ENDC}")
             return
-        
-        # This is the corrected logic using an absolute path.
-        rollback_path = os.path.abspath(os.path.join('rollback', filename))
-        
-        if not os.path.exists(rollback_path):
-            print(f"{bcolors.FAIL}Error: Rollback file '{filename}' not found.{bcolors.ENDC}")
+        try:
+            run = rollback_store.get_store().open_run(words[0])
+        except ValueError as e:
+            print(f"{bcolors.FAIL}Error: {e}{bcolors.ENDC}")
+            return
+        if run is None:
+            print(f"{bcolors.FAIL}Error: Rollback point '{words[0]}' not found.{bcolors.ENDC}")
+            return
+        modules = [m for m in run.modules if not words[1:] or m in words[1:] or m.rsplit('.', 1)[0] in words[1:]]
+        if not modules:
+            print(f"{bcolors.FAIL}Error: Rollback point '{run.id}' holds no data for {', '.join(words[1:])}.{bcolors.ENDC}")
             return
 
-        try:
-            module_base_name = filename.split('_', 1)[1].replace('.json', '')
-        except IndexError:
-            print(f"{bcolors.FAIL}Error: Invalid rollback file format. Expected 'TIMESTAMP_ModuleName.json'.{bcolors.ENDC}")
-            return
-
-        if self.os_type == "Windows":
-            module_name = f"{module_base_name}.ps1"
-            module_path = os.path.join('scripts', 'windows', 'modules', module_name)
-            command = f"powershell.exe -ExecutionPolicy Bypass -File .\\{module_path} -Mode Rollback -RollbackFile '{rollback_path}'"
-        else: # Linux
-            module_name = f"{module_base_name}.sh"
-            module_path = os.path.join('scripts', 'linux', 'modules', module_name)
-            command = f"./{module_path} Rollback '{rollback_path}'"
-        
-        print(f"Executing rollback for {filename} using module {module_name}...")
-        try:
-            process = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            for line in process.stdout.strip().split('\n'):
-                 if not line: continue
-                 print(f"  {bcolors.OKGREEN}{line.strip()}{bcolors.ENDC}")
-            print(f"{bcolors.OKGREEN}Rollback completed successfully.{bcolors.ENDC}")
-            os.remove(rollback_path)
-            print(f"{bcolors.OKBLUE}Deleted used rollback file: {filename}{bcolors.ENDC}")
-        except subprocess.CalledProcessError as e:
-            print(f"  {bcolors.FAIL}ROLLBACK FAILED:{bcolors.ENDC} {e.stderr.strip()}")
+        print(f"Executing rollback {run.id} for {', '.join(modules)} with {self.max_workers} worker(s)...")
+        logger.info(f"Rolling back {run.id} for {', '.join(modules)}")
+        outcome = restore.rollback_run(self.os_type, run, modules, max_workers=self.max_workers,
+                                       on_result=lambda module_name, data: print(
+                                           f"  {bcolors.OKGREEN if data.get('status') == 'Success' else bcolors.FAIL}"
+                                           f"{data.get('parameter', 'N/A')}: {data.get('details', 'N/A')}{bcolors.ENDC}"))
+        for message in outcome.errors:
+            print(f"  {bcolors.FAIL}ROLLBACK FAILED:{bcolors.ENDC} {message}")
+        for failure in outcome.failed:
+            print(f"  {bcolors.FAIL}NOT RESTORED:{bcolors.ENDC} {failure['target']} ({failure['module']}): {failure['reason']}")
+        if not outcome.complete:
+            logger.warning(f"Rollback {run.id} incomplete: {len(outcome.errors)} error(s), {len(outcome.failed)} unverified item(s)")
+            print(f"{bcolors.WARNING}Rollback incomplete; rollback point {run.id} was kept for the unverified "
+                  f"module(s). Run 'rollback {run.id}' again to retry.{bcolors.ENDC}")
+            return
+        print(f"{bcolors.OKGREEN}Rollback completed and verified.{bcolors.ENDC}")
+        logger.info(f"Rollback {run.id} completed and verified")
+        if outcome.deleted:
+            print(f"{bcolors.OKBLUE}Deleted used rollback point: {run.id}{bcolors.ENDC}")
 
     def do_cleanup_rollbacks(self, arg):
-        """Deletes old rollback files. Usage: cleanup_rollbacks <all | #_of_days>"""
+        """Deletes old rollback points and the file snapshots only they used. Usage: cleanup_rollbacks <all | #_of_days>"""
         if not arg or (arg != 'all' and not arg.isdigit()):
             print(f"{bcolors.FAIL}Usage: cleanup_rollbacks <all | number_of_days>{bcolors.ENDC}")
             return
         
-        rollback_dir = 'rollback'
-        if not os.path.exists(rollback_dir): return
-        
-        now = datetime.datetime.now()
-        count = 0
-        for filename in os.listdir(rollback_dir):
-            filepath = os.path.join(rollback_dir, filename)
-            if arg == 'all':
-                os.remove(filepath)
-                count += 1
-            else:
-                try:
-                    file_time = os.path.getmtime(filepath)
-                    age = now - datetime.datetime.fromtimestamp(file_time)
-                    if age.days >= int(arg):
-                        os.remove(filepath)
-                        count += 1
-                except (ValueError, FileNotFoundError): continue
-        print(f"{bcolors.OKGREEN}Cleanup complete. Deleted {count} rollback file(s).{bcolors.ENDC}")
+        runs, blobs, freed = rollback_store.get_store().cleanup(None if arg == 'all' else int(arg))
+        print(f"{bcolors.OKGREEN}Cleanup complete. Deleted {runs} rollback point(s) and {blobs} unused snapshot(s), "
+              f"freeing {freed / 1024:.1f} KiB.{bcolors.ENDC}")
 
     def do_exit(self, arg):
         """Exit the SysWarden shell."""
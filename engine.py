@@ -0,0 +1,400 @@
+import subprocess
+import json
+import os
+import time
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from probes import native_checks_for, evaluate
+import facts
+from incremental import AuditCache, check_inputs, module_inputs
+from rollback_store import STAGE_ENV
+import metrics
+import manifest
+from results import ResultSet
+
+# --- 1. Scheduling Definitions ---
+# Default size of the worker pool used to run modules side by side.
+DEFAULT_WORKERS = 4
+
+# Only the tail of a module's stderr is kept for error messages.
+STDERR_TAIL_LINES = 200
+
+# Each module runs in its own process group so a timeout or cancellation
+# can kill everything it started (apt-get, sed, ...), not just the shell.
+if os.name == "nt":
+    PROCESS_GROUP_ARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    PROCESS_GROUP_ARGS = {"start_new_session": True}
+
+
+def module_path_for(os_type, module_name):
+    return os.path.join('scripts', os_type.lower(), 'modules', module_name)
+
+
+def build_command(os_type, module_path, mode, level, args=()):
+    """Builds the argument vector used to launch a module; `args` follow the level."""
+    if os_type == "Windows":
+        return ["powershell.exe", "-ExecutionPolicy", "Bypass", "-File", module_path, "-Mode", mode, "-Level", level, *args]
+    # Invoke through bash so modules do not depend on the executable bit.
+    return ["bash", module_path, mode, level, *args]
+
+
+# --- 2. Single Module Execution ---
+class ModuleRun:
+    """
+    The outcome of one module execution: parsed results plus any errors,
+    and the timings and volumes its metrics span reports.
+
+    `source` is "script", "native" or "cache". Byte counts are decoded
+    characters, which equal bytes for the modules' ASCII output.
+    """
+    def __init__(self, module_name, source="script"):
+        self.module_name = module_name
+        self.source = source
+        self.results = []
+        self.error = None
+        self.killed = None
+        self.started = time.perf_counter()
+        self.spawn_seconds = None
+        self.first_result_seconds = None
+        self.exit_code = None
+        self.stdout_bytes = None
+        self.stderr_bytes = None
+
+
+def _kill_process_group(process):
+    """Kills a module together with every child it spawned."""
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        process.kill()
+
+
+def _watchdog(process, run, timeout, cancel_event):
+    """Kills the module's process group on cancellation or when its timeout expires."""
+    deadline = time.monotonic() + timeout if timeout else None
+    waiter = cancel_event or threading.Event()
+    while process.poll() is None:
+        if cancel_event is not None and cancel_event.is_set():
+            run.killed = "cancelled"
+        elif deadline is not None and time.monotonic() >= deadline:
+            run.killed = f"timed out after {timeout}s"
+        if run.killed:
+            _kill_process_group(process)
+            return
+        waiter.wait(0.1)
+
+
+def _drain_stderr(stream, sink, run):
+    """Reader thread body: keeps the tail of a module's stderr so it can never fill the pipe."""
+    size = 0
+    for line in stream:
+        size += len(line)
+        sink.append(line.rstrip('\n'))
+    stream.close()
+    run.stderr_bytes = size
+
+
+def execute_module(os_type, module_name, mode, level, on_result=None, on_raw=None, env=None,
+                   timeout=None, cancel_event=None, transport=None, args=()):
+    """
+    Runs one module and streams its JSON-lines output.
+
+    Each stdout line is parsed and forwarded as soon as the module flushes
+    it. stderr is drained on its own reader thread so a module that writes
+    heavily to either stream cannot block on the other.
+
+    Args:
+        os_type (str): "Windows" or "Linux".
+        module_name (str): The module file name, e.g. "Filesystem.sh".
+        mode (str): "Audit", "Harden" or "Rollback".
+        level (str): The hardening level (e.g. "L1").
+        on_result (callable): Called with each parsed result dictionary.
+        on_raw (callable): Called with each line that is not valid JSON.
+        env (dict): Extra environment variables for the module.
+        timeout (float): Seconds after which the module is killed.
+        cancel_event (threading.Event): Kills the module when set.
+        transport (fleet.Transport): Runs the module on another host; the
+            transport builds the command for its persistent session.
+        args (tuple): Extra arguments after the level (e.g. a restore directory).
+
+    Returns:
+        ModuleRun: The parsed results and, if the module failed, an error message.
+    """
+    run = ModuleRun(module_name)
+    module_path = module_path_for(os_type, module_name)
+    if not os.path.exists(module_path):
+        run.error = f"Module file not found at '{module_path}'"
+        return run
+
+    if transport is not None:
+        command = transport.command(module_path, mode, level, args)
+    else:
+        command = build_command(os_type, module_path, mode, level, args)
+    try:
+        spawn_start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, bufsize=1, env={**os.environ, **env} if env else None,
+                                   **PROCESS_GROUP_ARGS)
+        run.spawn_seconds = time.perf_counter() - spawn_start
+    except OSError as e:
+        run.error = f"Module '{module_name}' could not be started: {e}"
+        return run
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    stderr_reader = threading.Thread(target=_drain_stderr, args=(process.stderr, stderr_tail, run), daemon=True)
+    stderr_reader.start()
+    if timeout or cancel_event is not None:
+        threading.Thread(target=_watchdog, args=(process, run, timeout, cancel_event), daemon=True).start()
+
+    stdout_bytes = 0
+    for line in process.stdout:
+        stdout_bytes += len(line)
+        line = line.strip()
+        if not line: continue
+        try:
+            data = json.loads(line)
+            if run.first_result_seconds is None:
+                run.first_result_seconds = time.perf_counter() - run.started
+            run.results.append(data)
+            if on_result: on_result(data)
+        except json.JSONDecodeError:
+            if on_raw: on_raw(line)
+    process.stdout.close()
+    returncode = process.wait()
+    stderr_reader.join()
+    run.stdout_bytes = stdout_bytes
+    run.exit_code = returncode
+
+    if run.killed:
+        run.error = f"Module '{module_name}' was killed: {run.killed}."
+    elif returncode != 0:
+        stderr_text = '\n'.join(stderr_tail).strip()
+        run.error = f"Module '{module_name}' exited with an error. STDERR: {stderr_text}"
+    return run
+
+
+# --- 3. Concurrent Scheduler ---
+def execute_native(module_name, checks, ctx, on_result=None, cache=None):
+    """
+    Answers a module's audit checks in-process instead of forking the script.
+    With a cache, checks whose inputs are unchanged replay their last result.
+    """
+    run = ModuleRun(module_name, source="native")
+    try:
+        for check in checks:
+            inputs = check_inputs(check) if cache else None
+            if inputs is None:
+                results = evaluate([check], ctx)
+            else:
+                key = f"{module_name}:{check.parameter}"
+                fingerprints = cache.fingerprints(ctx, inputs)
+                results = cache.lookup(key, fingerprints)
+                if results is None:
+                    results = evaluate([check], ctx)
+                    cache.store(key, fingerprints, results)
+            for data in results:
+                if run.first_result_seconds is None:
+                    run.first_result_seconds = time.perf_counter() - run.started
+                run.results.append(data)
+                if on_result: on_result(data)
+    except Exception as e:
+        run.error = f"Native checks for '{module_name}' failed: {e}"
+    return run
+
+
+def execute_cached_module(os_type, module_name, mode, level, cache, ctx, **kwargs):
+    """Replays a shell module's cached audit output when its declared inputs are unchanged."""
+    inputs = module_inputs(module_path_for(os_type, module_name), module_name)
+    if inputs is None:
+        return execute_module(os_type, module_name, mode, level, **kwargs)
+
+    fingerprints = cache.fingerprints(ctx, inputs)
+    cached = cache.lookup(module_name, fingerprints)
+    if cached is not None:
+        run = ModuleRun(module_name, source="cache")
+        run.results = cached
+        for data in cached:
+            if kwargs.get('on_result'): kwargs['on_result'](data)
+        return run
+
+    run = execute_module(os_type, module_name, mode, level, **kwargs)
+    if not run.error:
+        cache.store(module_name, fingerprints, run.results)
+    return run
+
+
+def run_modules(os_type, modules, mode, level, max_workers=DEFAULT_WORKERS,
+                on_start=None, on_result=None, on_raw=None, on_error=None, on_done=None,
+                native=True, facts_ttl=facts.DEFAULT_FACTS_TTL, incremental=False, full=False,
+                module_timeout=None, cancel_event=None, transport=None, rollback=None, env_overrides=None,
+                exclusive=None, schedule=None):
+    """
+    Runs a list of modules on a bounded worker pool.
+
+    Read-only modules run concurrently; modules that declared themselves
+    exclusive for this mode wait for every in-flight module to finish and
+    then run alone, and a module waits for the manifest dependencies that
+    are part of the same run. Callbacks are serialized through a single lock, so
+    callers can emit or print from them without extra locking.
+    Every module execution and the run as a whole are recorded as
+    metrics spans.
+
+    Args:
+        os_type (str): "Windows" or "Linux".
+        modules (list): Module names in their reporting order.
+        mode (str): "Audit", "Harden" or "Rollback".
+        level (str): The hardening level (e.g. "L1").
+        max_workers (int): Upper bound on modules running at the same time.
+        on_start (callable): on_start(index, total, module_name) when a module starts.
+        on_result (callable): on_result(module_name, data) for every parsed result.
+        on_raw (callable): on_raw(module_name, line) for every non-JSON line.
+        on_error (callable): on_error(module_name, message) when a module fails.
+        on_done (callable): on_done(module_name) when a module finishes.
+        native (bool): Answer audit checks declared in probes.NATIVE_CHECKS
+            in-process instead of forking.
+        facts_ttl (float): Reuse a fact snapshot younger than this many
+            seconds instead of collecting a new one.
+        incremental (bool): In Audit mode, reuse cached results of checks
+            whose inputs did not change since the last run. Replayed
+            results carry `"cached": True`. Results are only recorded when
+            the fact snapshot was collected for this run.
+        full (bool): With `incremental`, re-run every check but refresh the
+            cache with the new results.
+        module_timeout (float): Kill any module running longer than this;
+            by default each module's manifest timeout applies.
+        cancel_event (threading.Event): When set, no further modules start
+            and running ones are killed with their process groups.
+        transport (fleet.Transport): Target host. Native probes and the fact
+            snapshot read from `transport.root`; hosts without a readable
+            root run every check through the module scripts. Modules without
+            native checks are skipped on hosts that cannot run scripts, and
+            results of scripts run on this machine for them carry
+            `"local": True`.
+        rollback (rollback_store.RollbackRun): In Harden mode, local Linux
+            modules stage their rollback data into it; in Rollback mode,
+            each module is handed its share of it to restore.
+        env_overrides (dict): Extra environment per module name, e.g. the
+            remediation steps a targeted hardening run selected.
+        exclusive (set): Module names that must run alone, in place of the
+            manifest's declarations for this mode (e.g. only the modules of a
+            rollback whose targets overlap).
+        schedule (manifest.ExecutionPlan): The compiled plan that supplies
+            each module's exclusivity, timeout and dependencies; by default
+            manifest.schedule_for(os_type, mode).
+
+    Returns:
+        ResultSet: All results, tagged with their module (and the
+        transport's host), merged in the order of `modules` regardless of
+        which module finished first.
+    """
+    lock = threading.Lock()
+    if schedule is None:
+        schedule = manifest.schedule_for(os_type, mode)
+    host = transport.name if transport is not None else metrics.LOCAL_HOST
+    run_span = metrics.Span("run", mode=mode, level=level, os_type=os_type, host=host, modules=len(modules))
+    # One fact snapshot per run, shared by native probes and shell modules.
+    # Only audits may reuse an earlier snapshot; writers always see fresh state.
+    root = transport.root if transport is not None else "/"
+    native = native and root is not None
+    collected_after = time.monotonic()
+    ctx = facts.get_snapshot(root=root or "/", ttl=facts_ttl if mode == "Audit" else 0)
+    # Results evaluated against a snapshot an earlier run collected may be
+    # older than the live fingerprints, so only a fresh snapshot records.
+    cache = (AuditCache(root=ctx.root, refresh=full, record=ctx.created >= collected_after)
+             if incremental and mode == "Audit" else None)
+    total = len(modules)
+    started = [0]
+
+    def emit(callback, *args):
+        if callback:
+            with lock:
+                callback(*args)
+
+    def task(module_name):
+        if cancel_event is not None and cancel_event.is_set():
+            run = ModuleRun(module_name)
+            run.error = f"Module '{module_name}' was skipped: the run was cancelled."
+            emit(on_error, module_name, run.error)
+            emit(on_done, module_name)
+            return run
+        with lock:
+            started[0] += 1
+            index = started[0]
+            if on_start: on_start(index, total, module_name)
+        checks = native_checks_for(os_type, module_name, mode) if native else None
+        if checks is not None:
+            run = execute_native(module_name, checks, ctx, cache=cache,
+                                 on_result=lambda data: emit(on_result, module_name, data))
+        elif transport is not None and not transport.runs_scripts:
+            run = ModuleRun(module_name)
+            run.error = (f"Module '{module_name}' was skipped: it has no native checks and "
+                         f"host '{transport.name}' cannot run module scripts.")
+        else:
+            def script_result(data):
+                if transport is not None and transport.local_scripts:
+                    data['local'] = True
+                emit(on_result, module_name, data)
+
+            callbacks = dict(
+                on_result=script_result,
+                on_raw=lambda line: emit(on_raw, module_name, line),
+                env=facts.module_env(ctx, module_name) if os_type == "Linux" and root is not None else None,
+                timeout=module_timeout or schedule.timeouts.get(module_name), cancel_event=cancel_event, transport=transport,
+            )
+            if env_overrides and module_name in env_overrides:
+                callbacks['env'] = {**(callbacks['env'] or {}), **env_overrides[module_name]}
+            staged = rollback is not None and os_type == "Linux" and transport is None
+            if staged and mode == "Harden":
+                callbacks['env'] = {**(callbacks['env'] or {}), STAGE_ENV: rollback.stage(module_name)}
+            elif staged and mode == "Rollback":
+                callbacks['args'] = (rollback.restore_dir(module_name),)
+            if cache:
+                run = execute_cached_module(os_type, module_name, mode, level, cache, ctx, **callbacks)
+            else:
+                run = execute_module(os_type, module_name, mode, level, **callbacks)
+            if staged and mode == "Harden":
+                rollback.ingest(module_name)
+        metrics.module_span(run, mode, level, host=host)
+        if run.error:
+            emit(on_error, module_name, run.error)
+        emit(on_done, module_name)
+        return run
+
+    if exclusive is None:
+        exclusive = schedule.exclusive
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        in_flight = []
+        for module_name in modules:
+            for dependency in schedule.depends_on.get(module_name, ()):
+                if dependency in futures: futures[dependency].result()
+            if module_name in exclusive:
+                # Drain the pool, then run this module with nothing beside it.
+                for future in in_flight: future.result()
+                in_flight = []
+                futures[module_name] = pool.submit(task, module_name)
+                futures[module_name].result()
+            else:
+                futures[module_name] = pool.submit(task, module_name)
+                in_flight.append(futures[module_name])
+
+    if cache:
+        cache.save()
+    if mode != "Audit":
+        # The system changed underneath the snapshot; the next run must re-collect.
+        facts.invalidate(root or "/")
+
+    all_results = ResultSet()
+    errors = 0
+    for module_name in modules:
+        run = futures[module_name].result()
+        all_results.extend(run.results, module=module_name, host=transport.name if transport is not None else None)
+        errors += 1 if run.error else 0
+    run_span.finish(results=len(all_results), module_errors=errors)
+    return all_results
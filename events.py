@@ -0,0 +1,108 @@
+import time
+import threading
+
+# --- 1. Sink Definitions ---
+# A batch is flushed when it reaches this many results or is this old.
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.05
+# Producers block once this many results are waiting to be sent.
+MAX_PENDING = 2000
+
+# Events that are batched, and events where only the latest value matters.
+BATCHED_EVENTS = {'console_output': 'console_output_batch'}
+COALESCED_EVENTS = {'progress_update'}
+
+
+class EventSink:
+    """
+    Sits between the orchestrator and Socket.IO and turns a stream of tiny
+    events into a few larger frames.
+
+    Results are buffered and sent as `console_output_batch` payloads every
+    FLUSH_INTERVAL seconds or BATCH_SIZE records. Progress updates that are
+    superseded before a flush are dropped. When the flusher falls behind
+    (slow transport, many viewers), `emit` blocks the producing module
+    thread instead of growing an unbounded server-side queue. Any other
+    event flushes pending results first, so ordering is preserved.
+
+    It exposes the same `emit(event, payload, to=None)` call as SocketIO,
+    so it can be passed wherever a socketio instance is expected. Events go
+    to `to` when given and to the sink's room otherwise; batches and
+    coalesced progress are kept per room.
+    """
+    def __init__(self, socketio, room=None, batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.socketio = socketio
+        self.room = room
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._pending_count = 0
+        self._latest = {}
+        self._send_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run, daemon=True, name="syswarden-event-sink")
+        self._flusher.start()
+
+    def emit(self, event, payload, to=None):
+        room = self.room if to is None else to
+        with self._cond:
+            if event in BATCHED_EVENTS:
+                # Backpressure: wait for the flusher rather than queueing without bound.
+                while self._pending_count >= self.max_pending and not self._closed:
+                    self._cond.wait()
+                self._pending.setdefault((event, room), []).append(payload)
+                self._pending_count += 1
+                if self._pending_count >= self.batch_size:
+                    self._cond.notify_all()
+                return
+            if event in COALESCED_EVENTS:
+                self._latest[(event, room)] = payload
+                return
+        self.flush()
+        self._send(event, payload, room)
+
+    def _send(self, event, payload, room):
+        self.socketio.emit(event, payload, to=room)
+
+    def flush(self):
+        """Sends everything buffered so far: result batches, then the latest progress."""
+        with self._send_lock:
+            with self._cond:
+                pending, self._pending, self._pending_count = self._pending, {}, 0
+                latest, self._latest = self._latest, {}
+                self._cond.notify_all()
+            for (event, room), payloads in pending.items():
+                for start in range(0, len(payloads), self.batch_size):
+                    self._send(BATCHED_EVENTS[event], {'events': payloads[start:start + self.batch_size]}, room)
+            for (event, room), payload in latest.items():
+                self._send(event, payload, room)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.interval
+                while not self._closed and self._pending_count < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        """Flushes what is left and stops the flusher thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,125 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import weakref
+from probes import ProbeContext
+import manifest
+
+# --- 1. Fact Declarations ---
+# The fact families each Linux module reads are declared in its manifest
+# entry (manifest.ModuleSpec.facts).
+
+# Environment variable through which modules find the exported snapshot.
+FACTS_ENV = "SYSWARDEN_FACTS_DIR"
+
+# Seconds a snapshot may be reused by later runs; 0 collects afresh every run.
+DEFAULT_FACTS_TTL = float(os.environ.get("SYSWARDEN_FACTS_TTL", "0"))
+
+
+# --- 2. The Snapshot ---
+class FactSnapshot(ProbeContext):
+    """
+    One run's view of the system, shared by native probes and shell modules.
+
+    Facts are collected lazily, family by family, the first time a probe or
+    a module asks for them. `export` writes the requested families into a
+    private directory that modules read through scripts/linux/lib/facts.sh.
+    """
+    def __init__(self, root="/"):
+        super().__init__(root)
+        self.created = time.monotonic()
+        self.directory = None
+        self._exported = set()
+        self._export_lock = threading.Lock()
+
+    def age(self):
+        return time.monotonic() - self.created
+
+    def _render(self, family, selection):
+        if family == "mounts":
+            return self.read_text("/proc/mounts") or ""
+        if family == "modules":
+            return self.read_text("/proc/modules") or ""
+        if family == "modprobe":
+            return "".join(f"{name}\t{command}\n" for name, command in sorted(self.modprobe_installs().items()))
+        if family == "packages":
+            return "".join(f"{name}\t{state}\n" for name, state in sorted(self.packages().items()))
+        if family == "sysctl":
+            return "".join(f"{key}={self.sysctl(key) or ''}\n" for key in selection or [])
+        if family == "file_modes":
+            return "".join(f"{path}\t{self.file_mode(path)}\n" for path in selection or [])
+        if family == "files":
+            # Configuration files are copied whole; the index maps each
+            # path to its copy and leaves out files that do not exist.
+            index = []
+            for path in selection or []:
+                text = self.read_text(path)
+                if text is None:
+                    continue
+                copy = os.path.join(self.directory, "files.d", path.strip("/").replace("/", "%"))
+                os.makedirs(os.path.dirname(copy), exist_ok=True)
+                with open(copy, "w", encoding="utf-8") as f:
+                    f.write(text)
+                index.append(f"{path}\t{copy}\n")
+            return "".join(index)
+        raise ValueError(f"Unknown fact family '{family}'")
+
+    def export(self, families):
+        """
+        Writes the requested fact families to the snapshot directory.
+
+        Args:
+            families (dict): Family name to a key/path list (or None for all).
+
+        Returns:
+            str: The directory to pass to modules via SYSWARDEN_FACTS_DIR.
+        """
+        with self._export_lock:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix="syswarden-facts-")
+                # Removed once no run holds the snapshot any more (or at exit).
+                weakref.finalize(self, shutil.rmtree, self.directory, True)
+            for family, selection in families.items():
+                key = (family, tuple(selection or ()))
+                if key in self._exported:
+                    continue
+                with open(os.path.join(self.directory, family), "a", encoding="utf-8") as f:
+                    f.write(self._render(family, selection))
+                self._exported.add(key)
+            return self.directory
+
+
+# --- 3. Snapshot Reuse ---
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(root="/", ttl=DEFAULT_FACTS_TTL):
+    """
+    Returns a snapshot for `root`, reusing the previous one if it is younger
+    than `ttl` seconds (so an audit followed by a report collects once).
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(root)
+        if snapshot is None or snapshot.age() > ttl:
+            snapshot = FactSnapshot(root)
+            _snapshots[root] = snapshot
+        return snapshot
+
+
+def invalidate(root="/"):
+    """Drops a cached snapshot; called after anything that changes system state."""
+    with _snapshots_lock:
+        _snapshots.pop(root, None)
+
+
+def module_env(snapshot, module_name):
+    """Exports the module's declared fact families and returns its environment additions."""
+    spec = manifest.get(module_name)
+    families = spec.facts if spec else None
+    if not families:
+        return {}
+    return {FACTS_ENV: snapshot.export(families)}
+
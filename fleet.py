@@ -0,0 +1,288 @@
+import os
+import json
+import shlex
+import shutil
+import datetime
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import run_modules, DEFAULT_WORKERS
+from results import ResultSet
+
+# --- 1. Fleet Definitions ---
+# How many hosts are audited at the same time; each host additionally runs
+# up to its own per-host worker limit.
+DEFAULT_MAX_HOSTS = 16
+
+# Local tree uploaded to remote hosts once per session.
+LINUX_SCRIPTS_DIR = os.path.join('scripts', 'linux')
+
+
+class TransportError(Exception):
+    """Raised when a host session cannot be opened."""
+
+
+# --- 2. Transports ---
+class Transport:
+    """
+    How modules reach one host. A transport is opened once per host and the
+    same session is reused for every module run against it.
+
+    `root` is the filesystem root native probes may read for this host, or
+    None when the host's files are not locally readable (remote hosts), in
+    which case every check runs through the module scripts.
+
+    `runs_scripts` is False for hosts whose module scripts cannot run on
+    the host itself; their modules without native checks are skipped.
+    `local_scripts` marks hosts whose scripts run on this machine instead,
+    so their script results describe this machine and carry `"local": True`.
+    """
+    os_type = "Linux"
+    root = None
+    runs_scripts = True
+    local_scripts = False
+
+    def __init__(self, name):
+        self.name = name
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def command(self, module_path, mode, level, args=()):
+        """The argument vector that runs a module on the host; `args` follow the level."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalTransport(Transport):
+    """Runs modules on this machine, exactly like a single-host run."""
+    root = "/"
+
+    def command(self, module_path, mode, level, args=()):
+        return ["bash", module_path, mode, level, *args]
+
+
+class SysrootTransport(LocalTransport):
+    """
+    Treats a directory as a host's filesystem (a mounted image, a container
+    rootfs or a fake host for testing). Native probes and the exported fact
+    snapshot read from the directory, so no network or root is needed.
+
+    Module scripts would run on this machine, not in the directory, so
+    modules without native checks are skipped. With `local_scripts` they
+    run anyway (e.g. against stub commands) and their results are labelled
+    local.
+    """
+    def __init__(self, name, root, local_scripts=False):
+        super().__init__(name)
+        if not os.path.isdir(root):
+            raise TransportError(f"Sysroot '{root}' for host '{name}' is not a directory")
+        self.root = os.path.abspath(root)
+        self.runs_scripts = self.local_scripts = local_scripts
+
+
+class SSHTransport(Transport):
+    """
+    Runs modules over one persistent OpenSSH connection per host.
+
+    open() starts a ControlMaster session and uploads scripts/linux once;
+    every module then multiplexes over that master instead of opening its
+    own connection. close() removes the upload and stops the master.
+    """
+    def __init__(self, name, address, user=None, port=None, options=None):
+        super().__init__(name)
+        self.destination = f"{user}@{address}" if user else address
+        self.port = port
+        self.options = options or []
+        self.control_dir = None
+        self.remote_dir = None
+
+    def _ssh(self, *extra):
+        args = ["ssh", "-o", "BatchMode=yes", "-o", f"ControlPath={self.control_path}"]
+        if self.port:
+            args += ["-p", str(self.port)]
+        return args + self.options + list(extra)
+
+    @property
+    def control_path(self):
+        return os.path.join(self.control_dir, "master")
+
+    def open(self):
+        self.control_dir = tempfile.mkdtemp(prefix="syswarden-ssh-")
+        try:
+            subprocess.run(self._ssh("-o", "ControlMaster=yes", "-o", "ControlPersist=yes", "-N", "-f", self.destination),
+                           check=True, capture_output=True, text=True, timeout=30)
+            self.remote_dir = subprocess.run(self._ssh(self.destination, "mktemp -d /tmp/syswarden.XXXXXX"),
+                                             check=True, capture_output=True, text=True, timeout=30).stdout.strip()
+            archive = subprocess.run(["tar", "-C", os.path.dirname(os.path.abspath(LINUX_SCRIPTS_DIR)), "-cf", "-", "linux"],
+                                     check=True, capture_output=True).stdout
+            subprocess.run(self._ssh(self.destination, f"tar -C {shlex.quote(self.remote_dir)} -xf -"),
+                           input=archive, check=True, capture_output=True, timeout=60)
+        except (subprocess.SubprocessError, OSError) as e:
+            stderr = getattr(e, 'stderr', b'') or b''
+            if isinstance(stderr, bytes): stderr = stderr.decode(errors='replace')
+            self.close()
+            raise TransportError(f"Could not open SSH session to '{self.name}': {stderr.strip() or e}")
+
+    def command(self, module_path, mode, level, args=()):
+        remote_path = f"{self.remote_dir}/linux/modules/{os.path.basename(module_path)}"
+        # Run from the upload directory so relative rollback paths stay inside it.
+        remote = f"cd {shlex.quote(self.remote_dir)} && " + " ".join(
+            shlex.quote(arg) for arg in ["bash", remote_path, mode, level, *args])
+        return self._ssh(self.destination, remote)
+
+    def close(self):
+        if self.control_dir is None:
+            return
+        if self.remote_dir:
+            subprocess.run(self._ssh(self.destination, f"rm -rf {shlex.quote(self.remote_dir)}"), capture_output=True)
+        subprocess.run(self._ssh("-O", "exit", self.destination), capture_output=True)
+        shutil.rmtree(self.control_dir, ignore_errors=True)
+        self.control_dir = self.remote_dir = None
+
+
+# --- 3. Inventory ---
+def parse_target(name, target):
+    """
+    Builds a transport from an inventory target:
+        local                      this machine
+        sysroot:/path/to/rootfs    a directory treated as the host's filesystem
+        ssh://[user@]host[:port]   a remote host over OpenSSH
+    """
+    if target == "local":
+        return LocalTransport(name)
+    if target.startswith("sysroot:"):
+        return SysrootTransport(name, target[len("sysroot:"):])
+    if target.startswith("ssh://"):
+        rest = target[len("ssh://"):]
+        user, _, address = rest.rpartition("@")
+        address, _, port = address.partition(":")
+        return SSHTransport(name, address, user or None, int(port) if port else None)
+    raise ValueError(f"Unknown inventory target '{target}' for host '{name}'")
+
+
+def parse_inventory(text):
+    """
+    Parses an inventory with one host per line: `<name> <target>`.
+    A line holding only a target uses it as the name. '#' starts a comment.
+    """
+    transports = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        fields = line.split()
+        name, target = (fields[0], fields[1]) if len(fields) > 1 else (fields[0], fields[0])
+        if target.startswith("ssh://") and name == target:
+            name = target[len("ssh://"):].rpartition("@")[2].partition(":")[0]
+        try:
+            transports.append(parse_target(name, target))
+        except (ValueError, TransportError) as e:
+            raise ValueError(f"Inventory line {number}: {e}")
+    return transports
+
+
+def load_inventory(path):
+    with open(path, encoding='utf-8') as f:
+        return parse_inventory(f.read())
+
+
+# --- 4. Fleet Execution ---
+class HostResult:
+    """One host's share of a fleet run."""
+    def __init__(self, name):
+        self.name = name
+        self.results = ResultSet()
+        self.errors = []
+
+    def summary(self):
+        summary = self.results.summary()
+        return {'host': self.name, **summary.counts(), 'percent': summary.percent, 'errors': self.errors}
+
+
+def run_fleet(transports, modules, mode, level, max_hosts=DEFAULT_MAX_HOSTS, per_host_workers=DEFAULT_WORKERS,
+              on_host_start=None, on_result=None, on_error=None, on_host_done=None, cancel_event=None,
+              module_timeout=None):
+    """
+    Audits many hosts at once.
+
+    Only Audit is supported: a transport runs modules outside the local
+    rollback store, so nothing a fleet Harden changed could be undone.
+
+    At most `max_hosts` hosts are in flight, and each host runs at most
+    `per_host_workers` modules at a time over its single transport session.
+    Callbacks are serialized across hosts.
+
+    Returns:
+        list: HostResult objects in inventory order.
+
+    Raises:
+        ValueError: If `mode` is not Audit.
+    """
+    if mode != 'Audit':
+        raise ValueError(f"Fleet runs only support Audit, not {mode}.")
+    lock = threading.Lock()
+
+    def emit(callback, *args):
+        if callback:
+            with lock:
+                callback(*args)
+
+    def run_host(transport):
+        host = HostResult(transport.name)
+        emit(on_host_start, transport.name)
+        try:
+            with transport:
+                run_modules(transport.os_type, modules, mode, level, max_workers=per_host_workers,
+                            transport=transport, cancel_event=cancel_event, module_timeout=module_timeout,
+                            on_result=lambda module_name, data: (host.results.append(data, module_name, transport.name), emit(on_result, transport.name, module_name, data)),
+                            on_error=lambda module_name, message: (host.errors.append(message), emit(on_error, transport.name, module_name, message)))
+        except TransportError as e:
+            host.errors.append(str(e))
+            emit(on_error, transport.name, None, str(e))
+        emit(on_host_done, host)
+        return host
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_hosts)), thread_name_prefix="syswarden-host") as pool:
+        return list(pool.map(run_host, transports))
+
+
+def tag_results(host_results):
+    """
+    Merges a fleet run into one ResultSet whose results read as tagged with
+    their host ("[host] parameter"), while its columns keep the plain
+    parameter for per-check aggregation across hosts.
+    """
+    tagged = ResultSet(tag_hosts=True)
+    for host in host_results:
+        tagged.extend(host.results, host=host.name)
+    return tagged
+
+
+def fleet_summary(host_results):
+    """Fleet-wide counts, compliance by module and the checks failing on the most hosts."""
+    summary = tag_results(host_results).summary().to_dict()
+    del summary['by_host']
+    return summary
+
+
+def write_fleet_summary(host_results, level, mode):
+    """Writes per-host and fleet-wide JSON summaries next to the reports; returns its filename."""
+    if not os.path.exists('reports'):
+        os.makedirs('reports')
+    filename = f"reports/SysWarden_Fleet_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'level': level, 'mode': mode, 'hosts': [h.summary() for h in host_results],
+                   'fleet': fleet_summary(host_results)}, f, indent=2)
+    return filename
@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import datetime
+import platform
+import threading
+
+# --- 1. Store Definitions ---
+DB_PATH = os.path.join('logs', 'history.db')
+
+# Results are buffered and written in one transaction per batch.
+BATCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    os_type TEXT NOT NULL,
+    level TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    total INTEGER DEFAULT 0,
+    non_compliant INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    seq INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    module TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    status TEXT NOT NULL,
+    details TEXT,
+    cached INTEGER DEFAULT 0,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id, seq);
+CREATE INDEX IF NOT EXISTS idx_results_host ON results(host);
+CREATE INDEX IF NOT EXISTS idx_results_module ON results(module);
+CREATE INDEX IF NOT EXISTS idx_results_parameter ON results(parameter, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results(status, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_runs_host ON runs(host, started_at);
+"""
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# --- 2. The Result Store ---
+class ResultStore:
+    """
+    Persistent, indexed audit history in SQLite (WAL mode).
+
+    A single connection is shared by all threads and guarded by a lock;
+    WAL lets readers (the web API) query while a run is being written.
+    """
+    def __init__(self, path=DB_PATH):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    # --- Writing ---
+    def start_run(self, level, mode, os_type, host=None):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (host, os_type, level, mode, started_at) VALUES (?, ?, ?, ?, ?)",
+                (host or platform.node(), os_type, level, mode, _now()))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def write_batch(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO results (run_id, seq, host, module, parameter, status, details, cached, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def finish_run(self, run_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, "
+                "total = (SELECT COUNT(*) FROM results WHERE run_id = ?), "
+                "non_compliant = (SELECT COUNT(*) FROM results WHERE run_id = ? AND status = 'Not Compliant') "
+                "WHERE id = ?", (_now(), run_id, run_id, run_id))
+            self._conn.commit()
+
+    # --- Querying ---
+    def get_run(self, run_id):
+        rows = self._query("SELECT * FROM runs WHERE id = ?", (run_id,))
+        return rows[0] if rows else None
+
+    def list_runs(self, limit=20, host=None):
+        if host:
+            return self._query("SELECT * FROM runs WHERE host = ? ORDER BY id DESC LIMIT ?", (host, limit))
+        return self._query("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+
+    def run_results(self, run_id, after_seq=0, limit=-1):
+        """Returns a run's results in their original order, as result dictionaries."""
+        return self._query(
+            "SELECT seq, parameter, status, details, module, host FROM results "
+            "WHERE run_id = ? AND seq > ? ORDER BY seq LIMIT ?", (run_id, after_seq, limit))
+
+    def iter_run_results(self, run_id, batch_size=BATCH_SIZE):
+        """Yields a run's results in order, reading them `batch_size` rows at a time."""
+        after_seq = 0
+        while True:
+            rows = self.run_results(run_id, after_seq, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_seq = rows[-1]['seq']
+
+    def non_compliant(self, days=30, host=None):
+        """Non-compliant items recorded in the last `days` days, newest first."""
+        since = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        sql = ("SELECT run_id, host, module, parameter, details, recorded_at FROM results "
+               "WHERE status = 'Not Compliant' AND recorded_at >= ?")
+        params = [since]
+        if host:
+            sql += " AND host = ?"
+            params.append(host)
+        return self._query(sql + " ORDER BY recorded_at DESC", params)
+
+    def drift(self, parameter, host=None):
+        """
+        Returns the points at which a parameter's status changed, e.g. when
+        /etc/shadow permissions drifted from Compliant to Not Compliant.
+        """
+        sql = "SELECT run_id, host, status, details, recorded_at FROM results WHERE parameter = ?"
+        params = [parameter]
+        if host:
+            sql += " AND host = ?"
+            params.append(host)
+        changes = []
+        last_status = {}
+        for row in self._query(sql + " ORDER BY recorded_at, id", params):
+            if last_status.get(row['host']) != row['status']:
+                changes.append(row)
+                last_status[row['host']] = row['status']
+        return changes
+
+
+# --- 3. Run Recording ---
+class RunRecorder:
+    """Buffers one run's results and writes them to the store in batches."""
+    def __init__(self, store, level, mode, os_type, host=None):
+        self.store = store
+        self.host = host or platform.node()
+        self.run_id = store.start_run(level, mode, os_type, self.host)
+        self._pending = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, module_name, data):
+        with self._lock:
+            self._seq += 1
+            self._pending.append((self.run_id, self._seq, self.host, module_name,
+                                  str(data.get('parameter', 'Unknown Policy')), str(data.get('status', 'Error')),
+                                  str(data.get('details', '')), 1 if data.get('cached') else 0, _now()))
+            if len(self._pending) < BATCH_SIZE:
+                return
+            rows, self._pending = self._pending, []
+        self.store.write_batch(rows)
+
+    def close(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            self.store.write_batch(rows)
+        self.store.finish_run(self.run_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide ResultStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
+
+
+def start_run(level, mode, os_type, host=None):
+    return RunRecorder(get_store(), level, mode, os_type, host)
@@ -0,0 +1,168 @@
+import os
+import glob
+import json
+import hashlib
+import tempfile
+import threading
+import manifest
+
+# --- 1. Cache Definitions ---
+CACHE_PATH = os.path.join('logs', 'audit_cache.json')
+CACHE_VERSION = 2
+
+# The inputs of shell modules whose audit output can be replayed are
+# declared in the manifest (manifest.ModuleSpec.inputs); modules without
+# declared inputs are never cached. The module script and the shared
+# runtime, which shapes every module's output, are always inputs.
+LINUX_LIB_DIR = os.path.join('scripts', 'linux', 'lib')
+
+# Sources that change without touching mtime are fingerprinted by content.
+CONTENT_PREFIXES = ("/proc/",)
+
+# Serializes saves, so caches of concurrent runs merge instead of racing.
+_save_lock = threading.Lock()
+
+MODPROBE_GLOBS = ["glob:/etc/modprobe.d/*.conf", "glob:/run/modprobe.d/*.conf",
+                  "glob:/usr/local/lib/modprobe.d/*.conf", "glob:/lib/modprobe.d/*.conf",
+                  "glob:/usr/lib/modprobe.d/*.conf"]
+
+
+# --- 2. Check Inputs ---
+def check_inputs(check):
+    """
+    Lists the inputs a native check depends on, as "kind:target" strings.
+    If none of them changed, the check's previous result still holds.
+    """
+    if check.kind == "kernel_module":
+        return ["file:/proc/modules", *MODPROBE_GLOBS]
+    if check.kind == "mount_option":
+        return ["file:/proc/mounts"]
+    if check.kind in ("file_mode", "file_text"):
+        return [f"file:{check.target}"]
+    if check.kind == "sysctl":
+        return [f"sysctl:{check.target}"]
+    if check.kind == "package":
+        return ["file:/var/lib/dpkg/status"]
+    if check.kind == "all":
+        inputs = []
+        for sub in check.target:
+            inputs.extend(i for i in check_inputs(sub) if i not in inputs)
+        return inputs
+    return None
+
+
+def module_inputs(module_path, module_name):
+    spec = manifest.get(module_name)
+    if spec is None or spec.inputs is None:
+        return None
+    libraries = sorted(glob.glob(os.path.join(LINUX_LIB_DIR, '*.sh'))) if module_path.endswith('.sh') else []
+    return [f"script:{os.path.abspath(path)}" for path in [module_path, *libraries]] + spec.inputs
+
+
+def _stat_token(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_mode]
+
+
+def _content_token(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def fingerprint(ctx, input_id):
+    """Computes a cheap, JSON-serialisable token for one input (stat calls, no forks)."""
+    kind, target = input_id.split(":", 1)
+    if kind == "script":
+        # Module scripts live in the SysWarden tree, not under the audited root.
+        return _stat_token(target)
+    if kind == "file":
+        path = ctx.path(target)
+        return _content_token(path) if target.startswith(CONTENT_PREFIXES) else _stat_token(path)
+    if kind == "glob":
+        pattern = ctx.path(target)
+        return [_stat_token(os.path.dirname(pattern))] + [[p, _stat_token(p)] for p in sorted(glob.glob(pattern))]
+    if kind == "sysctl":
+        return ctx.read_text("/proc/sys/" + target.replace(".", "/"))
+    raise ValueError(f"Unknown input kind '{kind}'")
+
+
+# --- 3. The Result Cache ---
+class AuditCache:
+    """
+    Remembers each check's last result together with the fingerprints of
+    its inputs, so unchanged checks can be answered without re-running.
+
+    Fingerprints are taken from the live system. A run evaluating its
+    checks against a reused fact snapshot must not record (`record=False`):
+    its results may predate the fingerprints they would be stored under.
+    """
+    def __init__(self, path=CACHE_PATH, root="/", refresh=False, record=True):
+        self.path = path
+        self.root = root
+        # A refreshing cache re-runs every check but still records the results.
+        self.refresh = refresh
+        self.record = record
+        self._lock = threading.Lock()
+        # Keys stored by this run; only these overwrite what is on disk.
+        self._stored = set()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') == CACHE_VERSION and stored.get('root') == self.root:
+                return stored.get('entries', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def fingerprints(self, ctx, inputs):
+        return {input_id: fingerprint(ctx, input_id) for input_id in inputs}
+
+    def lookup(self, key, fingerprints):
+        """Returns the cached results for `key` if every input is unchanged, else None."""
+        if self.refresh:
+            return None
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry and entry['inputs'] == fingerprints:
+            return [dict(result, cached=True) for result in entry['results']]
+        return None
+
+    def store(self, key, fingerprints, results):
+        if not self.record:
+            return
+        with self._lock:
+            self.entries[key] = {'inputs': fingerprints, 'results': results}
+            self._stored.add(key)
+
+    def save(self):
+        """
+        Writes the entries this run stored into the cache file, merged with
+        whatever other runs saved since this cache was loaded.
+        """
+        with _save_lock, self._lock:
+            if not self._stored:
+                return
+            entries = self._load()
+            entries.update((key, self.entries[key]) for key in self._stored)
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix='.audit_cache-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'version': CACHE_VERSION, 'root': self.root, 'entries': entries}, f)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self.entries = entries
+            self._stored.clear()
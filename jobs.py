@@ -0,0 +1,143 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# --- 1. Job Definitions ---
+# How many jobs may execute at once; further submissions wait in the queue.
+DEFAULT_MAX_JOBS = 2
+# Per-module and whole-job limits in seconds (None disables a limit).
+DEFAULT_MODULE_TIMEOUT = 600
+DEFAULT_JOB_TIMEOUT = 3600
+
+QUEUED, RUNNING, FINISHED, FAILED, CANCELLED, TIMED_OUT = (
+    "queued", "running", "finished", "failed", "cancelled", "timed out")
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class Job:
+    """
+    One submitted run. `cancel_event` is handed to the engine, which stops
+    scheduling modules and kills the process groups of running ones.
+    """
+    def __init__(self, key, params, module_timeout, job_timeout):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.params = params
+        self.module_timeout = module_timeout
+        self.job_timeout = job_timeout
+        self.status = QUEUED
+        self.message = ""
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self._cancel_reason = CANCELLED
+
+    def cancel(self, reason=CANCELLED):
+        if self.status in ACTIVE_STATES and not self.cancel_event.is_set():
+            self._cancel_reason = reason
+            self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def cancel_reason(self):
+        """The status a cancelled job ends in: CANCELLED, or TIMED_OUT when its timeout fired."""
+        return self._cancel_reason
+
+    def to_dict(self):
+        return {'job_id': self.id, 'status': self.status, 'message': self.message,
+                'created': self.created, 'started': self.started, 'finished': self.finished,
+                **self.params}
+
+
+# --- 2. The Job Manager ---
+class JobManager:
+    """
+    Runs submitted jobs on a bounded worker pool.
+
+    Identical requests (same key) made while a job is queued or running are
+    merged into that job. Jobs that write system state are additionally
+    serialized with each other, so two hardening runs never overlap.
+
+    Args:
+        runner (callable): runner(job) executes the job and returns its result.
+        max_jobs (int): Upper bound on jobs executing at the same time.
+    """
+    def __init__(self, runner, max_jobs=DEFAULT_MAX_JOBS,
+                 module_timeout=DEFAULT_MODULE_TIMEOUT, job_timeout=DEFAULT_JOB_TIMEOUT):
+        self.runner = runner
+        self.module_timeout = module_timeout
+        self.job_timeout = job_timeout
+        self.jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="syswarden-job")
+
+    def submit(self, key, params, writes=False):
+        """
+        Queues a job, or returns the active job with the same key.
+
+        Returns:
+            tuple: (job, merged) where merged is True if an existing job was reused.
+        """
+        with self._lock:
+            existing = self._active.get(key)
+            if existing and existing.status in ACTIVE_STATES:
+                return existing, True
+            job = Job(key, params, self.module_timeout, self.job_timeout)
+            self.jobs[job.id] = job
+            self._active[key] = job
+        self._pool.submit(self._execute, job, writes)
+        logger.info(f"Queued job {job.id} for {params}")
+        return job, False
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def list(self):
+        return [job.to_dict() for job in sorted(self.jobs.values(), key=lambda j: j.created, reverse=True)]
+
+    def _execute(self, job, writes):
+        timer = None
+        try:
+            if writes:
+                self._writer_lock.acquire()
+            if job.cancelled:
+                job.status = job.cancel_reason
+                return
+            job.status = RUNNING
+            job.started = time.time()
+            if job.job_timeout:
+                timer = threading.Timer(job.job_timeout, job.cancel, args=(TIMED_OUT,))
+                timer.daemon = True
+                timer.start()
+            job.result = self.runner(job)
+            job.status = job.cancel_reason if job.cancelled else FINISHED
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.status = FAILED
+            job.message = str(e)
+        finally:
+            if timer: timer.cancel()
+            if writes: self._writer_lock.release()
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            logger.info(f"Job {job.id} {job.status}")
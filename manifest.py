@@ -0,0 +1,162 @@
+import heapq
+from functools import lru_cache
+
+# --- 1. Module Declarations ---
+LEVELS = ("L1", "L2", "L3")
+MODES = ("Audit", "Harden", "Rollback")
+
+# Modes in which a module writes shared system state (/etc/fstab,
+# /etc/sysctl.conf, secedit databases, ...) and must therefore run alone.
+WRITER = frozenset({"Harden", "Rollback"})
+READ_ONLY = frozenset()
+
+
+class ModuleSpec:
+    """
+    Everything the orchestrators need to know about one module, declared
+    as data. Native audit checks live in probes.NATIVE_CHECKS and
+    remediation steps in planner.REMEDIATIONS, next to the code that
+    interprets them.
+
+    Args:
+        name (str): The module file name, e.g. "Filesystem.sh".
+        os_type (str): "Linux" or "Windows".
+        level (str): The lowest level that includes the module.
+        writes (frozenset): Modes in which the module changes shared state
+            and must not run beside anything else.
+        depends_on (tuple): Modules that must finish first when they are
+            part of the same run.
+        timeout (float): Seconds after which the module is killed, unless
+            the caller sets its own timeout.
+        facts (dict): Fact families exported to the module (see facts.py);
+            lists select keys or paths, None means the whole family.
+        inputs (list): For modules whose audit output can be replayed by
+            the incremental cache, the inputs it depends on besides its
+            script and the shared runtime. None means never cached.
+    """
+    def __init__(self, name, os_type, level, writes=READ_ONLY, depends_on=(), timeout=None, facts=None, inputs=None):
+        self.name = name
+        self.os_type = os_type
+        self.level = level
+        self.writes = writes
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.facts = facts or {}
+        self.inputs = inputs
+
+    def read_only(self, mode):
+        return mode not in self.writes
+
+    def to_dict(self):
+        return {'name': self.name, 'os_type': self.os_type, 'level': self.level, 'writes': sorted(self.writes),
+                'depends_on': list(self.depends_on), 'timeout': self.timeout, 'facts': self.facts,
+                'inputs': self.inputs}
+
+
+MODULES = [
+    # Linux
+    ModuleSpec("Filesystem.sh", "Linux", "L1", writes=WRITER, timeout=300,
+               facts={"mounts": None, "modules": None, "modprobe": None}),
+    ModuleSpec("PackageManagement.sh", "Linux", "L1", writes=WRITER, timeout=900,
+               facts={"packages": None, "sysctl": ["fs.suid_dumpable"], "files": ["/etc/security/limits.conf"]}),
+    ModuleSpec("AccessControl.sh", "Linux", "L1", writes=WRITER, timeout=120,
+               facts={"file_modes": ["/etc/passwd", "/etc/shadow", "/etc/group", "/etc/gshadow"]}),
+    # The placeholder modules only print a fixed message, so the script is
+    # all their output depends on.
+    ModuleSpec("Services.sh", "Linux", "L2", timeout=120, inputs=[]),
+    ModuleSpec("Network.sh", "Linux", "L2", timeout=120, inputs=[]),
+    ModuleSpec("Firewall.sh", "Linux", "L3", timeout=120, inputs=[]),
+    ModuleSpec("LoggingAndAuditing.sh", "Linux", "L3", timeout=120, inputs=[]),
+    # Windows
+    ModuleSpec("AccountPolicies.ps1", "Windows", "L1", writes=WRITER, timeout=300),
+    ModuleSpec("LocalPolicies.ps1", "Windows", "L1", writes=WRITER, timeout=300),
+    ModuleSpec("SecurityOptions.ps1", "Windows", "L1", writes=WRITER, timeout=300),
+    ModuleSpec("SystemServices.ps1", "Windows", "L2", writes=WRITER, timeout=300),
+    ModuleSpec("WindowsFirewall.ps1", "Windows", "L2", writes=WRITER, timeout=300),
+    ModuleSpec("AdvancedAudit.ps1", "Windows", "L3", writes=WRITER, timeout=300),
+    ModuleSpec("Defender.ps1", "Windows", "L3", writes=WRITER, timeout=900),
+]
+
+MANIFEST = {spec.name: spec for spec in MODULES}
+
+
+def get(module_name):
+    """Returns a module's spec, or None for a module the manifest does not know."""
+    return MANIFEST.get(module_name)
+
+
+# --- 2. Execution Plans ---
+class ExecutionPlan:
+    """
+    The resolved, ordered module list for one (os, level, mode), plus the
+    scheduling properties the engine needs for each module.
+    """
+    def __init__(self, os_type, level, mode, modules):
+        self.os_type = os_type
+        self.level = level
+        self.mode = mode
+        self.modules = tuple(modules)
+        self.exclusive = frozenset(m for m in self.modules if not MANIFEST[m].read_only(mode))
+        self.timeouts = {m: MANIFEST[m].timeout for m in self.modules}
+        self.depends_on = {m: tuple(d for d in MANIFEST[m].depends_on if d in self.modules) for m in self.modules}
+
+    def to_dict(self):
+        return {'os_type': self.os_type, 'level': self.level, 'mode': self.mode, 'modules': list(self.modules),
+                'exclusive': sorted(self.exclusive), 'timeouts': self.timeouts,
+                'depends_on': {m: list(d) for m, d in self.depends_on.items() if d}}
+
+
+def order_modules(names):
+    """
+    Orders modules so every dependency in the set comes first; ties are
+    broken alphabetically, which is also the order with no dependencies.
+
+    Raises:
+        ValueError: If the dependencies form a cycle.
+    """
+    names = set(names)
+    waiting = {n: {d for d in MANIFEST[n].depends_on if d in names} if n in MANIFEST else set() for n in names}
+    ready = [n for n, deps in waiting.items() if not deps]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        name = heapq.heappop(ready)
+        ordered.append(name)
+        for other, deps in waiting.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps:
+                    heapq.heappush(ready, other)
+    if len(ordered) != len(names):
+        raise ValueError(f"Module dependencies form a cycle: {', '.join(sorted(names - set(ordered)))}")
+    return ordered
+
+
+@lru_cache(maxsize=None)
+def execution_plan(os_type, level, mode="Audit"):
+    """
+    Compiles (once per process) the plan for a level. Levels are
+    cumulative, so L2 includes L1 and L3 includes both.
+
+    Raises:
+        ValueError: For an unknown level or mode.
+    """
+    if level not in LEVELS or mode not in MODES:
+        raise ValueError(f"Unknown level or mode: {level}, {mode}")
+    included = LEVELS[:LEVELS.index(level) + 1]
+    return ExecutionPlan(os_type, level, mode,
+                         order_modules(s.name for s in MODULES if s.os_type == os_type and s.level in included))
+
+
+def modules_for(os_type, level, mode="Audit"):
+    """The ordered module names a level runs."""
+    return list(execution_plan(os_type, level, mode).modules)
+
+
+def schedule_for(os_type, mode="Audit"):
+    """
+    The plan the engine schedules any run from. A module's scheduling
+    properties do not depend on the level, so the highest level's plan,
+    which holds every module of the OS, covers any subset of modules.
+    """
+    return execution_plan(os_type, LEVELS[-1], mode)
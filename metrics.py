@@ -0,0 +1,236 @@
+import json
+import time
+import logging
+import platform
+import threading
+from collections import Counter
+
+# --- 1. Metric Definitions ---
+# Spans are logged as one JSON object per line on this logger; the CLI and
+# the web app attach their log handlers to it.
+SPAN_LOGGER = "syswarden.spans"
+
+# Histogram buckets in seconds, from a native probe to a slow remote module.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LOCAL_HOST = platform.node() or "localhost"
+
+span_logger = logging.getLogger(SPAN_LOGGER)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+class CounterMetric:
+    """A monotonically increasing value per label set."""
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield self.name, dict(zip(self.label_names, labels)), value
+
+
+class GaugeMetric(CounterMetric):
+    """The last value set per label set."""
+    kind = "gauge"
+
+    def set(self, labels, value):
+        self.values[labels] = value
+
+
+class HistogramMetric:
+    """Cumulative bucket counts, sum and count per label set."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, labels, value):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self):
+        for labels, (bucket_counts, total, count) in sorted(self.values.items()):
+            base = dict(zip(self.label_names, labels))
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                yield f"{self.name}_bucket", {**base, 'le': repr(bound)}, bucket_count
+            yield f"{self.name}_bucket", {**base, 'le': "+Inf"}, count
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, count
+
+
+class Registry:
+    """
+    The process-wide metric families, rendered in the Prometheus text
+    exposition format by the web app's /metrics route.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.module_runs = CounterMetric("syswarden_module_runs_total", "Module executions.",
+                                         ("module", "mode", "source", "outcome"))
+        self.module_duration = HistogramMetric("syswarden_module_duration_seconds", "Total module runtime.",
+                                               ("module", "mode"))
+        self.module_spawn = HistogramMetric("syswarden_module_spawn_seconds", "Time to start a module process.",
+                                            ("module",))
+        self.module_first_result = HistogramMetric("syswarden_module_first_result_seconds",
+                                                   "Time from start to a module's first parsed result.", ("module", "mode"))
+        self.module_results = CounterMetric("syswarden_module_results_total", "Results emitted, by status.",
+                                            ("module", "status"))
+        self.module_stdout = CounterMetric("syswarden_module_stdout_bytes_total", "Module stdout volume.", ("module",))
+        self.module_stderr = CounterMetric("syswarden_module_stderr_bytes_total", "Module stderr volume.", ("module",))
+        self.module_exit_code = GaugeMetric("syswarden_module_last_exit_code", "Exit code of the last module run.",
+                                            ("module", "mode"))
+        self.runs = CounterMetric("syswarden_runs_total", "Audit, hardening and rollback runs.", ("mode", "level"))
+        self.run_duration = HistogramMetric("syswarden_run_duration_seconds", "Wall time of a whole run.",
+                                            ("mode", "level"))
+        self.reports = CounterMetric("syswarden_reports_total", "Report outputs, rendered or served from cache.",
+                                     ("format", "cached"))
+        self.report_render = HistogramMetric("syswarden_report_render_seconds", "Time spent rendering one report format.",
+                                             ("format",))
+        self.families = [self.module_runs, self.module_duration, self.module_spawn, self.module_first_result,
+                         self.module_results, self.module_stdout, self.module_stderr, self.module_exit_code,
+                         self.runs, self.run_duration, self.reports, self.report_render]
+
+    def observe(self, span):
+        """Folds a finished span into the metric families."""
+        a = span.attributes
+        with self._lock:
+            if span.kind == "module":
+                self.module_runs.inc((a['module'], a['mode'], a['source'], "error" if a.get('error') else "ok"))
+                self.module_duration.observe((a['module'], a['mode']), span.seconds)
+                if a.get('spawn_seconds') is not None:
+                    self.module_spawn.observe((a['module'],), a['spawn_seconds'])
+                if a.get('first_result_seconds') is not None:
+                    self.module_first_result.observe((a['module'], a['mode']), a['first_result_seconds'])
+                for status, count in a.get('results', {}).items():
+                    self.module_results.inc((a['module'], status), count)
+                if a.get('stdout_bytes') is not None:
+                    self.module_stdout.inc((a['module'],), a['stdout_bytes'])
+                    self.module_stderr.inc((a['module'],), a['stderr_bytes'])
+                if a.get('exit_code') is not None:
+                    self.module_exit_code.set((a['module'], a['mode']), a['exit_code'])
+            elif span.kind == "run":
+                self.runs.inc((a['mode'], a['level']))
+                self.run_duration.observe((a['mode'], a['level']), span.seconds)
+            elif span.kind == "report":
+                for report_format, seconds in a.get('render_seconds', {}).items():
+                    self.reports.inc((report_format, "false"))
+                    self.report_render.observe((report_format,), seconds)
+                for report_format in a.get('cached', []):
+                    self.reports.inc((report_format, "true"))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for family in self.families:
+                lines.append(f"# HELP {family.name} {family.help_text}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for name, labels, value in family.samples():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# --- 2. Spans ---
+class Span:
+    """
+    One timed unit of work: a module execution ("module"), a whole run
+    ("run") or a report render ("report"). Finishing a span records it in
+    the registry, logs it as JSON and hands it to every subscriber.
+    """
+    def __init__(self, kind, start=None, **attributes):
+        self.kind = kind
+        self.attributes = attributes
+        self.seconds = None
+        # `start` is a time.perf_counter() reading for work that began earlier.
+        self._start = start if start is not None else time.perf_counter()
+        self.started = time.time() - (time.perf_counter() - self._start)
+
+    def finish(self, **attributes):
+        self.attributes.update(attributes)
+        self.seconds = time.perf_counter() - self._start
+        record(self)
+        return self
+
+    def to_dict(self):
+        return {'span': self.kind, 'started': round(self.started, 3), 'seconds': round(self.seconds, 6),
+                **self.attributes}
+
+
+_subscribers = []
+_subscribers_lock = threading.Lock()
+
+
+def record(span):
+    REGISTRY.observe(span)
+    if span_logger.isEnabledFor(logging.INFO):
+        span_logger.info(json.dumps(span.to_dict(), default=str))
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        callback(span)
+
+
+class SpanCollector:
+    """
+    Gathers every span finished while it is active, from any thread (used
+    by the CLI's --profile table).
+    """
+    def __init__(self):
+        self.spans = []
+
+    def start(self):
+        with _subscribers_lock:
+            _subscribers.append(self.spans.append)
+        return self
+
+    def stop(self):
+        with _subscribers_lock:
+            if self.spans.append in _subscribers:
+                _subscribers.remove(self.spans.append)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def module_span(run, mode, level, host=None):
+    """Records the span of a finished engine.ModuleRun."""
+    return Span("module", start=run.started, module=run.module_name, mode=mode, level=level, host=host or LOCAL_HOST,
+                source=run.source, spawn_seconds=run.spawn_seconds, first_result_seconds=run.first_result_seconds,
+                exit_code=run.exit_code, results=dict(Counter(r.get('status', 'Unknown') for r in run.results)),
+                stdout_bytes=run.stdout_bytes, stderr_bytes=run.stderr_bytes, error=run.error).finish()
+
+
+def attach_log_handler(handler):
+    """Writes span JSON lines through an existing log handler."""
+    span_logger.addHandler(handler)
+    span_logger.setLevel(logging.INFO)
+    span_logger.propagate = False
@@ -0,0 +1,207 @@
+import re
+import difflib
+
+from engine import run_modules, DEFAULT_WORKERS
+from probes import ProbeContext
+
+# --- 1. Remediation Definitions ---
+# Step ids are passed to the modules in this variable (see scripts/linux/lib/steps.sh).
+ONLY_ENV = "SYSWARDEN_ONLY"
+
+KERNEL_MODULES = ["cramfs", "freevxfs", "jffs2", "hfs", "hfsplus", "squashfs", "udf", "usb-storage"]
+MOUNT_OPTIONS = [("/tmp", "nodev"), ("/tmp", "nosuid"), ("/tmp", "noexec"), ("/dev/shm", "nodev"),
+                 ("/dev/shm", "nosuid"), ("/dev/shm", "noexec"), ("/home", "nodev")]
+FILE_MODES = {"/etc/passwd": "644", "/etc/shadow": "600", "/etc/group": "644", "/etc/gshadow": "600"}
+
+
+class Remediation:
+    """
+    The hardening step that fixes one audit check.
+
+    Args:
+        step (str): The step id the module recognizes in SYSWARDEN_ONLY.
+        action (str): What the step does, in words.
+        edits (callable): edits(ctx) returns {path: new_text} for the file
+            changes the step would make, used to render the dry-run diff.
+    """
+    def __init__(self, step, action, edits=None):
+        self.step = step
+        self.action = action
+        self.edits = edits
+
+
+def _fstab_add_option(text, mount_point, option):
+    """Mirrors fstab_add_option in Filesystem.sh, including its field re-joining."""
+    lines = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) >= 4 and not fields[0].startswith('#') and fields[1] == mount_point \
+                and option not in fields[3].split(','):
+            fields[3] += f",{option}"
+            line = ' '.join(fields)
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _append_line(text, line):
+    return text + ('' if not text or text.endswith('\n') else '\n') + line + '\n'
+
+
+def _core_dump_edits(ctx):
+    edits = {}
+    limits = ctx.read_text('/etc/security/limits.conf') or ''
+    if not re.search(r'^\s*\*\s+hard\s+core\s+0', limits, re.MULTILINE):
+        edits['/etc/security/limits.conf'] = _append_line(limits, '* hard core 0')
+    sysctl_conf = ctx.read_text('/etc/sysctl.conf') or ''
+    if not re.search(r'^\s*fs\.suid_dumpable\s*=\s*0\s*$', sysctl_conf, re.MULTILINE):
+        if re.search(r'^\s*fs\.suid_dumpable\s*=', sysctl_conf, re.MULTILINE):
+            edits['/etc/sysctl.conf'] = re.sub(r'^\s*fs\.suid_dumpable\s*=.*$', 'fs.suid_dumpable = 0',
+                                               sysctl_conf, flags=re.MULTILINE)
+        else:
+            edits['/etc/sysctl.conf'] = _append_line(sysctl_conf, 'fs.suid_dumpable = 0')
+    return edits
+
+
+def _kernel_module_remediation(module):
+    path = f"/etc/modprobe.d/{module}.conf"
+    return Remediation(f"module:{module}", f"Blacklist {module} in {path}",
+                       lambda ctx: {path: f"install {module} /bin/true\nblacklist {module}\n"})
+
+
+def _mount_option_remediation(mount_point, option):
+    return Remediation(f"mount:{mount_point}:{option}", f"Add '{option}' to the {mount_point} entry in /etc/fstab",
+                       lambda ctx: {'/etc/fstab': _fstab_add_option(ctx.read_text('/etc/fstab') or '', mount_point, option)})
+
+
+# Audit parameter -> remediation, per module. Parameters match the audit output.
+REMEDIATIONS = {
+    "Filesystem.sh": {
+        **{f"Kernel Module: {m}": _kernel_module_remediation(m) for m in KERNEL_MODULES},
+        **{f"Mount Option: {o} on {mp}": _mount_option_remediation(mp, o) for mp, o in MOUNT_OPTIONS},
+    },
+    "AccessControl.sh": {
+        f"{path} permissions": Remediation(f"mode:{path}", f"chmod {mode} {path}") for path, mode in FILE_MODES.items()
+    },
+    "PackageManagement.sh": {
+        "Package: prelink": Remediation("package:prelink", "Purge the prelink package"),
+        "Process: Core Dumps": Remediation("coredumps", "Restrict core dumps (limits.conf, fs.suid_dumpable)",
+                                           _core_dump_edits),
+    },
+}
+
+
+# --- 2. Plans ---
+class PlanItem:
+    """One failing check and the step planned to fix it."""
+    def __init__(self, module_name, parameter, details, remediation=None):
+        self.module_name = module_name
+        self.parameter = parameter
+        self.details = details
+        self.remediation = remediation
+
+    def to_dict(self):
+        return {'module': self.module_name, 'parameter': self.parameter, 'details': self.details,
+                'step': self.remediation.step if self.remediation else None,
+                'action': self.remediation.action if self.remediation else "Run the whole module (no targeted step)"}
+
+
+class HardenPlan:
+    """
+    The compliance delta of an audit, turned into the hardening work that
+    closes it: which modules run, and which of their steps. Modules whose
+    audit failed are not planned; `not_planned` maps them to the error.
+    """
+    def __init__(self, level, modules, items, root="/", not_planned=None):
+        self.level = level
+        self.items = items
+        self.root = root
+        self.not_planned = dict(not_planned or {})
+        failing = {item.module_name for item in items}
+        # Keep the level's module order; modules without failures are skipped.
+        self.modules = [m for m in modules if m in failing]
+
+    def steps_for(self, module_name):
+        """Step ids for a module, or None if it must run untargeted."""
+        items = [item for item in self.items if item.module_name == module_name]
+        if any(item.remediation is None for item in items):
+            return None
+        return list(dict.fromkeys(item.remediation.step for item in items))
+
+    def env_overrides(self):
+        """Per-module environment that restricts each module to its planned steps."""
+        overrides = {}
+        for module_name in self.modules:
+            steps = self.steps_for(module_name)
+            if steps is not None:
+                overrides[module_name] = {ONLY_ENV: ','.join(steps)}
+        return overrides
+
+    def diff(self):
+        """A unified diff of every file the plan would change, computed without touching them."""
+        ctx = ProbeContext(self.root)
+        original, proposed = {}, {}
+        for item in self.items:
+            if item.remediation is None or item.remediation.edits is None:
+                continue
+            # Each edit sees the files as the earlier steps left them, as the module would.
+            for path, text in item.remediation.edits(_OverlayContext(ctx, proposed)).items():
+                original.setdefault(path, ctx.read_text(path) or '')
+                proposed[path] = text
+        chunks = []
+        for path in sorted(original):
+            if proposed[path] != original[path]:
+                chunks.extend(difflib.unified_diff(original[path].splitlines(True), proposed[path].splitlines(True),
+                                                   fromfile=path if original[path] else '/dev/null', tofile=path))
+        return ''.join(chunks)
+
+    def to_dict(self):
+        return {'level': self.level, 'modules': self.modules, 'items': [item.to_dict() for item in self.items],
+                'not_planned': [{'module': module_name, 'reason': reason}
+                                for module_name, reason in self.not_planned.items()],
+                'diff': self.diff()}
+
+
+class _OverlayContext:
+    """A ProbeContext view where some files already hold their planned content."""
+    def __init__(self, ctx, files):
+        self.ctx = ctx
+        self.files = files
+
+    def read_text(self, path):
+        return self.files[path] if path in self.files else self.ctx.read_text(path)
+
+
+def build_plan(level, modules, results_by_module, root="/", errors=None):
+    """
+    Builds a plan from audit results grouped by module. Every Not Compliant
+    result becomes an item; results without a known remediation make their
+    module run untargeted. Modules in `errors` ({module: message}) were not
+    fully audited, so none of their results are planned.
+    """
+    errors = errors or {}
+    items = []
+    for module_name in modules:
+        if module_name in errors:
+            continue
+        known = REMEDIATIONS.get(module_name, {})
+        for data in results_by_module.get(module_name, []):
+            if data.get('status') == 'Not Compliant':
+                items.append(PlanItem(module_name, data.get('parameter', 'Unknown Policy'), data.get('details', ''),
+                                      known.get(data.get('parameter'))))
+    return HardenPlan(level, modules, items, root,
+                      not_planned={m: errors[m] for m in modules if m in errors})
+
+
+# --- 3. Planning ---
+def plan_harden(os_type, modules, level, max_workers=DEFAULT_WORKERS, full=False, **kwargs):
+    """
+    Audits the modules (answering unchanged checks from the audit cache
+    unless `full`) and returns the HardenPlan for their failures. Modules
+    whose audit failed are listed in the plan's `not_planned`.
+    """
+    results_by_module, errors = {}, {}
+    run_modules(os_type, modules, "Audit", level, max_workers=max_workers, incremental=True, full=full,
+                on_result=lambda module_name, data: results_by_module.setdefault(module_name, []).append(data),
+                on_error=lambda module_name, message: errors.setdefault(module_name, message),
+                **kwargs)
+    return build_plan(level, modules, results_by_module, errors=errors)
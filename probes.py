@@ -0,0 +1,302 @@
+import os
+import re
+import glob
+import threading
+
+# --- 1. Check Declarations ---
+class Check:
+    """
+    A read-only compliance check declared as data.
+
+    Args:
+        parameter (str): The parameter name reported to the UI and PDF.
+        kind (str): The probe used to read the actual value (see PROBES).
+        target: What the probe inspects (module name, path, sysctl key, ...).
+        expected: The value the actual state is compared against.
+        compare (str): One of the COMPARATORS (e.g. "eq", "contains").
+        compliant (str|dict): Details text when the check passes.
+        not_compliant (str|dict): Details text when it fails. A dict selects
+            the text by actual value, falling back to its "*" entry.
+    """
+    def __init__(self, parameter, kind, target, expected, compare="eq", compliant="", not_compliant=""):
+        self.parameter = parameter
+        self.kind = kind
+        self.target = target
+        self.expected = expected
+        self.compare = compare
+        self.compliant = compliant
+        self.not_compliant = not_compliant
+
+    def details(self, actual, ok):
+        template = self.compliant if ok else self.not_compliant
+        if isinstance(template, dict):
+            template = template.get(actual, template.get("*", ""))
+        return template.format(actual=actual, expected=self.expected, target=self.target)
+
+
+COMPARATORS = {
+    "eq": lambda actual, expected: actual == expected,
+    "ne": lambda actual, expected: actual != expected,
+    "contains": lambda actual, expected: expected in actual,
+    "in": lambda actual, expected: actual in expected,
+    "matches": lambda actual, expected: re.search(expected, actual or "", re.MULTILINE) is not None,
+}
+
+
+# --- 2. Probe Context ---
+class ProbeContext:
+    """
+    Reads system state straight from /proc, /etc and the package database.
+
+    Each source is parsed at most once per context, so a whole audit pass
+    shares one read of /proc/mounts, /proc/modules, modprobe.d and dpkg's
+    status file. `root` lets the same checks run against a mounted image
+    or a fake sysroot.
+    """
+    MODPROBE_DIRS = ["etc/modprobe.d", "run/modprobe.d", "usr/local/lib/modprobe.d",
+                     "lib/modprobe.d", "usr/lib/modprobe.d"]
+
+    def __init__(self, root="/"):
+        self.root = root
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def path(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def read_text(self, path):
+        try:
+            with open(self.path(path), encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _cached(self, key, loader):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = loader()
+            return self._cache[key]
+
+    def loaded_modules(self):
+        def load():
+            text = self.read_text("/proc/modules") or ""
+            return {line.split()[0] for line in text.splitlines() if line.strip()}
+        return self._cached("modules", load)
+
+    def modprobe_installs(self):
+        """Maps module name to its `install` command from modprobe.d (first file wins, as in kmod)."""
+        def load():
+            files = {}
+            for directory in self.MODPROBE_DIRS:
+                for conf in glob.glob(os.path.join(self.path(directory), "*.conf")):
+                    files.setdefault(os.path.basename(conf), conf)
+            installs = {}
+            for name in sorted(files):
+                try:
+                    with open(files[name], encoding="utf-8", errors="replace") as f:
+                        lines = f.read().splitlines()
+                except OSError:
+                    continue
+                for line in lines:
+                    fields = line.split()
+                    if len(fields) >= 3 and fields[0] == "install":
+                        installs.setdefault(_module_key(fields[1]), " ".join(fields[2:]))
+            return installs
+        return self._cached("modprobe", load)
+
+    def mounts(self):
+        """Maps each mount point to its option list; the last (topmost) mount wins."""
+        def load():
+            table = {}
+            text = self.read_text("/proc/mounts") or ""
+            for line in text.splitlines():
+                fields = line.split()
+                if len(fields) >= 4:
+                    table[fields[1]] = fields[3].split(",")
+            return table
+        return self._cached("mounts", load)
+
+    def packages(self):
+        """Maps package names to their dpkg status line."""
+        def load():
+            status = {}
+            text = self.read_text("/var/lib/dpkg/status") or ""
+            for stanza in text.split("\n\n"):
+                name = state = None
+                for line in stanza.splitlines():
+                    if line.startswith("Package:"):
+                        name = line.split(":", 1)[1].strip()
+                    elif line.startswith("Status:"):
+                        state = line.split(":", 1)[1].strip()
+                if name:
+                    status[name] = state or ""
+            return status
+        return self._cached("packages", load)
+
+    def sysctl(self, key):
+        def load():
+            value = self.read_text("/proc/sys/" + key.replace(".", "/"))
+            return value.strip() if value is not None else None
+        return self._cached(("sysctl", key), load)
+
+    def file_mode(self, path):
+        """Octal permission bits as `stat -c %a` prints them, or "" if the file is missing."""
+        def load():
+            try:
+                return format(os.stat(self.path(path)).st_mode & 0o7777, "o")
+            except OSError:
+                return ""
+        return self._cached(("file_mode", path), load)
+
+
+def _module_key(name):
+    # The kernel reports usb-storage as usb_storage; kmod treats both spellings alike.
+    return name.replace("-", "_")
+
+
+# --- 3. Probes ---
+# Each probe returns the actual value of the state a check inspects.
+def probe_kernel_module(ctx, check):
+    """
+    "loaded", "disabled" or "available". An `install <module> /bin/false`
+    counts as disabled, like `/bin/true`: both keep modprobe from loading
+    the module. (Filesystem.sh originally grepped `modprobe -n -v` for
+    "install /bin/true" only; its facts_module_install check now accepts
+    both, as here.)
+    """
+    name = _module_key(check.target)
+    if name in ctx.loaded_modules():
+        return "loaded"
+    if ctx.modprobe_installs().get(name, "") in ("/bin/true", "/bin/false"):
+        return "disabled"
+    return "available"
+
+
+def probe_mount_options(ctx, check):
+    """
+    The option list of the mount point, compared option by option: "exec"
+    is not satisfied by "noexec" and a filesystem type or device name that
+    happens to contain the option does not count. (Filesystem.sh originally
+    grepped the whole `mount` line for the option as a substring; its
+    check_mount_option now matches whole options, as here.)
+    """
+    return ctx.mounts().get(check.target, [])
+
+
+def probe_file_mode(ctx, check):
+    return ctx.file_mode(check.target)
+
+
+def probe_sysctl(ctx, check):
+    return ctx.sysctl(check.target)
+
+
+def probe_package(ctx, check):
+    state = ctx.packages().get(check.target, "")
+    return "installed" if state.endswith("ok installed") else "not installed"
+
+
+def probe_file_text(ctx, check):
+    return ctx.read_text(check.target) or ""
+
+
+def probe_all(ctx, check):
+    """Composite probe: passes only when every sub-check in `target` passes."""
+    return all(evaluate_check(ctx, sub)[0] for sub in check.target)
+
+
+PROBES = {
+    "kernel_module": probe_kernel_module,
+    "mount_option": probe_mount_options,
+    "file_mode": probe_file_mode,
+    "sysctl": probe_sysctl,
+    "package": probe_package,
+    "file_text": probe_file_text,
+    "all": probe_all,
+}
+
+
+# --- 4. Evaluation ---
+def evaluate_check(ctx, check):
+    """Returns (passed, actual) for one check."""
+    actual = PROBES[check.kind](ctx, check)
+    return COMPARATORS[check.compare](actual, check.expected), actual
+
+
+def evaluate(checks, ctx=None, on_result=None):
+    """
+    Evaluates a list of checks in one pass over a shared ProbeContext.
+
+    Returns:
+        list: `{parameter, status, details}` records, the same shape the
+        shell modules print.
+    """
+    ctx = ctx or ProbeContext()
+    results = []
+    for check in checks:
+        ok, actual = evaluate_check(ctx, check)
+        data = {"parameter": check.parameter,
+                "status": "Compliant" if ok else "Not Compliant",
+                "details": check.details(actual, ok)}
+        results.append(data)
+        if on_result: on_result(data)
+    return results
+
+
+# --- 5. Native Audit Definitions ---
+# Audit-mode checks of the Linux modules that can be answered in-process.
+# Parameters and details mirror the shell modules word for word.
+def _kernel_module_check(module):
+    return Check(f"Kernel Module: {module}", "kernel_module", module, "disabled",
+                 compliant="Module is properly disabled",
+                 not_compliant={"loaded": "Module is currently loaded", "*": "Module is available to be loaded"})
+
+
+def _mount_option_check(mount_point, option):
+    return Check(f"Mount Option: {option} on {mount_point}", "mount_option", mount_point, option,
+                 compare="contains", compliant="Option is set", not_compliant="Option is not set")
+
+
+def _file_mode_check(path, mode):
+    return Check(f"{path} permissions", "file_mode", path, mode,
+                 compliant="Permissions set correctly to {expected}",
+                 not_compliant="Current: {actual}, Expected: {expected}")
+
+
+NATIVE_CHECKS = {
+    "Filesystem.sh": [
+        *[_kernel_module_check(m) for m in ["cramfs", "freevxfs", "jffs2", "hfs", "hfsplus", "squashfs", "udf", "usb-storage"]],
+        _mount_option_check("/tmp", "nodev"),
+        _mount_option_check("/tmp", "nosuid"),
+        _mount_option_check("/tmp", "noexec"),
+        _mount_option_check("/dev/shm", "nodev"),
+        _mount_option_check("/dev/shm", "nosuid"),
+        _mount_option_check("/dev/shm", "noexec"),
+        _mount_option_check("/home", "nodev"),
+    ],
+    "AccessControl.sh": [
+        _file_mode_check("/etc/passwd", "644"),
+        _file_mode_check("/etc/shadow", "600"),
+        _file_mode_check("/etc/group", "644"),
+        _file_mode_check("/etc/gshadow", "600"),
+    ],
+    "PackageManagement.sh": [
+        Check("Package: prelink", "package", "prelink", "not installed",
+              compliant="Package is not installed.",
+              not_compliant="Package 'prelink' is installed and should be removed."),
+        Check("Process: Core Dumps", "all", [
+                  Check("Core dumps: limits.conf", "file_text", "/etc/security/limits.conf",
+                        r"^\s*\*\s+hard\s+core\s+0", compare="matches"),
+                  Check("Core dumps: fs.suid_dumpable", "sysctl", "fs.suid_dumpable", "0"),
+              ], True,
+              compliant="Core dumps are properly restricted.",
+              not_compliant="Core dump configuration is not fully restrictive."),
+    ],
+}
+
+
+def native_checks_for(os_type, module_name, mode):
+    """Returns the native checks that replace a module run, or None if it must be forked."""
+    if os_type != "Linux" or mode != "Audit":
+        return None
+    return NATIVE_CHECKS.get(module_name)
@@ -1,6 +1,44 @@
 from fpdf import FPDF
 import datetime
+import hashlib
+import html
+import json
+import csv
 import os
+import shutil
+import time
+import threading
+import metrics
+from results import ResultSet, compliance_percent, rank_failing, TOP_FAILING
+
+# --- 1. Report Definitions ---
+REPORTS_DIR = 'reports'
+FORMATS = ('pdf', 'json', 'csv', 'html')
+
+# Findings are handed to the writers in chunks of this many results.
+CHUNK_SIZE = 200
+# Findings per page of the paginated HTML report.
+HTML_PAGE_SIZE = 500
+
+# Rendered reports are indexed by a hash of the result set, level and OS.
+CACHE_INDEX = os.path.join(REPORTS_DIR, '.report_cache.json')
+CACHE_MAX_ENTRIES = 100
+
+# The fields that identify a finding; run-specific metadata (seq, cached) is ignored.
+RESULT_FIELDS = ('parameter', 'status', 'details', 'host')
+
+STATUS_COLORS = {'Compliant': (220, 255, 220), 'Not Compliant': (255, 220, 220)}
+
+# The total page count replaces this alias when the PDF is written; fpdf
+# reserves one digit per character of the alias (the default "{nb}" only
+# three), so this one leaves room for up to 9,999,999 pages.
+PAGE_COUNT_ALIAS = '{pages}'
+
+# Height (mm) reserved for the executive summary: the title and the five
+# table rows, then the "Most Frequent Failures" heading and one line per
+# listed check.
+SUMMARY_HEIGHT = 10 + 5 * 10 + 5 + 8 + TOP_FAILING * 6
+
 
 class PDF(FPDF):
     """
@@ -24,108 +62,478 @@ class PDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.set_text_color(128) # Gray text
         # Add a page number with total pages
-        self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
+        self.cell(0, 10, f'Page {self.page_no()}/{PAGE_COUNT_ALIAS}', 0, 0, 'C')
+
+
+# --- 2. Report Writers ---
+# Every writer receives the findings chunk by chunk through write() and
+# finishes its file in close(), once the final counts are known.
+class PdfWriter:
+    """
+    Renders the PDF report incrementally. The executive summary needs the
+    final counts, so its space is reserved on the first page, below the
+    scan details, and it is drawn there when the document is written out;
+    the findings follow it on the same page.
+    """
+    def __init__(self, path, os_type, level, generated):
+        self.path = path
+        self.counts = None
+        self.pdf = PDF()
+        self.pdf.alias_nb_pages(PAGE_COUNT_ALIAS)
+        self.pdf.add_page()
+
+        # --- Report Header Section ---
+        pdf = self.pdf
+        pdf.set_font('Arial', 'B', 14)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 10, "1. Scan Details", 0, 1)
+        pdf.set_font('Arial', '', 11)
+        pdf.cell(0, 7, f"   - Operating System: {os_type}", 0, 1)
+        pdf.cell(0, 7, f"   - Compliance Level Audited: {level}", 0, 1)
+        pdf.cell(0, 7, f"   - Report Generated: {generated}", 0, 1)
+        pdf.ln(10)
+        # The summary is filled in on output; findings start below its space.
+        if pdf.get_y() + SUMMARY_HEIGHT > pdf.page_break_trigger:
+            pdf.add_page()
+        self.summary_page, self.summary_y = pdf.page, pdf.get_y()
+        pdf.set_y(self.summary_y + SUMMARY_HEIGHT)
+
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, "3. Detailed Compliance Findings", 0, 1)
+        pdf.set_draw_color(200, 200, 200) # Border color for cards
+
+    def _render_summary(self, pdf):
+        # --- Executive Summary Section ---
+        pdf.set_font('Arial', 'B', 14)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 10, "2. Executive Summary", 0, 1)
+
+        # Draw a clean summary table
+        pdf.set_font('Arial', 'B', 11)
+        pdf.set_draw_color(0, 0, 0)
+        pdf.set_fill_color(240, 240, 240) # Header gray
+        col_width = (pdf.w - pdf.l_margin - pdf.r_margin) / 2
+        pdf.cell(col_width, 10, "Metric", 1, 0, 'C', True)
+        pdf.cell(col_width, 10, "Result", 1, 1, 'C', True)
+
+        pdf.set_font('Arial', '', 11)
+        pdf.cell(col_width, 10, "Total Policies Checked", 1, 0, 'L')
+        pdf.cell(col_width, 10, str(self.counts['total']), 1, 1, 'C')
+
+        pdf.set_fill_color(220, 255, 220) # Light Green
+        pdf.cell(col_width, 10, "Compliant Policies", 1, 0, 'L', True)
+        pdf.cell(col_width, 10, str(self.counts['compliant']), 1, 1, 'C', True)
+
+        pdf.set_fill_color(255, 220, 220) # Light Red
+        pdf.cell(col_width, 10, "Non-Compliant Policies", 1, 0, 'L', True)
+        pdf.cell(col_width, 10, str(self.counts['not_compliant']), 1, 1, 'C', True)
+
+        pdf.cell(col_width, 10, "Compliance Rate", 1, 0, 'L')
+        pdf.cell(col_width, 10, _percent(self.counts['percent']), 1, 1, 'C')
+
+        if self.counts['top_failing']:
+            pdf.ln(5)
+            pdf.set_font('Arial', 'B', 11)
+            pdf.cell(0, 8, "Most Frequent Failures", 0, 1)
+            pdf.set_font('Arial', '', 10)
+            # One line per check, so the list fits the reserved space.
+            width = pdf.w - pdf.l_margin - pdf.r_margin
+            for parameter, count in self.counts['top_failing'][:TOP_FAILING]:
+                suffix, text = f" ({count})", f"   - {parameter}"
+                while len(text) > 8 and pdf.get_string_width(text + suffix) > width:
+                    text = text[:-4] + "..."
+                pdf.cell(0, 6, text + suffix, 0, 1, 'L')
+
+    def write(self, chunk):
+        pdf = self.pdf
+        for result in chunk:
+            status = result.get('status', 'Error')
+            parameter = result.get('parameter', 'Unknown Policy')
+            details = result.get('details', 'No details were provided.')
+
+            # Draw a "card" for each finding: a wrapped title, a one-line
+            # status and the wrapped details.
+            pdf.set_fill_color(*STATUS_COLORS.get(status, (240, 240, 240)))
+            pdf.set_font('Arial', 'B', 11)
+            pdf.multi_cell(0, 8, f"  {parameter}", 1, 'L', True, new_x="LMARGIN", new_y="NEXT")
+
+            pdf.set_font('Arial', '', 10)
+            pdf.cell(10, 6, '', 'L', 0) # Left padding
+            pdf.cell(25, 6, 'Status:', 0, 0)
+            pdf.cell(0, 6, f"{status}", 'R', 1, 'L')
+
+            pdf.cell(10, 6, '', 'L', 0) # Left padding
+            pdf.cell(25, 6, 'Details:', 0, 0)
+            pdf.multi_cell(0, 6, f"{details}", 'R', 'L', new_x="LMARGIN", new_y="NEXT")
+
+            # Draw the bottom border of the card
+            pdf.cell(0, 0, '', 'T', 1)
+            pdf.ln(5)
+
+    def close(self, counts):
+        self.counts = counts
+        pdf = self.pdf
+        # Draw the summary into the space reserved on its page, then return
+        # to the last page so its footer is finished there.
+        last_page, last_y = pdf.page, pdf.get_y()
+        auto_page_break, margin = pdf.auto_page_break, pdf.b_margin
+        pdf.set_auto_page_break(False)
+        pdf.page = self.summary_page
+        pdf.set_xy(pdf.l_margin, self.summary_y)
+        self._render_summary(pdf)
+        pdf.page = last_page
+        pdf.set_xy(pdf.l_margin, last_y)
+        pdf.set_auto_page_break(auto_page_break, margin)
+        pdf.output(self.path)
+
+    def discard(self):
+        # Nothing reaches the disk before close().
+        self.pdf = None
+
+
+class JsonWriter:
+    """Streams findings into a JSON document with the summary at the end."""
+    def __init__(self, path, os_type, level, generated):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(json.dumps({'os_type': os_type, 'level': level, 'generated': generated})[:-1] + ', "results": [')
+        self.first = True
+
+    def write(self, chunk):
+        for result in chunk:
+            self.file.write(('\n  ' if self.first else ',\n  ') + json.dumps(_finding(result)))
+            self.first = False
+
+    def close(self, counts):
+        self.file.write(f'\n], "summary": {json.dumps(counts)}}}\n')
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class CsvWriter:
+    """Streams one CSV row per finding."""
+    def __init__(self, path, os_type, level, generated):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(RESULT_FIELDS)
+
+    def write(self, chunk):
+        self.writer.writerows([_finding(result).get(field, '') for field in RESULT_FIELDS] for result in chunk)
+
+    def close(self, counts):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class HtmlWriter:
+    """
+    Writes a paginated HTML report: a directory holding index.html (scan
+    details, summary and page links) and page-NNNN.html files of
+    HTML_PAGE_SIZE findings each, so browsers never load one huge table.
+    """
+    def __init__(self, path, os_type, level, generated, page_size=HTML_PAGE_SIZE):
+        self.path = os.path.join(path, 'index.html')
+        self.directory = path
+        self.details = {'Operating System': os_type, 'Compliance Level Audited': level, 'Report Generated': generated}
+        self.page_size = page_size
+        self.pages = 0
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, chunk):
+        for result in chunk:
+            finding = _finding(result)
+            css = 'ok' if finding['status'] == 'Compliant' else 'fail' if finding['status'] == 'Not Compliant' else 'info'
+            self.rows.append(f'<tr class="{css}"><td>{html.escape(finding["parameter"])}</td>'
+                             f'<td>{html.escape(finding["status"])}</td><td>{html.escape(finding["details"])}</td></tr>')
+            if len(self.rows) >= self.page_size:
+                self._flush_page()
+
+    def _flush_page(self):
+        self.pages += 1
+        with open(os.path.join(self.directory, f'page-{self.pages:04d}.html'), 'w', encoding='utf-8') as f:
+            f.write(_html_document(f'Findings, page {self.pages}',
+                                   '<p><a href="index.html">Back to summary</a></p>'
+                                   '<table><tr><th>Policy</th><th>Status</th><th>Details</th></tr>'
+                                   + '\n'.join(self.rows) + '</table>'))
+        self.rows = []
+
+    def close(self, counts):
+        if self.rows:
+            self._flush_page()
+        details = ''.join(f'<li>{html.escape(k)}: {html.escape(str(v))}</li>' for k, v in self.details.items())
+        links = ''.join(f'<li><a href="page-{n:04d}.html">Page {n}</a></li>' for n in range(1, self.pages + 1))
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(_html_document('SysWarden Security Compliance Report',
+                                   f'<h2>1. Scan Details</h2><ul>{details}</ul>'
+                                   f'<h2>2. Executive Summary</h2><table>'
+                                   f'<tr><td>Total Policies Checked</td><td>{counts["total"]}</td></tr>'
+                                   f'<tr class="ok"><td>Compliant Policies</td><td>{counts["compliant"]}</td></tr>'
+                                   f'<tr class="fail"><td>Non-Compliant Policies</td><td>{counts["not_compliant"]}</td></tr>'
+                                   f'<tr><td>Compliance Rate</td><td>{_percent(counts["percent"])}</td></tr></table>'
+                                   f'<h2>3. Detailed Compliance Findings</h2><ul>{links}</ul>'))
+
+    def discard(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+WRITERS = {'pdf': PdfWriter, 'json': JsonWriter, 'csv': CsvWriter, 'html': HtmlWriter}
+EXTENSIONS = {'pdf': '.pdf', 'json': '.json', 'csv': '.csv', 'html': '_html'}
+
+
+def _finding(result):
+    finding = {'parameter': str(result.get('parameter', 'Unknown Policy')), 'status': str(result.get('status', 'Error')),
+               'details': str(result.get('details', 'No details were provided.'))}
+    if result.get('host'):
+        finding['host'] = str(result['host'])
+    return finding
+
+
+def _percent(percent):
+    return 'n/a' if percent is None else f"{percent}%"
+
+
+def _html_document(title, body):
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title><style>'
+            'body{font-family:Arial,sans-serif;margin:2em;color:#222b45}'
+            'table{border-collapse:collapse;width:100%}td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}'
+            'tr.ok{background:#dcffdc}tr.fail{background:#ffdcdc}tr.info{background:#f0f0f0}'
+            f'</style></head><body><h1>{html.escape(title)}</h1>{body}</body></html>\n')
+
+
+# --- 3. The Report Pipeline ---
+class ReportPipeline:
+    """
+    Renders every requested format in a single pass over the results.
+
+    Results are fed one at a time (for example straight from a run's result
+    callback) and handed to each writer in chunks of `chunk_size`, so the
+    JSON, CSV and HTML outputs are written to disk as the results arrive.
+    The same pass hashes the result set together with its OS and level
+    (only the fields that appear in a report, so two audits with identical
+    findings share one key); once it is complete, formats already in the
+    report cache under that key are discarded and the cached files are
+    returned instead (listed in `cached`).
+
+    Args:
+        os_type (str): The operating system the audit was run on.
+        level (str): The hardening level that was audited.
+        formats (iterable): Any of FORMATS.
+        chunk_size (int): Results buffered before the writers are called.
+        summary (results.Summary): The summary of a result set that is
+            already held in memory; without one, the pipeline tallies the
+            results as they are fed.
+    """
+    def __init__(self, os_type, level, formats=('pdf',), chunk_size=CHUNK_SIZE, summary=None):
+        unknown = [f for f in formats if f not in WRITERS]
+        if unknown:
+            raise ValueError(f"Unknown report format(s): {', '.join(unknown)}")
+        if not os.path.exists(REPORTS_DIR):
+            os.makedirs(REPORTS_DIR)
+        self.os_type = os_type
+        self.level = level
+        self.chunk_size = chunk_size
+        self.summary = summary
+        self.counts = {'total': 0, 'compliant': 0, 'not_compliant': 0}
+        self.failing = {}
+        self.hosts = set()
+        self.digest = hashlib.sha256(f"{os_type}\0{level}\n".encode('utf-8'))
+        self.cached = []
+        self._chunk = []
+        now = datetime.datetime.now(datetime.timezone.utc)
+        generated = now.strftime('%Y-%m-%d %H:%M:%S UTC')
+        base = os.path.join(REPORTS_DIR, f"SysWarden_Report_{os_type}_{now.astimezone().strftime('%Y%m%d_%H%M%S')}_{os.urandom(3).hex()}")
+        self.writers = {f: WRITERS[f](base + EXTENSIONS[f], os_type, level, generated) for f in dict.fromkeys(formats)}
+        # Time spent inside each writer, reported as its render time.
+        self.render_seconds = dict.fromkeys(self.writers, 0.0)
+
+    def feed(self, result):
+        finding = _finding(result)
+        self.digest.update(json.dumps(finding, sort_keys=True).encode('utf-8') + b'\n')
+        if self.summary is None:
+            self.counts['total'] += 1
+            self.hosts.add(finding.get('host'))
+            if finding['status'] == 'Compliant':
+                self.counts['compliant'] += 1
+            elif finding['status'] == 'Not Compliant':
+                self.counts['not_compliant'] += 1
+                self.failing[finding['parameter']] = self.failing.get(finding['parameter'], 0) + 1
+        self._chunk.append(result)
+        if len(self._chunk) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        for name, writer in self.writers.items():
+            start = time.perf_counter()
+            writer.write(self._chunk)
+            self.render_seconds[name] += time.perf_counter() - start
+        self._chunk = []
+
+    def close(self):
+        """
+        Finishes every output that is not already cached for this result set
+        and records it in the report cache.
+
+        Returns:
+            dict: Format name to output path.
+        """
+        self._flush()
+        if self.summary is not None:
+            self.counts = self.summary.counts()
+            top_failing = self.summary.top_failing()
+        else:
+            top_failing = rank_failing(self.failing, len(self.hosts - {None}) > 1)
+        self.counts.update(percent=compliance_percent(self.counts['compliant'], self.counts['not_compliant']),
+                           top_failing=[[parameter, count] for parameter, count in top_failing])
+        key = self.digest.hexdigest()
+        cached = _cache_lookup(key, self.writers)
+        paths = {}
+        for name, writer in self.writers.items():
+            if name in cached:
+                writer.discard()
+                continue
+            start = time.perf_counter()
+            writer.close(dict(self.counts))
+            self.render_seconds[name] += time.perf_counter() - start
+            paths[name] = writer.path
+        if paths:
+            _cache_store(key, paths)
+        self.cached = list(cached)
+        return {**paths, **cached}
+
+
+# --- 4. The Report Cache ---
+_cache_lock = threading.Lock()
+
+
+def _cache_load():
+    try:
+        with open(CACHE_INDEX, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _cache_lookup(key, formats):
+    """Returns the cached path of every requested format that still exists on disk."""
+    with _cache_lock:
+        entry = _cache_load().get(key, {})
+    return {f: entry[f] for f in formats if f in entry and os.path.exists(entry[f])}
+
+
+def _cache_store(key, paths):
+    with _cache_lock:
+        index = _cache_load()
+        entry = index.pop(key, {})
+        entry.update(paths)
+        index[key] = entry
+        # Entries are kept in insertion order; the oldest are forgotten first.
+        for old in list(index)[:-CACHE_MAX_ENTRIES]:
+            del index[old]
+        temp_path = f"{CACHE_INDEX}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, CACHE_INDEX)
+
+
+def generate_reports(audit_results, os_type, level, formats=('pdf',)):
+    """
+    Generates reports in one or more formats from an audit result set.
+
+    Every format is rendered and the result set hashed in a single
+    streaming pass; formats already rendered for an identical result set,
+    OS and level are then returned from the cache instead.
+
+    Args:
+        audit_results (ResultSet, iterable or callable): Result
+            dictionaries, or a callable returning an iterator over them
+            (lets large sets be streamed from storage instead of held in
+            memory). Results held in memory are summarized from a
+            ResultSet's columns rather than tallied while rendering.
+        os_type (str): The operating system the audit was run on.
+        level (str): The hardening level that was audited.
+        formats (iterable): Any of FORMATS.
+
+    Returns:
+        dict: Format name to output path.
+    """
+    span = metrics.Span("report", os_type=os_type, level=level)
+    if not callable(audit_results) and not isinstance(audit_results, ResultSet):
+        audit_results = ResultSet(audit_results)
+    formats = list(dict.fromkeys(formats))
+    pipeline = ReportPipeline(os_type, level, formats,
+                              summary=audit_results.summary() if isinstance(audit_results, ResultSet) else None)
+    for result in (audit_results() if callable(audit_results) else audit_results):
+        pipeline.feed(result)
+    paths = pipeline.close()
+    span.finish(findings=pipeline.counts['total'], render_seconds=pipeline.render_seconds, cached=pipeline.cached)
+    return {f: paths[f] for f in formats}
+
 
 def generate_report(audit_results, os_type, level):
     """
     Generates a polished, professional PDF report from a list of audit result dictionaries.
 
     Args:
-        audit_results (list): A list of dictionaries, where each dict represents a policy check.
+        audit_results (ResultSet or list): The results, where each one represents a policy check.
         os_type (str): The operating system the audit was run on (e.g., "Windows", "Linux").
         level (str): The hardening level that was audited (e.g., "L1", "L3").
 
     Returns:
         str: The filename of the generated PDF report or an error message.
     """
-    pdf = PDF()
-    pdf.alias_nb_pages()
-    pdf.add_page()
-    
-    # --- Report Header Section ---
-    pdf.set_font('Arial', 'B', 14)
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(0, 10, "1. Scan Details", 0, 1)
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 7, f"   - Operating System: {os_type}", 0, 1)
-    pdf.cell(0, 7, f"   - Compliance Level Audited: {level}", 0, 1)
-    pdf.cell(0, 7, f"   - Report Generated: {datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}", 0, 1)
-    pdf.ln(10)
-
-    # --- Executive Summary Section ---
-    total = len(audit_results)
-    compliant = sum(1 for r in audit_results if r.get('status') == 'Compliant')
-    not_compliant = sum(1 for r in audit_results if r.get('status') == 'Not Compliant')
-    
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, "2. Executive Summary", 0, 1)
-    
-    # Draw a clean summary table
-    pdf.set_font('Arial', 'B', 11)
-    pdf.set_fill_color(240, 240, 240) # Header gray
-    col_width = (pdf.w - pdf.l_margin - pdf.r_margin) / 2
-    pdf.cell(col_width, 10, "Metric", 1, 0, 'C', True)
-    pdf.cell(col_width, 10, "Result", 1, 1, 'C', True)
-    
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(col_width, 10, "Total Policies Checked", 1, 0, 'L')
-    pdf.cell(col_width, 10, str(total), 1, 1, 'C')
-    
-    pdf.set_fill_color(220, 255, 220) # Light Green
-    pdf.cell(col_width, 10, "Compliant Policies", 1, 0, 'L', True)
-    pdf.cell(col_width, 10, str(compliant), 1, 1, 'C', True)
-    
-    pdf.set_fill_color(255, 220, 220) # Light Red
-    pdf.cell(col_width, 10, "Non-Compliant Policies", 1, 0, 'L', True)
-    pdf.cell(col_width, 10, str(not_compliant), 1, 1, 'C', True)
-    pdf.ln(10)
-    
-    # --- Detailed Findings Section ---
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, "3. Detailed Compliance Findings", 0, 1)
-    pdf.set_draw_color(200, 200, 200) # Border color for cards
-
-    for result in audit_results:
-        status = result.get('status', 'Error')
-        parameter = result.get('parameter', 'Unknown Policy')
-        details = result.get('details', 'No details were provided.')
-
-        if status == 'Compliant':
-            header_color = (220, 255, 220) # Light Green
-        elif status == 'Not Compliant':
-            header_color = (255, 220, 220) # Light Red
-        else:
-            header_color = (240, 240, 240) # Gray for Info/Error
-        
-        pdf.set_fill_color(*header_color)
-        
-        # Draw a "card" for each finding
-        pdf.set_font('Arial', 'B', 11)
-        pdf.multi_cell(0, 8, f"  {parameter}", 1, 'L', True)
-        
-        pdf.set_font('Arial', '', 10)
-        # Use a nested table structure for clean alignment. This is a robust
-        # way to prevent the FPDFException by controlling cell widths.
-        pdf.cell(10, 6, '', 'L', 0) # Left padding
-        pdf.cell(25, 6, 'Status:', 0, 0)
-        pdf.multi_cell(0, 6, f"{status}", 'R', 'L')
-
-        pdf.cell(10, 6, '', 'L', 0) # Left padding
-        pdf.cell(25, 6, 'Details:', 0, 0)
-        pdf.multi_cell(0, 6, f"{details}", 'R', 'L')
-        
-        # Draw the bottom border of the card
-        pdf.cell(0, 0, '', 'T', 1)
-        pdf.ln(5)
-
-    # --- Save the PDF File ---
-    if not os.path.exists('reports'):
-        os.makedirs('reports')
-    report_name = f"reports/SysWarden_Report_{os_type}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
     try:
-        pdf.output(report_name)
-        return report_name
+        return generate_reports(audit_results, os_type, level, ('pdf',))['pdf']
     except Exception as e:
         return f"Error: Could not generate PDF. Reason: {e}"
 
+
+def generate_run_reports(run_id, formats=('pdf',)):
+    """
+    Generates reports for a stored run without executing any modules. The
+    run's results are streamed from the history in batches, in one pass
+    for all requested formats.
+
+    Args:
+        run_id (int): The id of a run recorded in the audit history.
+        formats (iterable): Any of FORMATS.
+
+    Returns:
+        dict: Format name to output path.
+
+    Raises:
+        LookupError: If the run is unknown or has no recorded results.
+    """
+    from history import get_store
+    store = get_store()
+    run = store.get_run(run_id)
+    if run is None:
+        raise LookupError(f"Run {run_id} was not found in the audit history.")
+    if not store.run_results(run_id, limit=1):
+        raise LookupError(f"Run {run_id} has no recorded results.")
+    return generate_reports(lambda: store.iter_run_results(run_id), run['os_type'], run['level'], formats)
+
+
+def generate_run_report(run_id, formats=('pdf',)):
+    """
+    Generates reports for a stored run (see generate_run_reports).
+
+    Returns:
+        str: The filename of the generated PDF report (or of the first
+        requested format) or an error message.
+    """
+    try:
+        paths = generate_run_reports(run_id, formats)
+    except LookupError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"Error: Could not generate report. Reason: {e}"
+    return paths[list(dict.fromkeys(formats))[0]]
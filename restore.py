@@ -0,0 +1,168 @@
+from probes import ProbeContext
+from engine import run_modules, DEFAULT_WORKERS
+from results import ResultSet
+import manifest
+
+# --- 1. Restore Order ---
+def restore_order(run, modules=None):
+    """
+    Orders a rollback point's modules for restoring and finds the ones that
+    must run alone.
+
+    Modules are restored in the reverse of the order they were recorded
+    in. Modules that recorded the same target (a file, a sysctl key, a
+    package) are restored one at a time, so the state captured first is
+    the one left behind; every other module restores concurrently.
+
+    Args:
+        run (rollback_store.RollbackRun): The rollback point.
+        modules (iterable): Restrict the rollback to these modules.
+
+    Returns:
+        tuple: (ordered module names, set of modules that must run alone).
+    """
+    selected = [m for m in reversed(run.modules) if modules is None or m in modules]
+    owners = {}
+    for module_name in selected:
+        for entry in run.manifest['modules'][module_name]:
+            owners.setdefault(entry['target'], set()).add(module_name)
+    exclusive = set()
+    for names in owners.values():
+        if len(names) > 1:
+            exclusive.update(names)
+    return selected, exclusive
+
+
+# --- 2. Verification ---
+def _expected_states(run, modules):
+    """The state every target must be back in: that of its first recorded entry."""
+    expected = {}
+    for module_name in run.modules:
+        if module_name in modules:
+            for entry in run.manifest['modules'][module_name]:
+                expected.setdefault(entry['target'], (module_name, entry))
+    return expected
+
+
+def verify_entry(ctx, store, entry):
+    """
+    Checks one restored entry against the state recorded before hardening.
+
+    Returns:
+        tuple: (ok, details).
+    """
+    kind, target, value = entry['kind'], entry['target'], entry.get('value', '')
+    if kind == 'file':
+        if not store.blob_matches(entry['blob'], ctx.path(target)):
+            return False, "Content differs from the recorded original"
+        if value and ctx.file_mode(target) != value:
+            return False, f"Permissions are {ctx.file_mode(target) or 'missing'}, expected {value}"
+        return True, "Content and permissions match the recorded original"
+    if kind == 'absent':
+        if ctx.file_mode(target):
+            return False, "Still exists, but did not exist before hardening"
+        return True, "Absent, as before hardening"
+    if kind == 'mode':
+        actual = ctx.file_mode(target)
+        return (actual == value, f"Permissions are {actual or 'missing'}, expected {value}")
+    if kind == 'sysctl':
+        actual = ctx.sysctl(target)
+        ok = actual is not None and actual.split() == value.split()
+        return ok, f"Runtime value is {actual if actual is not None else 'unreadable'}, expected {value}"
+    if kind == 'package':
+        if value != 'installed':
+            return True, "Nothing to restore"
+        status = ctx.packages().get(target, '')
+        return status.endswith(' installed'), f"Package status: {status or 'not installed'}"
+    return True, f"Entries of kind '{kind}' cannot be verified"
+
+
+def verify_rollback(run, modules, root="/", on_result=None):
+    """
+    Verifies every target of the given modules, reading the system afresh.
+
+    Returns:
+        list: {'module', 'target', 'reason'} for every entry that failed.
+    """
+    ctx = ProbeContext(root)
+    failed = []
+    for target, (module_name, entry) in _expected_states(run, modules).items():
+        ok, details = verify_entry(ctx, run.store, entry)
+        if on_result:
+            on_result(module_name, {'parameter': f"Verify: {target}", 'status': "Success" if ok else "Failure",
+                                    'details': details})
+        if not ok:
+            failed.append({'module': module_name, 'target': target, 'reason': details})
+    return failed
+
+
+# --- 3. Batch Rollback ---
+class RollbackOutcome:
+    """What a batch rollback restored, what it verified and whether the rollback point is gone."""
+    def __init__(self, run_id, modules):
+        self.run_id = run_id
+        self.modules = modules
+        self.results = ResultSet()
+        self.errors = []
+        self.failed = []
+        self.deleted = False
+
+    @property
+    def complete(self):
+        return not self.errors and not self.failed
+
+    def to_dict(self):
+        return {'rollback_id': self.run_id, 'modules': self.modules, 'complete': self.complete,
+                'deleted': self.deleted, 'errors': self.errors, 'failed': self.failed,
+                'summary': self.results.summary().to_dict()}
+
+
+def rollback_run(os_type, run, modules=None, max_workers=DEFAULT_WORKERS, on_result=None, on_error=None,
+                 on_start=None, on_done=None, cancel_event=None, module_timeout=None):
+    """
+    Undoes a whole hardening run (or some of its modules) as one
+    transaction: restores every module, verifies every restored target
+    against the recorded original, and only then lets the verified modules
+    leave the rollback point. Anything that failed stays recorded so the
+    rollback can be retried.
+
+    Args:
+        os_type (str): The OS the modules run on.
+        run (rollback_store.RollbackRun): The rollback point.
+        modules (iterable): Restrict the rollback to these modules.
+        max_workers (int): Modules restored at the same time.
+        on_result (callable): on_result(module_name, data) for every restore
+            and verification result.
+        on_error (callable): on_error(module_name, message).
+
+    Returns:
+        RollbackOutcome
+    """
+    ordered, exclusive = restore_order(run, modules)
+    # Rollback mode ignores the level, but modules only accept L1-L3 and
+    # points adopted from modules run by hand are labelled 'manual'.
+    level = run.manifest['level'] if run.manifest['level'] in manifest.LEVELS else 'L1'
+    outcome = RollbackOutcome(run.id, ordered)
+    errored = set()
+
+    def result(module_name, data):
+        outcome.results.append(data, module_name)
+        if on_result: on_result(module_name, data)
+
+    def error(module_name, message):
+        outcome.errors.append(message)
+        errored.add(module_name)
+        if on_error: on_error(module_name, message)
+
+    try:
+        run_modules(os_type, ordered, 'Rollback', level, max_workers=max_workers,
+                    rollback=run, exclusive=exclusive, on_result=result, on_error=error, on_start=on_start,
+                    on_done=on_done, cancel_event=cancel_event, module_timeout=module_timeout)
+    finally:
+        run.discard()
+    outcome.failed = verify_rollback(run, ordered, on_result=result)
+    # A module that did not run to completion stays recorded even if its
+    # targets happen to match.
+    unsettled = errored | {f['module'] for f in outcome.failed}
+    outcome.deleted = run.settle([m for m in ordered if m not in unsettled], outcome.failed)
+    return outcome
@@ -0,0 +1,227 @@
+import sys
+from array import array
+from collections import Counter
+
+# --- 1. Result Codes ---
+# The statuses modules and native probes emit, interned first so their
+# codes are the same in every result set.
+STATUSES = ("Compliant", "Not Compliant", "Info", "Success", "Failure", "Error")
+
+# The keys held in columns; any other key of a result is kept on its Detail.
+COLUMN_KEYS = ('host', 'module', 'parameter', 'status', 'details')
+
+# Checks listed by Summary.top_failing unless the caller asks for more.
+TOP_FAILING = 10
+
+
+class StringTable:
+    """
+    Interns strings into small integer codes, so a column holds each
+    distinct host, module, parameter or status once. Code 0 is None (the
+    key was missing from the result).
+    """
+    __slots__ = ('codes', 'values')
+
+    def __init__(self, initial=()):
+        self.codes = {None: 0}
+        self.values = [None]
+        for value in initial:
+            self.code(value)
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            if value is not None and not isinstance(value, str):
+                return self.code(str(value))
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def lookup(self, value):
+        """Returns the code of a value already in the table, or None."""
+        return self.codes.get(value)
+
+
+class Detail:
+    """The per-result values that are not worth interning: the details text and any extra keys (cached, seq, ...)."""
+    __slots__ = ('details', 'extra')
+
+    def __init__(self, details, extra=None):
+        self.details = details
+        self.extra = extra
+
+
+# --- 2. The Result Set ---
+class ResultSet:
+    """
+    A compact, append-only container for module results.
+
+    Host, module, parameter and status are interned and stored as array
+    columns; the details text and any other keys live on one Detail record
+    per result. Iterating yields the results as the dictionaries the
+    modules emitted, so a ResultSet can stand in for a list of results.
+
+    Args:
+        results (iterable): Result dictionaries to start with.
+        module (str): Module the initial results belong to.
+        host (str): Host the initial results were collected on.
+        tag_hosts (bool): Prefix every parameter with "[host] " when
+            iterating, as the fleet report shows them.
+    """
+    def __init__(self, results=(), module=None, host=None, tag_hosts=False):
+        self.tag_hosts = tag_hosts
+        self.hosts = StringTable()
+        self.modules = StringTable()
+        self.parameters = StringTable()
+        self.statuses = StringTable(STATUSES)
+        self.host_column = array('I')
+        self.module_column = array('H')
+        self.parameter_column = array('I')
+        self.status_column = array('H')
+        self.detail_column = []
+        self.extend(results, module, host)
+
+    def append(self, data, module=None, host=None):
+        """Adds one result dictionary; `module` and `host` apply when the result does not name its own."""
+        extra = {k: v for k, v in data.items() if k not in COLUMN_KEYS} or None
+        self.host_column.append(self.hosts.code(data.get('host', host)))
+        self.module_column.append(self.modules.code(data.get('module', module)))
+        self.parameter_column.append(self.parameters.code(data.get('parameter')))
+        self.status_column.append(self.statuses.code(data.get('status')))
+        self.detail_column.append(Detail(data.get('details'), extra))
+
+    def extend(self, results, module=None, host=None):
+        if isinstance(results, ResultSet):
+            self._extend_columns(results, module, host)
+            return
+        for data in results:
+            self.append(data, module, host)
+
+    def _extend_columns(self, other, module, host):
+        """Appends another set column by column, translating its codes instead of decoding its rows."""
+        for table, column, other_table, other_column, default in (
+                (self.hosts, self.host_column, other.hosts, other.host_column, host),
+                (self.modules, self.module_column, other.modules, other.module_column, module),
+                (self.parameters, self.parameter_column, other.parameters, other.parameter_column, None),
+                (self.statuses, self.status_column, other.statuses, other.status_column, None)):
+            codes = [table.code(value) for value in other_table.values]
+            codes[0] = table.code(default)
+            column.extend(codes[code] for code in other_column)
+        self.detail_column.extend(other.detail_column)
+
+    def __len__(self):
+        return len(self.status_column)
+
+    def __getitem__(self, index):
+        return self._row(index)
+
+    def __iter__(self):
+        for index in range(len(self.status_column)):
+            yield self._row(index)
+
+    def _row(self, index):
+        detail = self.detail_column[index]
+        host = self.hosts.values[self.host_column[index]]
+        row = {'parameter': self.parameters.values[self.parameter_column[index]],
+               'status': self.statuses.values[self.status_column[index]],
+               'details': detail.details}
+        if self.tag_hosts and host is not None:
+            row['parameter'] = f"[{host}] {row['parameter'] if row['parameter'] is not None else 'Unknown Policy'}"
+        row = {k: v for k, v in row.items() if v is not None}
+        if detail.extra:
+            row.update(detail.extra)
+        module = self.modules.values[self.module_column[index]]
+        if module is not None:
+            row['module'] = module
+        if host is not None:
+            row['host'] = host
+        return row
+
+    def count(self, status):
+        """Results with a status, counted without decoding a row."""
+        code = self.statuses.lookup(status)
+        return 0 if code is None else self.status_column.count(code)
+
+    def cached_count(self):
+        return sum(1 for detail in self.detail_column if detail.extra and detail.extra.get('cached'))
+
+    def summary(self, top=TOP_FAILING):
+        return Summary(self, top)
+
+
+# --- 3. Aggregation ---
+def _grouped(result_set, table, column):
+    """{value: {status: count}} from one pass over a column zipped with the status column."""
+    grouped = {}
+    for (code, status), count in Counter(zip(column, result_set.status_column)).items():
+        grouped.setdefault(table.values[code], {})[result_set.statuses.values[status]] = count
+    return grouped
+
+
+def compliance_percent(compliant, not_compliant):
+    """Compliant checks as a share of the checks with a verdict; None when there are none."""
+    checked = compliant + not_compliant
+    return round(100.0 * compliant / checked, 1) if checked else None
+
+
+def rank_failing(failing, multi_host, n=TOP_FAILING):
+    """
+    Ranks {parameter: Not Compliant count} from most to least frequent.
+    Across several hosts a check that failed on only one of them is left
+    out, so the list shows fleet-wide problems; on a single host every
+    failing check is ranked.
+
+    Returns:
+        list: Up to `n` (parameter, count) pairs.
+    """
+    minimum = 2 if multi_host else 1
+    ranked = [(parameter, count) for parameter, count in failing.items() if count >= minimum]
+    ranked.sort(key=lambda item: (-item[1], str(item[0])))
+    return ranked[:n]
+
+
+class Summary:
+    """
+    Counts over a ResultSet: totals by status, and by status within each
+    module, host and check, with compliance percentages and the checks
+    that fail most often. Every grouping is a single pass over two integer
+    columns; no result is decoded.
+    """
+    def __init__(self, result_set, top=TOP_FAILING):
+        self.total = len(result_set)
+        self.by_status = {result_set.statuses.values[code]: count
+                          for code, count in Counter(result_set.status_column).items()}
+        self.compliant = self.by_status.get("Compliant", 0)
+        self.not_compliant = self.by_status.get("Not Compliant", 0)
+        self.by_module = _grouped(result_set, result_set.modules, result_set.module_column)
+        self.by_host = _grouped(result_set, result_set.hosts, result_set.host_column)
+        self.by_check = _grouped(result_set, result_set.parameters, result_set.parameter_column)
+        self.top = top
+
+    @property
+    def percent(self):
+        return compliance_percent(self.compliant, self.not_compliant)
+
+    def top_failing(self, n=None):
+        """
+        The checks that are Not Compliant most often (on most hosts), as
+        (parameter, count) pairs; see rank_failing.
+        """
+        failing = {parameter: counts["Not Compliant"] for parameter, counts in self.by_check.items()
+                   if counts.get("Not Compliant", 0)}
+        multi_host = sum(1 for host in self.by_host if host is not None) > 1
+        return rank_failing(failing, multi_host, self.top if n is None else n)
+
+    def counts(self):
+        """The report pipeline's summary counts."""
+        return {'total': self.total, 'compliant': self.compliant, 'not_compliant': self.not_compliant}
+
+    def _group_dict(self, grouped):
+        return {str(name): {'counts': counts,
+                            'percent': compliance_percent(counts.get("Compliant", 0), counts.get("Not Compliant", 0))}
+                for name, counts in grouped.items() if name is not None}
+
+    def to_dict(self):
+        return {**self.counts(), 'percent': self.percent, 'by_status': {str(k): v for k, v in self.by_status.items()},
+                'by_module': self._group_dict(self.by_module), 'by_host': self._group_dict(self.by_host),
+                'top_failing': [{'parameter': parameter, 'count': count} for parameter, count in self.top_failing()]}
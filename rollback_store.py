@@ -0,0 +1,409 @@
+import os
+import re
+import json
+import zlib
+import shutil
+import hashlib
+import datetime
+import platform
+import tempfile
+import threading
+
+# --- 1. Store Definitions ---
+ROLLBACK_DIR = 'rollback'
+
+# Modules stage what they are about to change in this directory (see
+# scripts/linux/lib/rollback.sh for the layout).
+STAGE_ENV = 'SYSWARDEN_ROLLBACK_STAGE'
+
+# File snapshots are stored once per content hash, zlib-compressed.
+COMPRESSION_LEVEL = 6
+COPY_CHUNK = 1 << 16
+
+# Rollback points become file names; only plain identifiers are accepted.
+RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Fields of one line in a stage or restore directory's `entries` file.
+ENTRY_FIELDS = ('kind', 'target', 'value', 'staged')
+
+
+def _atomic_write_json(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_path, path)
+
+
+def _read_entries(directory):
+    """Parses a stage directory's `entries` file into entry dictionaries."""
+    path = os.path.join(directory, 'entries')
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) == len(ENTRY_FIELDS) and fields[0]:
+                entries.append(dict(zip(ENTRY_FIELDS, fields)))
+    return entries
+
+
+# --- 2. The Rollback Store ---
+class RollbackStore:
+    """
+    Content-addressed storage for hardening rollback data.
+
+        rollback/blobs/ab/cdef...   compressed file snapshots, named by SHA-256
+        rollback/manifests/<id>.json one manifest per hardening run
+        rollback/index.json         a summary of every manifest
+        rollback/stage/             stages left by modules run by hand
+
+    Identical files saved by repeated runs share one blob. Listing and
+    cleanup only read the index; garbage collection removes blobs that no
+    indexed run references.
+    """
+    def __init__(self, directory=ROLLBACK_DIR):
+        self.directory = directory
+        self.blobs_dir = os.path.join(directory, 'blobs')
+        self.manifests_dir = os.path.join(directory, 'manifests')
+        self.stage_dir = os.path.join(directory, 'stage')
+        self.index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.RLock()
+        # Runs still being recorded; their blobs are not in the index yet.
+        self._open_runs = set()
+        for path in (self.blobs_dir, self.manifests_dir, self.stage_dir):
+            os.makedirs(path, exist_ok=True)
+
+    # --- Blobs ---
+    def _blob_path(self, digest):
+        return os.path.join(self.blobs_dir, digest[:2], digest[2:])
+
+    def put_blob(self, path, run=None):
+        """
+        Stores a file's content once; returns its SHA-256 hex digest. The
+        blob is pinned to `run` until the run is committed, so gc() cannot
+        remove it in between.
+        """
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        fd, temp_path = tempfile.mkstemp(dir=self.blobs_dir, prefix='.incoming-')
+        try:
+            with open(path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+                for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+                    digest.update(chunk)
+                    target.write(compressor.compress(chunk))
+                target.write(compressor.flush())
+            blob_path = self._blob_path(digest.hexdigest())
+            with self._lock:
+                if os.path.exists(blob_path):
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(temp_path, blob_path)
+                if run is not None:
+                    run.blobs.add(digest.hexdigest())
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest.hexdigest()
+
+    def blob_matches(self, digest, path):
+        """True if the file at `path` holds exactly the content of a blob."""
+        actual = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+                    actual.update(chunk)
+        except OSError:
+            return False
+        return actual.hexdigest() == digest
+
+    def extract_blob(self, digest, destination):
+        """Decompresses a blob into `destination`."""
+        decompressor = zlib.decompressobj()
+        with open(self._blob_path(digest), 'rb') as source, open(destination, 'wb') as target:
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+                target.write(decompressor.decompress(chunk))
+            target.write(decompressor.flush())
+
+    # --- Index and Manifests ---
+    def _manifest_path(self, run_id):
+        if not RUN_ID_PATTERN.match(str(run_id)):
+            raise ValueError(f"Invalid rollback id '{run_id}'")
+        return os.path.join(self.manifests_dir, f"{run_id}.json")
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Recreates a lost or damaged index from the manifests."""
+        index = {}
+        for filename in sorted(os.listdir(self.manifests_dir)):
+            if filename.endswith('.json'):
+                with open(os.path.join(self.manifests_dir, filename), encoding='utf-8') as f:
+                    manifest = json.load(f)
+                index[manifest['id']] = _summarize(manifest)
+        _atomic_write_json(self.index_path, index)
+        return index
+
+    def load_manifest(self, run_id):
+        try:
+            with open(self._manifest_path(run_id), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_manifest(self, manifest):
+        with self._lock:
+            _atomic_write_json(self._manifest_path(manifest['id']), manifest)
+            index = self._load_index()
+            index[manifest['id']] = _summarize(manifest)
+            _atomic_write_json(self.index_path, index)
+
+    def list_runs(self):
+        """Returns every rollback point's summary, newest first."""
+        self.adopt_stages()
+        with self._lock:
+            index = self._load_index()
+        return [dict(summary, id=run_id) for run_id, summary in
+                sorted(index.items(), key=lambda item: item[1]['created'], reverse=True)]
+
+    def delete_run(self, run_id):
+        """Forgets a rollback point. Its blobs are removed by the next gc()."""
+        with self._lock:
+            index = self._load_index()
+            found = index.pop(run_id, None) is not None
+            path = self._manifest_path(run_id)
+            if os.path.exists(path):
+                os.remove(path)
+                found = True
+            _atomic_write_json(self.index_path, index)
+        return found
+
+    # --- Cleanup ---
+    def gc(self):
+        """
+        Deletes blobs no indexed rollback point references.
+
+        Returns:
+            tuple: (blobs_removed, bytes_freed).
+        """
+        with self._lock:
+            referenced = set()
+            for summary in self._load_index().values():
+                referenced.update(summary['blobs'])
+            for run in self._open_runs:
+                referenced.update(run.blobs)
+            removed = freed = 0
+            for prefix in os.listdir(self.blobs_dir):
+                prefix_dir = os.path.join(self.blobs_dir, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    if prefix + name not in referenced:
+                        path = os.path.join(prefix_dir, name)
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+                        removed += 1
+                if not os.listdir(prefix_dir):
+                    os.rmdir(prefix_dir)
+        return removed, freed
+
+    def cleanup(self, max_age_days=None):
+        """
+        Deletes rollback points older than `max_age_days` (all of them when
+        None), then garbage-collects their blobs.
+
+        Returns:
+            tuple: (runs_removed, blobs_removed, bytes_freed).
+        """
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=max_age_days)).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            index = self._load_index()
+            expired = [run_id for run_id, summary in index.items() if cutoff is None or summary['created'] < cutoff]
+            for run_id in expired:
+                del index[run_id]
+                path = self._manifest_path(run_id)
+                if os.path.exists(path):
+                    os.remove(path)
+            _atomic_write_json(self.index_path, index)
+            blobs_removed, freed = self.gc()
+        return len(expired), blobs_removed, freed
+
+    # --- Runs ---
+    def begin_run(self, level, host=None):
+        run = RollbackRun(self, level, host)
+        with self._lock:
+            self._open_runs.add(run)
+        return run
+
+    def open_run(self, run_id):
+        """Loads an existing rollback point, or returns None."""
+        manifest = self.load_manifest(run_id)
+        return RollbackRun(self, manifest=manifest) if manifest else None
+
+    def adopt_stages(self):
+        """
+        Turns stages left behind by modules run outside the orchestrator
+        (named `<timestamp>_<Module>.sh.<pid>`) into rollback points.
+        """
+        with self._lock:
+            for name in sorted(os.listdir(self.stage_dir)):
+                match = re.match(r'^(\d{8}_\d{6})_(.+)\.(\d+)$', name)
+                if not match or _process_alive(int(match.group(3))):
+                    continue
+                run = RollbackRun(self, level='manual', run_id=f"{match.group(1)}_{os.urandom(2).hex()}")
+                run.ingest(match.group(2), os.path.join(self.stage_dir, name))
+                run.commit()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _summarize(manifest):
+    """The index entry for a manifest: enough to list, expire and GC without reading it."""
+    blobs = sorted({e['blob'] for entries in manifest['modules'].values() for e in entries if e.get('blob')})
+    return {'created': manifest['created'], 'level': manifest['level'], 'host': manifest['host'],
+            'modules': list(manifest['modules']), 'entries': sum(len(e) for e in manifest['modules'].values()),
+            'blobs': blobs, 'unverified': len(manifest.get('last_rollback', {}).get('failed', []))}
+
+
+# --- 3. Rollback Points ---
+class RollbackRun:
+    """
+    One hardening run's rollback point: every module's entries in a single
+    manifest. Modules fill it through stage() and ingest(); a rollback reads
+    it back through restore_dir().
+    """
+    def __init__(self, store, level=None, host=None, manifest=None, run_id=None):
+        self.store = store
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._restore_dirs = []
+        self.blobs = set()
+        if manifest is None:
+            now = datetime.datetime.now()
+            manifest = {'id': run_id or f"{now.strftime('%Y%m%d_%H%M%S')}_{os.urandom(2).hex()}",
+                        'created': now.strftime('%Y-%m-%d %H:%M:%S'), 'level': level,
+                        'host': host or platform.node(), 'modules': {}}
+        self.manifest = manifest
+
+    @property
+    def id(self):
+        return self.manifest['id']
+
+    @property
+    def modules(self):
+        return list(self.manifest['modules'])
+
+    def stage(self, module_name):
+        """Creates the directory a module stages its rollback data in; returns its path."""
+        path = tempfile.mkdtemp(prefix=f"{self.id}-{module_name}-", dir=self.store.stage_dir)
+        with self._lock:
+            self._stages[module_name] = path
+        return os.path.abspath(path)
+
+    def ingest(self, module_name, path=None):
+        """Moves a module's staged files into the blob store and records its entries."""
+        with self._lock:
+            path = path or self._stages.pop(module_name, None)
+        if not path or not os.path.isdir(path):
+            return 0
+        entries = []
+        for entry in _read_entries(path):
+            record = {'kind': entry['kind'], 'target': entry['target']}
+            if entry['value']:
+                record['value'] = entry['value']
+            if entry['kind'] == 'file':
+                record['blob'] = self.store.put_blob(os.path.join(path, entry['staged']), run=self)
+            entries.append(record)
+        shutil.rmtree(path, ignore_errors=True)
+        if entries:
+            with self._lock:
+                self.manifest['modules'].setdefault(module_name, []).extend(entries)
+        return len(entries)
+
+    def commit(self):
+        """Saves the manifest if any module recorded something; returns True if it did."""
+        saved = bool(self.manifest['modules'])
+        with self.store._lock:
+            if saved:
+                self.store.save_manifest(self.manifest)
+            self.store._open_runs.discard(self)
+        return saved
+
+    def restore_dir(self, module_name):
+        """Materializes a module's entries and file snapshots for its Rollback mode."""
+        path = tempfile.mkdtemp(prefix=f"restore-{self.id}-", dir=self.store.stage_dir)
+        self._restore_dirs.append(path)
+        os.makedirs(os.path.join(path, 'files'))
+        with open(os.path.join(path, 'entries'), 'w', encoding='utf-8', errors='surrogateescape') as f:
+            for number, entry in enumerate(self.manifest['modules'].get(module_name, []), 1):
+                staged = ''
+                if entry.get('blob'):
+                    staged = f"files/{number}"
+                    self.store.extract_blob(entry['blob'], os.path.join(path, staged))
+                f.write('\t'.join((entry['kind'], entry['target'], entry.get('value', ''), staged)) + '\n')
+        return os.path.abspath(path)
+
+    def settle(self, verified_modules, failed):
+        """
+        Records the outcome of a rollback. Modules whose every entry was
+        verified as restored leave the rollback point; the point itself is
+        deleted once no module is left, and kept (with the failures) until
+        then so the rollback can be retried.
+
+        Args:
+            verified_modules (iterable): Modules that were fully restored.
+            failed (list): {'module', 'target', 'reason'} for every entry
+                that did not verify.
+
+        Returns:
+            bool: True if the rollback point was deleted.
+        """
+        for module_name in verified_modules:
+            self.manifest['modules'].pop(module_name, None)
+        if not self.manifest['modules']:
+            self.store.delete_run(self.id)
+            self.store.gc()
+            return True
+        self.manifest['last_rollback'] = {'at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'failed': failed}
+        self.store.save_manifest(self.manifest)
+        return False
+
+    def discard(self):
+        """Removes leftover stage and restore directories."""
+        with self._lock:
+            paths = list(self._stages.values()) + self._restore_dirs
+            self._stages, self._restore_dirs = {}, []
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+        with self.store._lock:
+            self.store._open_runs.discard(self)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide RollbackStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RollbackStore()
+        return _store
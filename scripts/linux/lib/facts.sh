@@ -0,0 +1,117 @@
+#!/bin/bash
+# Shared fact helpers for SysWarden Linux modules.
+#
+# The orchestrator collects one fact snapshot per run and exports the
+# families a module declared into $SYSWARDEN_FACTS_DIR. These helpers read
+# from that snapshot when it is present and fall back to live collection
+# otherwise, so modules still work when run by hand.
+#
+# Every helper stores its answer in FACT_VALUE instead of printing it, so
+# callers avoid a command-substitution subshell per lookup.
+
+FACT_VALUE=""
+
+# Picks the snapshot file for a family, or the live source if there is none.
+_facts_source() {
+    if [[ -n "$SYSWARDEN_FACTS_DIR" && -f "$SYSWARDEN_FACTS_DIR/$1" ]]; then
+        FACT_VALUE="$SYSWARDEN_FACTS_DIR/$1"
+        return 0
+    fi
+    FACT_VALUE="$2"
+    return 1
+}
+
+# Looks up a tab-separated "key<TAB>value" line in a snapshot file.
+_facts_lookup() {
+    local file="$1" wanted="$2" key value
+    FACT_VALUE=""
+    while IFS=$'\t' read -r key value; do
+        if [[ "$key" == "$wanted" ]]; then
+            FACT_VALUE="$value"
+            return 0
+        fi
+    done < "$file"
+    return 1
+}
+
+# facts_mount_options <mount_point>: comma-separated options of the topmost mount.
+facts_mount_options() {
+    local wanted="$1" found="" device mount_point fs_type options rest
+    _facts_source mounts /proc/mounts
+    [[ -r "$FACT_VALUE" ]] || { FACT_VALUE=""; return 1; }
+    while read -r device mount_point fs_type options rest; do
+        [[ "$mount_point" == "$wanted" ]] && found="$options"
+    done < "$FACT_VALUE"
+    FACT_VALUE="$found"
+    [[ -n "$found" ]]
+}
+
+# facts_module_loaded <module>: succeeds if the kernel module is loaded.
+facts_module_loaded() {
+    local wanted="${1//-/_}" name rest
+    _facts_source modules /proc/modules
+    [[ -r "$FACT_VALUE" ]] || return 1
+    while read -r name rest; do
+        [[ "$name" == "$wanted" ]] && return 0
+    done < "$FACT_VALUE"
+    return 1
+}
+
+# facts_module_install <module>: the modprobe.d `install` command for a module.
+facts_module_install() {
+    local wanted="${1//-/_}"
+    if _facts_source modprobe ""; then
+        _facts_lookup "$FACT_VALUE" "$wanted"
+        return
+    fi
+    FACT_VALUE=$(modprobe -n -v "$1" 2>&1 | awk '$1 == "install" { $1 = ""; $2 = ""; sub(/^ +/, ""); print; exit }')
+    [[ -n "$FACT_VALUE" ]]
+}
+
+# facts_sysctl <key>: the current value of a kernel parameter.
+facts_sysctl() {
+    local wanted="$1" line
+    if _facts_source sysctl ""; then
+        while IFS= read -r line; do
+            if [[ "${line%%=*}" == "$wanted" ]]; then
+                FACT_VALUE="${line#*=}"
+                return 0
+            fi
+        done < "$FACT_VALUE"
+    fi
+    FACT_VALUE=""
+    local proc_path="/proc/sys/${wanted//.//}"
+    [[ -r "$proc_path" ]] && read -r FACT_VALUE < "$proc_path"
+    [[ -n "$FACT_VALUE" ]]
+}
+
+# facts_package_status <package>: dpkg's status line, e.g. "install ok installed".
+facts_package_status() {
+    if _facts_source packages ""; then
+        _facts_lookup "$FACT_VALUE" "$1"
+        return
+    fi
+    FACT_VALUE=$(dpkg-query -W -f='${Status}' "$1" 2>/dev/null)
+    [[ -n "$FACT_VALUE" ]]
+}
+
+# facts_file <path>: the path to read a configuration file from - the
+# snapshot's copy, or the file itself when there is no snapshot. Fails if
+# the file does not exist.
+facts_file() {
+    if _facts_source files ""; then
+        _facts_lookup "$FACT_VALUE" "$1"
+        return
+    fi
+    FACT_VALUE="$1"
+    [[ -r "$1" ]]
+}
+
+# facts_file_mode <path>: octal permission bits as `stat -c %a` prints them.
+facts_file_mode() {
+    if _facts_source file_modes "" && _facts_lookup "$FACT_VALUE" "$1"; then
+        return 0
+    fi
+    FACT_VALUE=$(stat -c "%a" "$1" 2>/dev/null)
+    [[ -n "$FACT_VALUE" ]]
+}
@@ -0,0 +1,142 @@
+#!/bin/bash
+# Shared rollback helpers for SysWarden Linux modules (sourced by runtime.sh).
+#
+# While hardening, modules record what they are about to change into a
+# stage directory ($SYSWARDEN_ROLLBACK_STAGE, created by the orchestrator
+# for every module run). The orchestrator moves each staged file into the
+# content-addressed rollback store and lists it in the run's manifest.
+#
+# When rolling back, the orchestrator materializes a module's share of a
+# manifest into a restore directory with the same layout and passes it to
+# the module, which hands it to rollback_restore.
+#
+# Layout of a stage or restore directory:
+#   entries       one "kind<TAB>target<TAB>value<TAB>staged" line per item
+#   files/<n>     the original content of every "file" entry
+#
+# Kinds: file (value = octal mode), absent (the file did not exist),
+# mode (value = octal mode), sysctl (value = runtime value) and
+# package (value = "installed" or "not installed").
+
+declare -A _ROLLBACK_SEEN=()
+_ROLLBACK_FILES=0
+
+# Without an orchestrator, stages are left under rollback/stage/ and
+# adopted into the store the next time it is opened.
+_rollback_stage() {
+    if [[ -z "$SYSWARDEN_ROLLBACK_STAGE" ]]; then
+        local root
+        root="$(cd "${BASH_SOURCE[0]%/*}/../../.." && pwd)"
+        local stamp
+        printf -v stamp '%(%Y%m%d_%H%M%S)T' -1
+        SYSWARDEN_ROLLBACK_STAGE="$root/rollback/stage/${stamp}_${0##*/}.$$"
+    fi
+    [[ -d "$SYSWARDEN_ROLLBACK_STAGE/files" ]] || mkdir -p "$SYSWARDEN_ROLLBACK_STAGE/files"
+}
+
+# Records an item once per run: a later change to the same target must not
+# overwrite the original state captured by the first one.
+_rollback_record() {
+    local kind="$1" target="$2" value="$3" staged="$4"
+    [[ -n "${_ROLLBACK_SEEN[$kind:$target]}" ]] && return 1
+    _ROLLBACK_SEEN[$kind:$target]=1
+    _rollback_stage
+    printf '%s\t%s\t%s\t%s\n' "$kind" "$target" "$value" "$staged" >> "$SYSWARDEN_ROLLBACK_STAGE/entries"
+}
+
+# rollback_save_file <path>: snapshots a file (or its absence) before it is modified.
+rollback_save_file() {
+    local path="$1"
+    [[ -n "${_ROLLBACK_SEEN[file:$path]}" || -n "${_ROLLBACK_SEEN[absent:$path]}" ]] && return 0
+    if [[ -f "$path" ]]; then
+        _rollback_stage
+        _ROLLBACK_FILES=$((_ROLLBACK_FILES + 1))
+        cp -p "$path" "$SYSWARDEN_ROLLBACK_STAGE/files/$_ROLLBACK_FILES" || return 1
+        _rollback_record file "$path" "$(stat -c %a "$path")" "files/$_ROLLBACK_FILES"
+    else
+        _rollback_record absent "$path" "" ""
+    fi
+    return 0
+}
+
+# rollback_save_mode <path>: records a file's permission bits before a chmod.
+rollback_save_mode() {
+    [[ -e "$1" ]] && _rollback_record mode "$1" "$(stat -c %a "$1")" ""
+    return 0
+}
+
+# rollback_save_sysctl <key>: records a kernel parameter's runtime value.
+rollback_save_sysctl() {
+    local value
+    value="$(sysctl -n "$1" 2>/dev/null)" && _rollback_record sysctl "$1" "$value" ""
+    return 0
+}
+
+# rollback_save_package <name> <installed|not installed>: records a package's state.
+rollback_save_package() {
+    _rollback_record package "$1" "$2" ""
+    return 0
+}
+
+# rollback_restore <restore_dir>: reverts every entry, newest first.
+# Modules may handle extra kinds by defining rollback_restore_<kind>.
+# Results are written with emit_result from runtime.sh.
+rollback_restore() {
+    local dir="$1" kind target value staged
+    if [[ ! -f "$dir/entries" ]]; then
+        emit_result "Rollback" "Failure" "No rollback entries found in $dir"
+        return 1
+    fi
+    local -a lines
+    mapfile -t lines < "$dir/entries"
+    local i
+    for ((i = ${#lines[@]} - 1; i >= 0; i--)); do
+        IFS=$'\t' read -r kind target value staged <<< "${lines[i]}"
+        case "$kind" in
+            file)
+                if cp "$dir/$staged" "$target" && chmod "$value" "$target"; then
+                    emit_result "Rollback: $target" "Success" "Restored $target from the rollback store"
+                else
+                    emit_result "Rollback: $target" "Failure" "Could not restore $target"
+                fi
+                ;;
+            absent)
+                if rm -f "$target"; then
+                    emit_result "Rollback: $target" "Success" "Removed $target, which did not exist before hardening"
+                else
+                    emit_result "Rollback: $target" "Failure" "Could not remove $target"
+                fi
+                ;;
+            mode)
+                if chmod "$value" "$target"; then
+                    emit_result "Rollback: $target permissions" "Success" "Restored permissions to $value"
+                else
+                    emit_result "Rollback: $target permissions" "Failure" "Could not restore permissions to $value"
+                fi
+                ;;
+            sysctl)
+                if sysctl -w "$target=$value" > /dev/null 2>&1; then
+                    emit_result "Rollback: $target" "Success" "Restored runtime value $value"
+                else
+                    emit_result "Rollback: $target" "Failure" "Could not restore runtime value $value"
+                fi
+                ;;
+            package)
+                if [[ "$value" == "installed" ]]; then
+                    if apt-get install -y "$target" > /dev/null 2>&1; then
+                        emit_result "Rollback: $target" "Success" "Package '$target' has been re-installed."
+                    else
+                        emit_result "Rollback: $target" "Failure" "Package '$target' could not be re-installed."
+                    fi
+                fi
+                ;;
+            *)
+                if declare -F "rollback_restore_$kind" > /dev/null; then
+                    "rollback_restore_$kind" "$target" "$value" "$dir/$staged"
+                else
+                    emit_result "Rollback: $target" "Warning" "Unknown rollback entry kind '$kind'"
+                fi
+                ;;
+        esac
+    done
+}
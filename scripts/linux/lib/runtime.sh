@@ -0,0 +1,127 @@
+#!/bin/bash
+# Shared runtime for SysWarden Linux modules.
+#
+# Every module starts with:
+#
+#   source "${BASH_SOURCE[0]%/*}/../lib/runtime.sh"
+#   runtime_init "$@"
+#
+# which pulls in the fact, rollback and step helpers and parses the
+# argument contract the orchestrator uses for every module:
+#
+#   <Audit|Harden|Rollback> <L1|L2|L3> [restore_dir]
+#
+# into MODE, LEVEL and ROLLBACK_DIR. Results are written with emit_result,
+# which encodes JSON in pure bash (no jq, no subshells) and buffers lines
+# during audits. The buffer is flushed on exit, including `exit 1`.
+
+RUNTIME_LIB_DIR="${BASH_SOURCE[0]%/*}"
+
+# Shared fact helpers (reads the orchestrator's snapshot when one is exported)
+source "$RUNTIME_LIB_DIR/facts.sh"
+# Shared rollback helpers (stages changes for the orchestrator's rollback store)
+source "$RUNTIME_LIB_DIR/rollback.sh"
+# Remediation step selection (targeted hardening runs only the failing steps)
+source "$RUNTIME_LIB_DIR/steps.sh"
+
+MODE=""
+LEVEL=""
+ROLLBACK_DIR=""
+JSON_VALUE=""
+
+# Audit results are written in batches of this many lines; hardening and
+# rollback results are written one by one so progress shows immediately.
+RUNTIME_BUFFER_LINES="${SYSWARDEN_OUTPUT_BUFFER:-32}"
+_RUNTIME_BUFFER=""
+_RUNTIME_BUFFERED=0
+
+# json_escape <string>: stores the string, escaped for a JSON string literal, in JSON_VALUE.
+json_escape() {
+    local s="$1"
+    s="${s//\\/\\\\}"
+    s="${s//\"/\\\"}"
+    if [[ "$s" == *[[:cntrl:]]* ]]; then
+        s="${s//$'\n'/\\n}"
+        s="${s//$'\r'/\\r}"
+        s="${s//$'\t'/\\t}"
+        s="${s//$'\b'/\\b}"
+        s="${s//$'\f'/\\f}"
+        # Anything else below 0x20 becomes a \u escape, one character at a time.
+        if [[ "$s" == *[[:cntrl:]]* ]]; then
+            local out="" ch i
+            for ((i = 0; i < ${#s}; i++)); do
+                ch="${s:i:1}"
+                [[ "$ch" == [[:cntrl:]] ]] && printf -v ch '\\u%04x' "'$ch"
+                out+="$ch"
+            done
+            s="$out"
+        fi
+    fi
+    JSON_VALUE="$s"
+}
+
+# runtime_flush: writes every buffered result line.
+runtime_flush() {
+    [[ -n "$_RUNTIME_BUFFER" ]] && printf '%s' "$_RUNTIME_BUFFER"
+    _RUNTIME_BUFFER=""
+    _RUNTIME_BUFFERED=0
+}
+trap runtime_flush EXIT
+
+# emit_result <parameter> <status> <details>: writes one result as a JSON line.
+emit_result() {
+    local parameter status
+    json_escape "$1"; parameter="$JSON_VALUE"
+    json_escape "$2"; status="$JSON_VALUE"
+    json_escape "$3"
+    _RUNTIME_BUFFER+="{\"parameter\":\"$parameter\",\"status\":\"$status\",\"details\":\"$JSON_VALUE\"}"$'\n'
+    _RUNTIME_BUFFERED=$((_RUNTIME_BUFFERED + 1))
+    ((_RUNTIME_BUFFERED >= RUNTIME_BUFFER_LINES)) && runtime_flush
+    return 0
+}
+
+# runtime_init "$@": parses and validates the module arguments, exiting
+# with a Failure result if they do not follow the contract.
+runtime_init() {
+    MODE="$1"
+    LEVEL="${2:-L1}"
+    ROLLBACK_DIR="$3"
+    case "$MODE" in
+        Audit) ;;
+        Harden) RUNTIME_BUFFER_LINES=1 ;;
+        Rollback)
+            RUNTIME_BUFFER_LINES=1
+            if [[ -z "$ROLLBACK_DIR" || ! -d "$ROLLBACK_DIR" ]]; then
+                emit_result "Rollback" "Failure" "Rollback directory not found: ${ROLLBACK_DIR:-(none given)}"
+                exit 1
+            fi
+            ;;
+        *)
+            emit_result "Mode Selection" "Failure" "Invalid mode specified: $MODE"
+            exit 1
+            ;;
+    esac
+    case "$LEVEL" in
+        L1|L2|L3) ;;
+        *)
+            emit_result "Level Selection" "Failure" "Invalid level specified: $LEVEL"
+            exit 1
+            ;;
+    esac
+}
+
+# level_includes <L1|L2|L3>: succeeds if the requested level covers it (levels are cumulative).
+level_includes() {
+    ((${LEVEL#L} >= ${1#L}))
+}
+
+# file_has_line <regex> <file>: succeeds if any line of the file matches
+# the (bash ERE) pattern; reads the file without forking grep.
+file_has_line() {
+    local pattern="$1" line
+    [[ -r "$2" ]] || return 1
+    while IFS= read -r line || [[ -n "$line" ]]; do
+        [[ "$line" =~ $pattern ]] && return 0
+    done < "$2"
+    return 1
+}
@@ -0,0 +1,13 @@
+#!/bin/bash
+# Remediation step selection for SysWarden Linux modules.
+#
+# For targeted hardening the orchestrator audits first and exports the ids
+# of the steps that fix failing checks in $SYSWARDEN_ONLY, as a
+# comma-separated list (e.g. "module:cramfs,mount:/tmp:nodev"). When the
+# variable is unset every step runs, so modules still work when run by hand.
+
+# step_selected <step_id>: succeeds if the step should run.
+step_selected() {
+    [[ -z "${SYSWARDEN_ONLY+set}" ]] && return 0
+    [[ ",$SYSWARDEN_ONLY," == *",$1,"* ]]
+}
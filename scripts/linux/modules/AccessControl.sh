@@ -1,31 +1,27 @@
 #!/bin/bash
 
-MODE=$1
-LEVEL=${2:-"L1"}
-ROLLBACK_FILE=$3
-
-# Function to output JSON-formatted results
-output_result() {
-    printf '{"parameter":"%s","status":"%s","details":"%s"}\n' "$1" "$2" "$3"
-}
-
-# Store original values for rollback
-declare -A rollback_data
+# Module runtime: facts, rollback, step selection, JSON output and arguments
+source "${BASH_SOURCE[0]%/*}/../lib/runtime.sh"
+runtime_init "$@"
 
 # Check and set file permissions
 check_file_permissions() {
     local file=$1
     local expected_perms=$2
-    local current_perms=$(stat -c "%a" "$file" 2>/dev/null)
+    if [ "$MODE" = "Harden" ] && ! step_selected "mode:$file"; then
+        return
+    fi
+    facts_file_mode "$file"
+    local current_perms=$FACT_VALUE
     
     if [ "$current_perms" = "$expected_perms" ]; then
-        output_result "$file permissions" "Compliant" "Permissions set correctly to $expected_perms"
+        emit_result "$file permissions" "Compliant" "Permissions set correctly to $expected_perms"
     else
-        output_result "$file permissions" "Not Compliant" "Current: $current_perms, Expected: $expected_perms"
+        emit_result "$file permissions" "Not Compliant" "Current: $current_perms, Expected: $expected_perms"
         if [ "$MODE" = "Harden" ]; then
-            rollback_data["$file"]=$current_perms
+            rollback_save_mode "$file"
             chmod $expected_perms "$file"
-            output_result "$file permissions" "Success" "Updated permissions to $expected_perms"
+            emit_result "$file permissions" "Success" "Updated permissions to $expected_perms"
         fi
     fi
 }
@@ -37,12 +33,7 @@ if [ "$MODE" = "Audit" ] || [ "$MODE" = "Harden" ]; then
     check_file_permissions "/etc/shadow" "600"
     check_file_permissions "/etc/group" "644"
     check_file_permissions "/etc/gshadow" "600"
-    
-    # Save rollback data if changes were made
-    if [ "$MODE" = "Harden" ] && [ ${#rollback_data[@]} -gt 0 ]; then
-        timestamp=$(date +%Y%m%d_%H%M%S)
-        rollback_file="./rollback/${timestamp}_AccessControl.json"
-        printf "%s\n" "$(declare -p rollback_data)" > "$rollback_file"
-    fi
+elif [ "$MODE" = "Rollback" ]; then
+    rollback_restore "$ROLLBACK_DIR"
 fi
 
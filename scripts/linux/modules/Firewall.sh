@@ -2,11 +2,8 @@
 # Placeholder for Firewall.sh
 # This module will configure ufw (Uncomplicated Firewall).
 
-LEVEL=$1
-MODE=$2
+# Module runtime: facts, rollback, step selection, JSON output and arguments
+source "${BASH_SOURCE[0]%/*}/../lib/runtime.sh"
+runtime_init "$@"
 
-write_result() {
-    jq -n --arg p "$1" --arg s "$2" --arg d "$3" '{parameter:$p, status:$s, details:$d}'
-}
-
-write_result "Module: Firewall" "Info" "This module is not yet implemented."
\ No newline at end of file
+emit_result "Module: Firewall" "Info" "This module is not yet implemented."
@@ -2,11 +2,8 @@
 # Placeholder for LoggingAndAuditing.sh
 # This module will configure services like auditd and rsyslog.
 
-LEVEL=$1
-MODE=$2
+# Module runtime: facts, rollback, step selection, JSON output and arguments
+source "${BASH_SOURCE[0]%/*}/../lib/runtime.sh"
+runtime_init "$@"
 
-write_result() {
-    jq -n --arg p "$1" --arg s "$2" --arg d "$3" '{parameter:$p, status:$s, details:$d}'
-}
-
-write_result "Module: Logging and Auditing" "Info" "This module is not yet implemented."
+emit_result "Module: Logging and Auditing" "Info" "This module is not yet implemented."
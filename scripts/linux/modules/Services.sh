@@ -1,10 +1,8 @@
 #!/bin/bash
-LEVEL=$1
 
-write_result() {
-    PARAM=$1; STATUS=$2; DETAILS=$3
-    jq -n --arg p "$PARAM" --arg s "$STATUS" --arg d "$DETAILS" '{parameter:$p, status:$s, details:$d}'
-}
+# Module runtime: facts, rollback, step selection, JSON output and arguments
+source "${BASH_SOURCE[0]%/*}/../lib/runtime.sh"
+runtime_init "$@"
 
-write_result "Module: Services" "Info" "This module is not yet implemented."
+emit_result "Module: Services" "Info" "This module is not yet implemented."
 # Add hardening logic for Services here in the future.
@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import mmap
+import time
+import struct
+import threading
+
+# --- 1. Spool Definitions ---
+SPOOL_DIR = 'runs'
+
+# Each record's byte offset is stored as one little-endian uint64 in a
+# sidecar .idx file, so sequence number n is found with a single seek.
+INDEX_ENTRY = struct.Struct('<Q')
+
+# Spool ids become file names; only plain identifiers are accepted.
+SPOOL_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Spools older than this are removed by prune_spools().
+SPOOL_RETENTION_DAYS = 7
+
+
+def _paths(spool_id, directory=SPOOL_DIR):
+    if not SPOOL_ID_PATTERN.match(str(spool_id)):
+        raise ValueError(f"Invalid spool id '{spool_id}'")
+    base = os.path.join(directory, str(spool_id))
+    return f"{base}.ndjson", f"{base}.idx"
+
+
+# --- 2. Writing ---
+class ResultSpool:
+    """
+    An append-only NDJSON log of every event a run emitted.
+
+    Each line is `{"seq": n, "event": name, "data": payload}`. The spool is
+    flushed after every record, so readers can replay a run while it is
+    still being written.
+    """
+    def __init__(self, spool_id, directory=SPOOL_DIR):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.spool_id = spool_id
+        self.data_path, self.index_path = _paths(spool_id, directory)
+        self._data = open(self.data_path, 'ab')
+        self._index = open(self.index_path, 'ab')
+        self._seq = os.path.getsize(self.index_path) // INDEX_ENTRY.size
+        self._lock = threading.Lock()
+
+    def append(self, event, payload):
+        """Appends one event and returns its sequence number (starting at 1)."""
+        with self._lock:
+            self._seq += 1
+            line = json.dumps({'seq': self._seq, 'event': event, 'data': payload}, separators=(',', ':')) + '\n'
+            offset = self._data.tell()
+            self._data.write(line.encode('utf-8'))
+            self._data.flush()
+            # The index entry is written last, so an indexed record is always complete.
+            self._index.write(INDEX_ENTRY.pack(offset))
+            self._index.flush()
+            return self._seq
+
+    def close(self):
+        with self._lock:
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 3. Reading ---
+def _mapped(path):
+    """Memory-maps a file read-only; returns None for missing or empty files."""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+def spool_exists(spool_id, directory=SPOOL_DIR):
+    return os.path.exists(_paths(spool_id, directory)[0])
+
+
+def read_events(spool_id, after_seq=0, limit=500, directory=SPOOL_DIR):
+    """
+    Returns up to `limit` events with a sequence number above `after_seq`.
+
+    Only the requested slice is touched, through memory-mapped reads of the
+    index and the data file, so large runs are never loaded whole.
+
+    Returns:
+        tuple: (events, last_seq) where last_seq is the highest seq written so far.
+    """
+    data_path, index_path = _paths(spool_id, directory)
+    index = _mapped(index_path)
+    if index is None:
+        return [], 0
+    data = _mapped(data_path)
+    try:
+        last_seq = len(index) // INDEX_ENTRY.size
+        first = max(0, int(after_seq))
+        end = min(last_seq, first + max(0, int(limit)))
+        if first >= end:
+            return [], last_seq
+        start_offset = INDEX_ENTRY.unpack_from(index, first * INDEX_ENTRY.size)[0]
+        if end < last_seq:
+            end_offset = INDEX_ENTRY.unpack_from(index, end * INDEX_ENTRY.size)[0]
+        else:
+            # Slice up to the end of the last indexed record, never into a partial write.
+            end_offset = data.find(b'\n', INDEX_ENTRY.unpack_from(index, (end - 1) * INDEX_ENTRY.size)[0]) + 1
+        events = [json.loads(line) for line in data[start_offset:end_offset].splitlines() if line]
+        return events, last_seq
+    finally:
+        index.close()
+        if data is not None: data.close()
+
+
+def read_bytes(spool_id, offset=0, length=65536, directory=SPOOL_DIR):
+    """
+    Returns raw NDJSON starting at a byte offset, cut at the last complete line.
+
+    Returns:
+        tuple: (chunk, next_offset).
+    """
+    data = _mapped(_paths(spool_id, directory)[0])
+    if data is None:
+        return b'', 0
+    try:
+        offset = max(0, int(offset))
+        chunk = data[offset:offset + max(0, int(length))]
+        cut = chunk.rfind(b'\n') + 1
+        return chunk[:cut], offset + cut
+    finally:
+        data.close()
+
+
+def prune_spools(max_age_days=SPOOL_RETENTION_DAYS, directory=SPOOL_DIR):
+    """Deletes spool files older than `max_age_days`; returns how many were removed."""
+    if not os.path.exists(directory):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if filename.endswith(('.ndjson', '.idx')) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
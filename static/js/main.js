@@ -40,13 +40,14 @@ function listRollbacks() {
 }
 
 /**
- * Executes a specific rollback file.
- * @param {string} filename - The name of the rollback file to execute.
+ * Undoes a whole hardening run: its modules are restored concurrently and
+ * every item is verified; the rollback point is kept until all of it is.
+ * @param {string} rollbackId - The id of the rollback point to undo.
  */
-function runRollback(filename) {
+function runRollback(rollbackId) {
     const resultsDiv = document.getElementById('results');
-    resultsDiv.textContent = `Executing rollback for ${filename}...`;
-    socket.emit('run_rollback', { filename: filename });
+    resultsDiv.textContent = `Submitting rollback ${rollbackId}...`;
+    socket.emit('run_rollback', { rollback_id: rollbackId });
 }
 
 // Listen for the 'rollback_list' event from the server
@@ -59,24 +60,26 @@ socket.on('rollback_list', function(data) {
         return;
     }
 
-    if (data.files && data.files.length > 0) {
-        data.files.forEach(filename => {
+    if (data.rollbacks && data.rollbacks.length > 0) {
+        data.rollbacks.forEach(rollback => {
             const rollbackItem = document.createElement('div');
             rollbackItem.className = 'policy'; // Reuse the policy style
-            
+
             const label = document.createElement('span');
-            label.textContent = filename;
-            
+            const unverified = rollback.unverified ? ` (${rollback.unverified} item(s) not restored last time)` : '';
+            label.textContent = `${rollback.id} - ${rollback.created}, ${rollback.level}: `
+                + `${rollback.entries} item(s) in ${rollback.modules.join(', ')}${unverified}`;
+
             const button = document.createElement('button');
             button.textContent = 'Rollback';
-            button.onclick = () => runRollback(filename);
-            
+            button.onclick = () => runRollback(rollback.id);
+
             rollbackItem.appendChild(label);
             rollbackItem.appendChild(button);
             container.appendChild(rollbackItem);
         });
     } else {
-        container.innerHTML = '<p>No rollback files found.</p>';
+        container.innerHTML = '<p>No rollback points found.</p>';
     }
 });
 
@@ -103,4 +106,187 @@ socket.on('report_generated', function(data) {
     } else {
         reportStatus.textContent = `Error generating report: ${data.error}`;
     }
-});
\ No newline at end of file
+});
+// --- Background jobs ---
+// run_action returns a job id right away; progress and results for that job
+// arrive in its own Socket.IO room. Every job event carries a sequence
+// number, and the job id and last seen seq are kept in sessionStorage so a
+// reloaded tab or dropped socket can replay what it missed.
+let currentJobId = sessionStorage.getItem('syswarden.jobId');
+let lastSeq = parseInt(sessionStorage.getItem('syswarden.lastSeq') || '0', 10);
+
+function followJob(jobId) {
+    currentJobId = jobId;
+    lastSeq = 0;
+    sessionStorage.setItem('syswarden.jobId', jobId);
+    sessionStorage.setItem('syswarden.lastSeq', '0');
+}
+
+/**
+ * Submits an audit or hardening run for the selected level. Hardening
+ * audits first and only remediates failing checks.
+ * @param {string} mode - 'Audit' or 'Harden'.
+ * @param {boolean} dryRun - For 'Harden', only show the plan and its diff.
+ */
+function runAction(mode, dryRun = false) {
+    const activeLevel = document.querySelector('.level-btn.active');
+    const level = activeLevel ? activeLevel.dataset.level : 'L1';
+    const resultsDiv = document.getElementById('results');
+    resultsDiv.textContent = `Submitting ${mode}${dryRun ? ' (dry run)' : ''} for level ${level}...`;
+    socket.emit('run_action', { level: level, mode: mode, dry_run: dryRun });
+}
+
+/**
+ * Cancels the job this page is following, killing any running module.
+ */
+function cancelJob() {
+    if (currentJobId) {
+        socket.emit('cancel_job', { job_id: currentJobId });
+    }
+}
+
+/**
+ * Renders one job event, skipping anything already shown (replay and live
+ * delivery can overlap by a few events).
+ * @param {string} event - The event name.
+ * @param {object} data - The event payload.
+ */
+function renderJobEvent(event, data) {
+    if (data.seq !== undefined) {
+        if (data.seq <= lastSeq) return;
+        lastSeq = data.seq;
+        sessionStorage.setItem('syswarden.lastSeq', String(lastSeq));
+    }
+    const resultsDiv = document.getElementById('results');
+    if (event === 'progress_update') {
+        resultsDiv.textContent += `[${data.current}/${data.total}] ${data.module}\n`;
+    } else if (event === 'console_output') {
+        const cached = data.cached ? ' (cached)' : '';
+        resultsDiv.textContent += `  [${data.status}]${cached} ${data.parameter}: ${data.details}\n`;
+    } else if (event === 'harden_plan') {
+        resultsDiv.textContent += `Hardening plan: ${data.items.length} change(s) in ${data.modules.length} module(s)\n`;
+        data.items.forEach(item => {
+            resultsDiv.textContent += `  [Not Compliant] ${item.parameter}\n      -> ${item.action}\n`;
+        });
+        (data.not_planned || []).forEach(entry => {
+            resultsDiv.textContent += `  [Not Planned] ${entry.module}: the audit failed (${entry.reason})\n`;
+        });
+        if (data.diff) {
+            resultsDiv.textContent += `${data.diff}\n`;
+        }
+    } else if (event === 'action_started') {
+        resultsDiv.textContent += `${data.mode} started for level ${data.level}.\n`;
+    } else if (event === 'action_finished') {
+        resultsDiv.textContent += `${data.message}\n`;
+        if (data.summary && data.summary.percent !== null) {
+            resultsDiv.textContent += formatSummary(data.summary);
+        }
+        if (data.job_id === currentJobId) {
+            currentJobId = null;
+            sessionStorage.removeItem('syswarden.jobId');
+        }
+    }
+}
+
+/**
+ * Formats a run summary: compliance overall, per module and per host, and
+ * the checks that fail most often.
+ * @param {object} summary - The summary the server computed from the run's results.
+ * @returns {string} The lines to append to the results pane.
+ */
+function formatSummary(summary) {
+    const percent = value => (value === null ? 'n/a' : `${value}%`);
+    let text = `Compliance: ${percent(summary.percent)} (${summary.compliant} compliant, ${summary.not_compliant} non-compliant of ${summary.total})\n`;
+    [summary.by_module, summary.by_host].forEach(groups => {
+        Object.keys(groups).sort().forEach(name => {
+            const failed = groups[name].counts['Not Compliant'] || 0;
+            text += `  ${name}: ${percent(groups[name].percent)} (${failed} non-compliant)\n`;
+        });
+    });
+    if (summary.top_failing.length) {
+        text += 'Most frequent failures:\n';
+        summary.top_failing.forEach(item => {
+            text += `  ${item.count}x ${item.parameter}\n`;
+        });
+    }
+    return text;
+}
+
+socket.on('connect', function() {
+    // After a reload or reconnect, replay the followed job from the last seen event.
+    if (currentJobId) {
+        socket.emit('replay_job', { job_id: currentJobId, last_seq: lastSeq });
+    }
+});
+
+socket.on('replay_batch', function(data) {
+    data.events.forEach(record => renderJobEvent(record.event, Object.assign({}, record.data, { seq: record.seq })));
+});
+
+// Results arrive in batches; progress updates stay individual and coalesced.
+socket.on('console_output_batch', function(data) {
+    data.events.forEach(payload => renderJobEvent('console_output', payload));
+});
+
+socket.on('job_submitted', function(data) {
+    followJob(data.job_id);
+    const resultsDiv = document.getElementById('results');
+    resultsDiv.textContent = data.merged
+        ? `Joined the ${data.mode} job already running for level ${data.level} (${data.job_id}).\n`
+        : `Queued ${data.mode} job for level ${data.level} (${data.job_id}).\n`;
+    if (data.merged) {
+        // Catch up on what the running job already produced.
+        socket.emit('replay_job', { job_id: data.job_id, last_seq: 0 });
+    }
+});
+
+socket.on('job_status', function(data) {
+    document.getElementById('results').textContent += `Job ${data.job_id}: ${data.status}\n`;
+});
+
+['progress_update', 'console_output', 'harden_plan', 'action_started', 'action_finished'].forEach(event => {
+    socket.on(event, data => renderJobEvent(event, data));
+});
+
+// --- Continuous compliance watch ---
+// The server re-evaluates only the checks whose files changed and pushes
+// every status change to all connected clients.
+let watchActive = false;
+
+/**
+ * Starts watching the selected level, or stops the running watch.
+ */
+function toggleWatch() {
+    if (watchActive) {
+        socket.emit('stop_watch');
+        return;
+    }
+    const activeLevel = document.querySelector('.level-btn.active');
+    socket.emit('start_watch', { level: activeLevel ? activeLevel.dataset.level : 'L1' });
+}
+
+socket.on('connect', function() {
+    socket.emit('watch_status');
+});
+
+socket.on('watch_status', function(data) {
+    const changed = data.active !== watchActive;
+    watchActive = data.active;
+    const button = document.getElementById('watch-btn-label');
+    if (button) {
+        button.textContent = data.active ? 'Stop Watching' : 'Watch Compliance';
+    }
+    if (!changed && !data.active) return;
+    const resultsDiv = document.getElementById('results');
+    resultsDiv.textContent += data.active
+        ? `Watching ${data.checks} check(s) at level ${data.level}; ${data.not_compliant} not compliant.\n`
+        : 'Compliance watch stopped.\n';
+});
+
+socket.on('compliance_change', function(data) {
+    const when = new Date(data.changed_at * 1000).toLocaleTimeString();
+    document.getElementById('results').textContent +=
+        (data.previous === data.status
+            ? `[${when}] ${data.parameter}: configuration edited, still ${data.status} (${data.details})\n`
+            : `[${when}] ${data.parameter}: ${data.previous} -> ${data.status} (${data.details})\n`);
+});
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    """Module paths (scripts/...) are resolved relative to the repository root."""
+    monkeypatch.chdir(REPO_ROOT)
+    return REPO_ROOT
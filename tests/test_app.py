@@ -0,0 +1,24 @@
+import pytest
+
+app = pytest.importorskip("app")
+
+
+@pytest.fixture
+def client():
+    return app.socketio.test_client(app.app)
+
+
+@pytest.mark.parametrize("request_data", [{'level': 'L9', 'mode': 'Audit'},
+                                          {'level': 'L1', 'mode': 'Rollback'},
+                                          {'level': 'L1', 'mode': 'audit'}])
+def test_run_action_rejects_invalid_level_or_mode(client, request_data):
+    client.emit('run_action', request_data)
+    received = client.get_received()
+    assert [event['name'] for event in received] == ['job_error']
+    assert app.job_manager.list() == []
+
+
+def test_run_fleet_rejects_harden(client):
+    client.emit('run_fleet', {'level': 'L1', 'mode': 'Harden', 'inventory': 'web1 sysroot:/'})
+    assert [event['name'] for event in client.get_received()] == ['job_error']
+    assert app.job_manager.list() == []
@@ -0,0 +1,23 @@
+from events import EventSink
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, payload, to=None):
+        self.sent.append((event, to, payload))
+
+
+def test_emit_honours_the_target_room():
+    socket = RecordingSocket()
+    with EventSink(socket, room="job-1") as sink:
+        sink.emit('console_output', {'parameter': "A"})
+        sink.emit('console_output', {'parameter': "B"}, to="job-2")
+        sink.emit('progress_update', {'current': 1}, to="job-2")
+        sink.emit('action_finished', {'status': "Success"}, to="job-2")
+
+    assert ('console_output_batch', "job-1", {'events': [{'parameter': "A"}]}) in socket.sent
+    assert ('console_output_batch', "job-2", {'events': [{'parameter': "B"}]}) in socket.sent
+    assert ('progress_update', "job-2", {'current': 1}) in socket.sent
+    assert socket.sent[-1] == ('action_finished', "job-2", {'status': "Success"})
@@ -0,0 +1,64 @@
+import pytest
+
+import engine
+import fleet
+import manifest
+from sysroot import build_sysroot
+
+
+def _inventory(tmp_path, names):
+    lines = []
+    for seed, name in enumerate(names, 1):
+        root = build_sysroot(str(tmp_path / name), mounts=4, loaded_modules=4, packages=20, seed=seed)
+        lines.append(f"{name} sysroot:{root}")
+    return fleet.parse_inventory("\n".join(lines))
+
+
+def test_fleet_audits_every_sysroot_host(tmp_path):
+    transports = _inventory(tmp_path, ["web1", "web2"])
+    assert all(isinstance(t, fleet.SysrootTransport) for t in transports)
+
+    host_results = fleet.run_fleet(transports, manifest.modules_for('Linux', 'L1'), 'Audit', 'L1', max_hosts=2)
+
+    assert [h.name for h in host_results] == ["web1", "web2"]
+    for host in host_results:
+        assert len(host.results) > 0
+        assert {row['host'] for row in host.results} == {host.name}
+    tagged = fleet.tag_results(host_results)
+    assert set(tagged.summary().by_host) == {"web1", "web2"}
+    assert all(row['parameter'].startswith(f"[{row['host']}] ") for row in tagged)
+
+
+def test_fleet_refuses_to_harden(tmp_path):
+    transports = _inventory(tmp_path, ["web1"])
+    with pytest.raises(ValueError):
+        fleet.run_fleet(transports, manifest.modules_for('Linux', 'L1'), 'Harden', 'L1')
+
+
+def test_sysroot_skips_modules_without_native_checks(tmp_path):
+    transport = _inventory(tmp_path, ["web1"])[0]
+    errors = []
+
+    results = engine.run_modules("Linux", ["AccessControl.sh", "Firewall.sh"], "Audit", "L1", transport=transport,
+                                 on_error=lambda module, message: errors.append(module))
+
+    assert errors == ["Firewall.sh"]
+    assert {row['module'] for row in results} == {"AccessControl.sh"}
+
+
+def test_sysroot_labels_scripts_run_on_this_machine(tmp_path):
+    root = build_sysroot(str(tmp_path / "web1"), mounts=4, loaded_modules=4, packages=20)
+    transport = fleet.SysrootTransport("web1", root, local_scripts=True)
+
+    results = engine.run_modules("Linux", ["AccessControl.sh"], "Audit", "L1", transport=transport, native=False)
+
+    assert len(results) > 0
+    assert all(row.get('local') for row in results)
+
+
+def test_transports_pass_module_arguments():
+    assert fleet.LocalTransport("here").command("m.sh", "Rollback", "L1", ("/tmp/restore",)) == \
+        ["bash", "m.sh", "Rollback", "L1", "/tmp/restore"]
+    ssh = fleet.SSHTransport("web1", "web1.example")
+    ssh.control_dir, ssh.remote_dir = "/tmp/ctl", "/tmp/syswarden.x"
+    assert ssh.command("m.sh", "Rollback", "L1", ("/tmp/a b",))[-1].endswith("Rollback L1 '/tmp/a b'")
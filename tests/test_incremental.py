@@ -0,0 +1,78 @@
+import functools
+import os
+import threading
+
+import pytest
+
+import engine
+import fleet
+import incremental
+from sysroot import build_sysroot
+
+
+@pytest.fixture
+def host(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "AuditCache",
+                        functools.partial(incremental.AuditCache, path=str(tmp_path / "audit_cache.json")))
+    root = build_sysroot(str(tmp_path / "host"), mounts=4, loaded_modules=4, packages=20)
+    return fleet.SysrootTransport("host", root)
+
+
+def _audit(transport, facts_ttl=0):
+    results = engine.run_modules("Linux", ["AccessControl.sh"], "Audit", "L1", transport=transport,
+                                 incremental=True, facts_ttl=facts_ttl)
+    return {row['parameter']: row for row in results}
+
+
+def _shadow(rows):
+    return next(row for parameter, row in rows.items() if "/etc/shadow" in parameter)
+
+
+def test_changed_file_invalidates_only_its_checks(host):
+    first = _audit(host)
+    assert not any(row.get('cached') for row in first.values())
+    assert _shadow(first)['status'] == "Compliant"
+
+    assert all(row.get('cached') for row in _audit(host).values())
+
+    os.chmod(os.path.join(host.root, "etc", "shadow"), 0o644)
+    third = _audit(host)
+    assert not _shadow(third).get('cached')
+    assert _shadow(third)['status'] == "Not Compliant"
+    assert sum(1 for row in third.values() if row.get('cached')) == len(third) - 1
+
+
+def test_reused_snapshot_does_not_record_stale_results(host):
+    assert _shadow(_audit(host))['status'] == "Compliant"
+    os.chmod(os.path.join(host.root, "etc", "shadow"), 0o644)
+
+    # Within the TTL the run answers from the earlier snapshot; that answer
+    # must not be stored under the file's new fingerprint.
+    _audit(host, facts_ttl=3600)
+
+    fresh = _shadow(_audit(host))
+    assert not fresh.get('cached')
+    assert fresh['status'] == "Not Compliant"
+
+
+def test_concurrent_saves_merge_their_entries(tmp_path):
+    path = str(tmp_path / "cache" / "audit_cache.json")
+    caches = [incremental.AuditCache(path=path) for _ in range(8)]
+    for number, cache in enumerate(caches):
+        for check in range(50):
+            cache.store(f"job{number}:check{check}", {"file:/etc/x": number}, [{'status': "Compliant"}])
+    barrier = threading.Barrier(len(caches))
+
+    def save(cache):
+        barrier.wait()
+        cache.save()
+
+    threads = [threading.Thread(target=save, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = incremental.AuditCache(path=path)
+    assert len(merged.entries) == 8 * 50
+    assert os.listdir(os.path.dirname(path)) == ["audit_cache.json"]
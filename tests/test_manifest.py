@@ -0,0 +1,26 @@
+import engine
+import manifest
+
+
+def test_execution_plan_compiles_scheduling_properties():
+    plan = manifest.execution_plan("Linux", "L1", "Harden")
+    assert set(plan.exclusive) == set(plan.modules)
+    assert plan.timeouts["PackageManagement.sh"] == 900
+    assert manifest.execution_plan("Linux", "L1", "Audit").exclusive == frozenset()
+    assert set(manifest.schedule_for("Linux").modules) == set(manifest.modules_for("Linux", "L3"))
+
+
+def test_engine_schedules_from_the_execution_plan(monkeypatch):
+    timeouts = {}
+
+    def execute_module(os_type, module_name, mode, level, **kwargs):
+        timeouts[module_name] = kwargs['timeout']
+        return engine.ModuleRun(module_name)
+
+    monkeypatch.setattr(engine, "execute_module", execute_module)
+    schedule = manifest.ExecutionPlan("Linux", "L2", "Audit", ["Services.sh", "Network.sh"])
+    schedule.timeouts = {"Services.sh": 7, "Network.sh": 9}
+
+    engine.run_modules("Linux", ["Services.sh", "Network.sh"], "Audit", "L2", native=False, schedule=schedule)
+
+    assert timeouts == {"Services.sh": 7, "Network.sh": 9}
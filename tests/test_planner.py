@@ -0,0 +1,17 @@
+import planner
+
+
+def test_modules_whose_audit_failed_are_reported_as_not_planned():
+    results = {
+        "AccessControl.sh": [{'parameter': "/etc/shadow permissions", 'status': "Not Compliant", 'details': "644"}],
+        "Filesystem.sh": [{'parameter': "Kernel Module: cramfs", 'status': "Not Compliant", 'details': "loaded"}],
+    }
+    errors = {"Filesystem.sh": "Module 'Filesystem.sh' exited with an error. STDERR: boom"}
+
+    plan = planner.build_plan("L1", ["Filesystem.sh", "AccessControl.sh", "Network.sh"], results, errors=errors)
+
+    assert plan.modules == ["AccessControl.sh"]
+    assert [item.parameter for item in plan.items] == ["/etc/shadow permissions"]
+    assert plan.not_planned == errors
+    assert plan.to_dict()['not_planned'] == [{'module': "Filesystem.sh", 'reason': errors["Filesystem.sh"]}]
+    assert plan.env_overrides() == {"AccessControl.sh": {planner.ONLY_ENV: "mode:/etc/shadow"}}
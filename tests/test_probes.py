@@ -0,0 +1,71 @@
+import os
+
+import probes
+
+
+def _write(root, path, text):
+    path = os.path.join(str(root), path.lstrip("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _evaluate(root, *checks):
+    return {data['parameter']: data['status'] for data in probes.evaluate(list(checks), probes.ProbeContext(str(root)))}
+
+
+def test_mount_options_match_whole_options_of_the_topmost_mount(tmp_path):
+    _write(tmp_path, "/proc/mounts",
+           "tmpfs /tmp tmpfs rw,nodev 0 0\n"
+           "tmpfs /tmp tmpfs rw,nosuid,nodev 0 0\n"
+           "nodevfs /home nodevfs rw,relatime 0 0\n"
+           "tmpfs /dev/shm tmpfs rw,exec 0 0\n")
+    ctx = probes.ProbeContext(str(tmp_path))
+
+    assert ctx.mounts()["/tmp"] == ["rw", "nosuid", "nodev"]
+    assert _evaluate(tmp_path, probes._mount_option_check("/tmp", "nosuid"),
+                     probes._mount_option_check("/tmp", "noexec"),
+                     probes._mount_option_check("/home", "nodev"),
+                     probes._mount_option_check("/dev/shm", "noexec")) == {
+        "Mount Option: nosuid on /tmp": "Compliant",
+        "Mount Option: noexec on /tmp": "Not Compliant",
+        "Mount Option: nodev on /home": "Not Compliant",
+        "Mount Option: noexec on /dev/shm": "Not Compliant",
+    }
+
+
+def test_modprobe_installs_follow_kmod_precedence(tmp_path):
+    _write(tmp_path, "/proc/modules", "udf 1024 0 - Live 0x0\n")
+    _write(tmp_path, "/etc/modprobe.d/cramfs.conf", "install cramfs /bin/true\n")
+    _write(tmp_path, "/etc/modprobe.d/fs.conf", "# comment\ninstall hfs /bin/false\ninstall usb-storage /bin/true\n")
+    # /etc overrides a file of the same name in /lib; other names still apply.
+    _write(tmp_path, "/lib/modprobe.d/cramfs.conf", "install cramfs /sbin/modprobe --ignore-install cramfs\n")
+    _write(tmp_path, "/lib/modprobe.d/squashfs.conf", "install squashfs /sbin/modprobe --ignore-install squashfs\n")
+    ctx = probes.ProbeContext(str(tmp_path))
+
+    assert ctx.modprobe_installs()["cramfs"] == "/bin/true"
+    assert ctx.modprobe_installs()["usb_storage"] == "/bin/true"
+    statuses = _evaluate(tmp_path, *(probes._kernel_module_check(m) for m in
+                                     ["cramfs", "hfs", "usb-storage", "squashfs", "udf", "jffs2"]))
+    assert statuses == {
+        "Kernel Module: cramfs": "Compliant",
+        "Kernel Module: hfs": "Compliant",
+        "Kernel Module: usb-storage": "Compliant",
+        "Kernel Module: squashfs": "Not Compliant",
+        "Kernel Module: udf": "Not Compliant",
+        "Kernel Module: jffs2": "Not Compliant",
+    }
+
+
+def test_dpkg_status_counts_only_installed_packages(tmp_path):
+    _write(tmp_path, "/var/lib/dpkg/status",
+           "Package: prelink\nStatus: deinstall ok config-files\nVersion: 1.0\n\n"
+           "Package: bash\nStatus: install ok installed\nVersion: 5.2\n")
+    ctx = probes.ProbeContext(str(tmp_path))
+    prelink = probes.NATIVE_CHECKS["PackageManagement.sh"][0]
+
+    assert ctx.packages() == {"prelink": "deinstall ok config-files", "bash": "install ok installed"}
+    assert probes.evaluate_check(ctx, prelink) == (True, "not installed")
+
+    _write(tmp_path, "/var/lib/dpkg/status", "Package: prelink\nStatus: install ok installed\n")
+    assert probes.evaluate_check(probes.ProbeContext(str(tmp_path)), prelink) == (False, "installed")
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+report_generator = pytest.importorskip("report_generator")
+import history
+
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_generator, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(report_generator, "CACHE_INDEX", str(tmp_path / "reports" / ".report_cache.json"))
+    store = history.ResultStore(str(tmp_path / "history.db"))
+    monkeypatch.setattr(history, "_store", store)
+    return store
+
+
+def _record_run(results):
+    recorder = history.start_run("L1", "Audit", "Linux")
+    for data in results:
+        recorder.add("AccessControl.sh", data)
+    recorder.close()
+    return recorder.run_id
+
+
+def test_run_report_streams_history_once_for_all_formats(reports, monkeypatch):
+    run_id = _record_run({'parameter': f"Check {i}", 'status': "Not Compliant", 'details': "d"} for i in range(3))
+    passes = []
+    iter_run_results = reports.iter_run_results
+    monkeypatch.setattr(reports, "iter_run_results", lambda *a, **k: passes.append(a) or iter_run_results(*a, **k))
+
+    paths = report_generator.generate_run_reports(run_id, report_generator.FORMATS)
+
+    assert list(paths) == list(report_generator.FORMATS)
+    assert all(os.path.getsize(path) > 0 for path in paths.values())
+    # Every format is rendered and the report cache key computed in one pass.
+    assert len(passes) == 1
+
+
+def test_cached_formats_are_reused_and_duplicates_discarded(reports):
+    run_id = _record_run({'parameter': f"Check {i}", 'status': "Compliant", 'details': "d"} for i in range(3))
+    first = report_generator.generate_run_reports(run_id, report_generator.FORMATS)
+    rendered = sorted(os.listdir(report_generator.REPORTS_DIR))
+
+    assert report_generator.generate_run_reports(run_id, report_generator.FORMATS) == first
+    assert sorted(os.listdir(report_generator.REPORTS_DIR)) == rendered
+
+
+def test_run_report_for_unknown_run(reports):
+    with pytest.raises(LookupError):
+        report_generator.generate_run_reports(12345)
+    assert report_generator.generate_run_report(12345).startswith("Error")
+
+
+def test_pdf_page_count_alias_fits_large_reports():
+    # fpdf reserves one digit per alias character.
+    assert len(report_generator.PAGE_COUNT_ALIAS) >= 5
+
+
+def test_streamed_summary_ranks_single_host_failures(reports):
+    pipeline = report_generator.ReportPipeline("Linux", "L1", ['json'])
+    for parameter in ("A", "B", "A"):
+        pipeline.feed({'parameter': parameter, 'status': "Not Compliant", 'details': ""})
+    pipeline.close()
+    assert pipeline.counts['top_failing'] == [["A", 2], ["B", 1]]
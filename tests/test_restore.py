@@ -0,0 +1,48 @@
+import os
+
+import rollback_store
+import restore
+
+
+def _adopted_point(store, target):
+    """Leaves a stage behind the way AccessControl.sh does when run by hand, then adopts it."""
+    stage = os.path.join(store.stage_dir, "20260101_120000_AccessControl.sh.4194303")
+    os.makedirs(os.path.join(stage, "files"))
+    with open(os.path.join(stage, "entries"), "w", encoding="utf-8") as f:
+        f.write(f"mode\t{target}\t640\t\n")
+    store.adopt_stages()
+    runs = store.list_runs()
+    assert len(runs) == 1 and runs[0]['level'] == 'manual'
+    return store.open_run(runs[0]['id'])
+
+
+def test_adopted_rollback_point_is_restored_and_deleted(tmp_path):
+    store = rollback_store.RollbackStore(str(tmp_path / "rollback"))
+    target = tmp_path / "shadow"
+    target.write_text("secret\n")
+    os.chmod(target, 0o600)
+    run = _adopted_point(store, str(target))
+
+    outcome = restore.rollback_run("Linux", run, max_workers=2)
+
+    assert outcome.errors == []
+    assert outcome.failed == []
+    assert outcome.complete and outcome.deleted
+    assert format(os.stat(target).st_mode & 0o7777, "o") == "640"
+    assert store.list_runs() == []
+
+
+def test_unverified_rollback_point_is_kept(tmp_path, monkeypatch):
+    store = rollback_store.RollbackStore(str(tmp_path / "rollback"))
+    target = tmp_path / "shadow"
+    target.write_text("secret\n")
+    os.chmod(target, 0o600)
+    run = _adopted_point(store, str(target))
+    monkeypatch.setattr(restore, "verify_entry", lambda ctx, store, entry: (False, "simulated"))
+
+    outcome = restore.rollback_run("Linux", run)
+
+    assert not outcome.complete and not outcome.deleted
+    runs = store.list_runs()
+    assert [r['modules'] for r in runs] == [["AccessControl.sh"]]
+    assert runs[0]['unverified'] == 1
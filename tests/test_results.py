@@ -0,0 +1,17 @@
+from results import ResultSet
+
+
+def _results(host, failing):
+    return [{'parameter': parameter, 'status': "Not Compliant", 'details': "", 'host': host} for parameter in failing]
+
+
+def test_top_failing_ranks_every_failure_on_a_single_host():
+    results = ResultSet(_results(None, ["A", "B"]) + [{'parameter': "C", 'status': "Compliant"}], module="M.sh")
+    assert results.summary().top_failing() == [("A", 1), ("B", 1)]
+    assert results.summary().to_dict()['top_failing'] == [{'parameter': "A", 'count': 1},
+                                                           {'parameter': "B", 'count': 1}]
+
+
+def test_top_failing_across_hosts_lists_checks_failing_on_several():
+    results = ResultSet(_results("web1", ["A", "B"]) + _results("web2", ["A"]) + _results("web3", ["A", "C"]))
+    assert results.summary().top_failing() == [("A", 3)]
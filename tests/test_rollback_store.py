@@ -0,0 +1,42 @@
+import os
+
+import rollback_store
+
+
+def _harden(store, files):
+    """Records one hardening run that saved `files` ({target: content}); returns the committed run."""
+    run = store.begin_run("L1")
+    stage = run.stage("AccessControl.sh")
+    os.makedirs(os.path.join(stage, "files"))
+    with open(os.path.join(stage, "entries"), "w", encoding="utf-8") as f:
+        for number, (target, content) in enumerate(files.items(), 1):
+            with open(os.path.join(stage, "files", str(number)), "w", encoding="utf-8") as staged:
+                staged.write(content)
+            f.write(f"file\t{target}\t\tfiles/{number}\n")
+    run.ingest("AccessControl.sh")
+    assert run.commit()
+    return run
+
+
+def _blobs(run):
+    return {entry['target']: entry['blob'] for entry in run.manifest['modules']["AccessControl.sh"]}
+
+
+def test_gc_keeps_blobs_shared_with_a_remaining_run(tmp_path):
+    store = rollback_store.RollbackStore(str(tmp_path / "rollback"))
+    first = _harden(store, {"/etc/login.defs": "PASS_MAX_DAYS 99999\n", "/etc/issue": "Welcome\n"})
+    second = _harden(store, {"/etc/login.defs": "PASS_MAX_DAYS 99999\n"})
+    shared, orphaned = _blobs(first)["/etc/login.defs"], _blobs(first)["/etc/issue"]
+    assert _blobs(second)["/etc/login.defs"] == shared
+
+    orphaned_size = os.path.getsize(store._blob_path(orphaned))
+
+    assert store.delete_run(first.id)
+    assert store.gc() == (1, orphaned_size)
+
+    assert os.path.exists(store._blob_path(shared))
+    assert not os.path.exists(store._blob_path(orphaned))
+    restored = tmp_path / "login.defs"
+    store.extract_blob(shared, str(restored))
+    assert restored.read_text() == "PASS_MAX_DAYS 99999\n"
+    assert [run['id'] for run in store.list_runs()] == [second.id]
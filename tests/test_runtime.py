@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+
+RUNTIME = os.path.join("scripts", "linux", "lib", "runtime.sh")
+
+
+def _emit(*rows):
+    """Emits each (parameter, status, details) row through runtime.sh's emit_result in an Audit run."""
+    script = f'source {RUNTIME}\nruntime_init Audit L1\nwhile (($#)); do emit_result "$1" "$2" "$3"; shift 3; done\n'
+    args = [field for row in rows for field in row]
+    output = subprocess.run(["bash", "-c", script, "module", *args], capture_output=True, text=True,
+                            check=True, env={**os.environ, 'LC_ALL': "C.UTF-8"}).stdout
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_emit_result_escapes_everything_json_needs():
+    awkward = 'say "hi" \\ C:\\path\\ tab\there\nnew line\r\x08\x0c bell\x07 esc\x1b[0m del\x7f é ✓'
+    rows = [
+        ("Quote \"param\"", "Not Compliant", awkward),
+        ("\x01\x02\x1f", "Info", "\\n is not a newline"),
+        ("", "Compliant", ""),
+    ]
+
+    assert _emit(*rows) == [{'parameter': p, 'status': s, 'details': d} for p, s, d in rows]
+
+
+def test_emit_result_output_is_one_line_per_result():
+    # More results than one audit buffer holds, so several flushes are involved.
+    rows = [(f"Check {i}", "Compliant", "multi\nline\ndetails") for i in range(70)]
+    assert [row['parameter'] for row in _emit(*rows)] == [f"Check {i}" for i in range(70)]
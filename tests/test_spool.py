@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+import spool
+
+
+def test_spool_replays_across_reopen_from_an_offset(tmp_path):
+    directory = str(tmp_path / "runs")
+    with spool.ResultSpool("job1", directory) as writer:
+        assert [writer.append("console_output", {'n': n}) for n in range(3)] == [1, 2, 3]
+    with spool.ResultSpool("job1", directory) as writer:
+        # Reopening continues the sequence instead of restarting it.
+        assert writer.append("action_finished", {'n': 3}) == 4
+
+    events, last_seq = spool.read_events("job1", after_seq=1, directory=directory)
+    assert last_seq == 4
+    assert [(e['seq'], e['event'], e['data']['n']) for e in events] == \
+        [(2, "console_output", 1), (3, "console_output", 2), (4, "action_finished", 3)]
+    assert [e['seq'] for e in spool.read_events("job1", after_seq=1, limit=2, directory=directory)[0]] == [2, 3]
+    assert spool.read_events("job1", after_seq=4, directory=directory) == ([], 4)
+
+    chunk, offset = spool.read_bytes("job1", length=10 ** 6, directory=directory)
+    assert chunk.count(b"\n") == 4 and offset == len(chunk)
+    assert spool.read_bytes("job1", offset=offset, directory=directory) == (b"", offset)
+
+
+def test_prune_removes_only_expired_spools(tmp_path):
+    directory = str(tmp_path / "runs")
+    for spool_id in ("old", "new"):
+        with spool.ResultSpool(spool_id, directory) as writer:
+            writer.append("console_output", {})
+    expired = time.time() - (spool.SPOOL_RETENTION_DAYS + 1) * 86400
+    for path in spool._paths("old", directory):
+        os.utime(path, (expired, expired))
+
+    assert spool.prune_spools(directory=directory) == 2
+    assert not spool.spool_exists("old", directory)
+    assert spool.read_events("new", directory=directory)[1] == 1
+
+
+def test_spool_ids_are_plain_identifiers(tmp_path):
+    with pytest.raises(ValueError):
+        spool.ResultSpool("../escape", str(tmp_path))
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import pytest
+
+from sysroot import build_sysroot
+from watch import ComplianceWatcher
+
+
+@pytest.fixture
+def root(tmp_path):
+    return build_sysroot(str(tmp_path / "host"), mounts=4, loaded_modules=4, packages=20)
+
+
+def _watch_until_change(watcher, change, timeout=5.0):
+    """Runs the watcher in a thread, applies `change` and returns the first reported changes."""
+    changes = []
+    reported = threading.Event()
+    watcher.on_change = lambda c: changes.append(c) or reported.set()
+    watcher.baseline()
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        change()
+        reported.wait(timeout)
+    finally:
+        watcher.stop()
+        thread.join()
+    return changes
+
+
+def test_polled_status_change_is_reported(root):
+    watcher = ComplianceWatcher(["AccessControl.sh"], root=root, poll_interval=0.05, use_inotify=False)
+
+    changes = _watch_until_change(watcher, lambda: os.chmod(os.path.join(root, "etc", "shadow"), 0o644))
+
+    assert [(c['parameter'], c['previous'], c['status']) for c in changes] == \
+        [("/etc/shadow permissions", "Compliant", "Not Compliant")]
+    assert changes[0]['config'] == []
+
+
+def test_fstab_edit_is_reported_before_it_is_mounted(root):
+    watcher = ComplianceWatcher(["Filesystem.sh"], root=root, poll_interval=0.05, use_inotify=False)
+    before = time.time()
+
+    def edit_fstab():
+        with open(os.path.join(root, "etc", "fstab"), "a") as f:
+            f.write("tmpfs /dev/shm tmpfs defaults 0 0\n")
+
+    changes = _watch_until_change(watcher, edit_fstab)
+
+    assert changes
+    assert all(c['config'] == ["/etc/fstab"] for c in changes)
+    assert all(c['previous'] == c['status'] and c['changed_at'] >= before for c in changes)
+    assert {c['parameter'] for c in changes} == \
+        {c.check.parameter for c in watcher.checks if c.check.kind == "mount_option"}
+
+
+def test_sysctl_drop_in_is_reported(root):
+    watcher = ComplianceWatcher(["PackageManagement.sh"], root=root, poll_interval=0.05, use_inotify=False)
+
+    def add_drop_in():
+        os.makedirs(os.path.join(root, "etc", "sysctl.d"))
+        with open(os.path.join(root, "etc", "sysctl.d", "50-coredump.conf"), "w") as f:
+            f.write("fs.suid_dumpable = 2\n")
+
+    changes = _watch_until_change(watcher, add_drop_in)
+
+    assert [(c['parameter'], c['config']) for c in changes] == \
+        [("Process: Core Dumps", ["/etc/sysctl.d/*.conf"])]
+
+
+def test_unchanged_inputs_report_nothing(root):
+    watcher = ComplianceWatcher(["AccessControl.sh", "Filesystem.sh"], root=root, use_inotify=False)
+    watcher.baseline()
+    assert watcher._poll({}) == {}
@@ -0,0 +1,329 @@
+import os
+import time
+import errno
+import select
+import struct
+import fnmatch
+import threading
+import ctypes
+import ctypes.util
+
+from probes import ProbeContext, native_checks_for, evaluate
+from incremental import check_inputs, fingerprint, CONTENT_PREFIXES
+
+# --- 1. Watch Definitions ---
+# A burst of events (an editor's write-rename-chmod, a package upgrade) is
+# collected until it has been quiet this long, but never for longer than
+# MAX_DEBOUNCE_SECONDS, before the affected checks are evaluated.
+DEBOUNCE_SECONDS = 0.5
+MAX_DEBOUNCE_SECONDS = 5.0
+
+# /proc and sysctl inputs cannot be watched with inotify; they are compared
+# against their last fingerprint this often. Without inotify, every input is.
+POLL_INTERVAL = 10.0
+
+# Persistent configuration behind the runtime state some checks read. An
+# edit is reported as soon as it is made, even while the running system
+# (/proc/mounts, /proc/sys) still shows the old state.
+CONFIG_INPUTS = {
+    "mount_option": ["file:/etc/fstab"],
+    "sysctl": ["file:/etc/sysctl.conf", "glob:/etc/sysctl.d/*.conf"],
+}
+
+# inotify(7) constants.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Directories are watched rather than files: editors and package managers
+# replace files by renaming, which would silently end a watch on the file.
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    A minimal inotify binding over ctypes (Linux only).
+
+    Raises:
+        OSError: If the C library has no inotify or the instance cannot be created.
+    """
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def read(self, timeout):
+        """Waits up to `timeout` seconds; returns a list of (wd, mask, name) events."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+# --- 2. The Watcher ---
+def config_inputs(check):
+    """The persistent configuration inputs behind a check's runtime state (see CONFIG_INPUTS)."""
+    if check.kind == "all":
+        inputs = []
+        for sub in check.target:
+            inputs.extend(i for i in config_inputs(sub) if i not in inputs)
+        return inputs
+    return list(CONFIG_INPUTS.get(check.kind, []))
+
+
+class WatchedCheck:
+    """A native check, the module it belongs to, the inputs it reads and the configuration behind them."""
+    def __init__(self, module_name, check, inputs, config=()):
+        self.module_name = module_name
+        self.check = check
+        self.config = [i for i in config if i not in inputs]
+        self.inputs = inputs + self.config
+
+
+class ComplianceWatcher:
+    """
+    Keeps the audit of a set of modules current without re-running it.
+
+    The native checks of the modules are evaluated once for a baseline.
+    After that, the directories their inputs live in are watched with
+    inotify and only the checks whose inputs changed are evaluated again.
+    Inputs inotify cannot see (/proc, sysctl, directories that do not
+    exist yet) are polled by fingerprint. The persistent configuration
+    behind runtime state (/etc/fstab, /etc/sysctl.conf, /etc/sysctl.d) is
+    watched as well; an edit to it is reported with the files in the
+    change's `config` even while the check's status stays the same.
+    Modules without native checks cannot be watched and are listed in
+    `unwatched`.
+
+    Args:
+        modules (list): Linux module names, e.g. from manifest.modules_for.
+        root (str): The filesystem root to watch (a sysroot for testing).
+        on_change (callable): on_change(change) when a check's status
+            changes or its configuration is edited; `change` has module,
+            parameter, previous, status, details, changed_at (epoch
+            seconds) and config (the edited configuration files, if any).
+        on_error (callable): on_error(message) for problems that do not stop the watch.
+        debounce (float): Quiet period that ends a burst of events.
+        poll_interval (float): Seconds between fingerprint polls.
+        use_inotify (bool): Set False to poll everything.
+    """
+    def __init__(self, modules, root="/", on_change=None, on_error=None, debounce=DEBOUNCE_SECONDS,
+                 poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.root = root
+        self.on_change = on_change
+        self.on_error = on_error
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.checks = []
+        self.unwatched = []
+        for module_name in modules:
+            checks = native_checks_for("Linux", module_name, "Audit")
+            if checks is None:
+                self.unwatched.append(module_name)
+                continue
+            for check in checks:
+                inputs = check_inputs(check)
+                if inputs is not None:
+                    self.checks.append(WatchedCheck(module_name, check, inputs, config_inputs(check)))
+        self.status = {}
+        self.inotify = None
+        self._watches = {}
+        self._by_directory = {}
+        self._polled = {}
+        self._stop = threading.Event()
+        self._use_inotify = use_inotify
+
+    # --- Baseline and Evaluation ---
+    def _evaluate(self, watched_checks, changed=None):
+        """
+        Evaluates checks against a fresh context and reports status changes,
+        and edits of their configuration. `changed` maps a check to the
+        input ids that triggered it.
+        """
+        ctx = ProbeContext(self.root)
+        changes = []
+        for watched in watched_checks:
+            config = [i.split(":", 1)[1] for i in (changed or {}).get(watched, ()) if i in watched.config]
+            for data in evaluate([watched.check], ctx):
+                key = (watched.module_name, data['parameter'])
+                previous = self.status.get(key)
+                self.status[key] = data['status']
+                if previous is None or (previous == data['status'] and not config):
+                    continue
+                details = data.get('details', '')
+                if previous == data['status']:
+                    details = f"{', '.join(config)} changed; the running system still reports: {details}"
+                changes.append({'module': watched.module_name, 'parameter': data['parameter'],
+                                'previous': previous, 'status': data['status'], 'details': details,
+                                'changed_at': time.time(), 'config': config})
+        for change in changes:
+            if self.on_change: self.on_change(change)
+        return changes
+
+    def baseline(self):
+        """
+        Evaluates every watched check and sets up the watches.
+
+        Returns:
+            dict: (module, parameter) to status for every watched check.
+        """
+        # Watch first, so a change made while the baseline runs is not missed.
+        self._setup_watches()
+        self._evaluate(self.checks)
+        return dict(self.status)
+
+    def _setup_watches(self):
+        ctx = ProbeContext(self.root)
+        if self._use_inotify:
+            try:
+                self.inotify = Inotify()
+            except OSError as e:
+                self._error(f"inotify unavailable ({e}); polling every {self.poll_interval:g}s instead")
+        for watched in self.checks:
+            for input_id in watched.inputs:
+                kind, target = input_id.split(":", 1)
+                watchable = self.inotify is not None and kind in ("file", "glob") \
+                    and not target.startswith(CONTENT_PREFIXES)
+                if not (watchable and self._watch(os.path.dirname(ctx.path(target)), input_id, watched)):
+                    self._poll_input(ctx, input_id, watched)
+
+    def _poll_input(self, ctx, input_id, watched):
+        if input_id not in self._polled:
+            self._polled[input_id] = [fingerprint(ctx, input_id), []]
+        if watched not in self._polled[input_id][1]:
+            self._polled[input_id][1].append(watched)
+
+    def _watch(self, directory, input_id, watched):
+        """Routes events for `pattern` in `directory` to a check; False if it cannot be watched."""
+        if directory not in self._watches:
+            try:
+                wd = self.inotify.add_watch(directory)
+            except OSError:
+                return False
+            self._watches[directory] = wd
+            self._by_directory[wd] = []
+        pattern = os.path.basename(input_id.split(":", 1)[1])
+        self._by_directory[self._watches[directory]].append((pattern, input_id, watched))
+        return True
+
+    def _unwatch(self, wd):
+        """Falls back to polling for a directory whose watch the kernel dropped."""
+        ctx = ProbeContext(self.root)
+        self._watches = {d: w for d, w in self._watches.items() if w != wd}
+        for _, input_id, watched in self._by_directory.pop(wd, []):
+            self._poll_input(ctx, input_id, watched)
+
+    def _error(self, message):
+        if self.on_error: self.on_error(message)
+
+    # --- The Event Loop ---
+    def _affected(self, events, affected):
+        """
+        Adds the checks an inotify batch touches, including every check of a
+        lost watch, to `affected` ({check: input ids that changed}).
+        """
+        for wd, mask, name in events:
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                if wd in self._by_directory:
+                    self._error("A watched directory was removed or replaced; polling it from now on")
+                    for _, input_id, watched in self._by_directory[wd]:
+                        affected.setdefault(watched, set()).add(input_id)
+                    self._unwatch(wd)
+                continue
+            for pattern, input_id, watched in self._by_directory.get(wd, []):
+                if fnmatch.fnmatchcase(name, pattern):
+                    affected.setdefault(watched, set()).add(input_id)
+        return affected
+
+    def _poll(self, affected):
+        """Adds the checks whose polled inputs changed fingerprint to `affected`."""
+        ctx = ProbeContext(self.root)
+        for input_id, entry in self._polled.items():
+            current = fingerprint(ctx, input_id)
+            if current != entry[0]:
+                entry[0] = current
+                for watched in entry[1]:
+                    affected.setdefault(watched, set()).add(input_id)
+        return affected
+
+    def run(self):
+        """Watches until stop() is called, then releases the watches. Call baseline() first."""
+        try:
+            self._loop()
+        finally:
+            self.close()
+
+    def _loop(self):
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.is_set():
+            timeout = max(0.0, next_poll - time.monotonic())
+            affected = {}
+            if self.inotify is not None:
+                events = self.inotify.read(min(timeout, 1.0))
+                if events:
+                    # Debounce: keep reading until the burst goes quiet.
+                    deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+                    while time.monotonic() < deadline:
+                        more = self.inotify.read(self.debounce)
+                        if not more:
+                            break
+                        events.extend(more)
+                    self._affected(events, affected)
+            else:
+                self._stop.wait(min(timeout, 1.0))
+            if time.monotonic() >= next_poll:
+                self._poll(affected)
+                next_poll = time.monotonic() + self.poll_interval
+            if affected:
+                try:
+                    self._evaluate(list(affected), affected)
+                except Exception as e:
+                    self._error(f"Re-evaluating {len(affected)} check(s) failed: {e}")
+
+    def stop(self):
+        """Asks run() to return; safe to call from any thread or a signal handler."""
+        self._stop.set()
+
+    def close(self):
+        """Releases the watches of a watcher that is not running."""
+        self._stop.set()
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None